@@ -138,102 +138,51 @@ class metagraph:
                     Block number at time of the metagraph.
         """
         metagraph = metagraph_impl.Metagraph( network = network, netuid = netuid )
-        metagraph.info = info
-
+        metagraph._set_neuron_columns( info, neurons, block )
         n_total = len(neurons)
 
-        # Fill arrays.
-        uids = [ i for i in range(n_total) ]
-        active = [ 0 for _ in range(n_total) ]
-        stake = [ {} for _ in range(n_total) ]
-        total_stake = [ 0 for _ in range(n_total) ]
-        ranks = [ 0 for _ in range(n_total) ]
-        trust = [ 0 for _ in range(n_total) ]
-        consensus = [ 0 for _ in range(n_total) ]
-        validator_trust = [ 0 for _ in range(n_total) ]
-        incentive = [ 0 for _ in range(n_total) ]
-        emission = [ 0 for _ in range(n_total) ]
-        dividends = [ 0 for _ in range(n_total) ]
-        last_updates = [ -1 for _ in range(n_total) ]
-        validator_permit = [ False for _ in range(n_total) ]
-        endpoints = [ [-1 for _ in range(250) ]  for _ in range(n_total) ]
-        weights = [ [ 0 for _ in range(n_total) ] for _ in range(n_total) ]
-        bonds = [ [0 for _ in range(n_total) ] for _ in range(n_total) ]
-        metagraph._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range(n_total) ]
-        metagraph.neurons = [None for _ in range(n_total)]
-        for n in neurons:
-            metagraph.neurons[n.uid] = n
-            uids[n.uid] = n.uid 
-            active[n.uid] = n.active
-            stake[n.uid] = n.stake # stake is a Dict[str, Balance]
-            total_stake[n.uid] = n.total_stake.tao 
-            ranks[n.uid] = n.rank
-            trust[n.uid] = n.trust
-            consensus[n.uid] = n.consensus
-            validator_trust[n.uid] = n.validator_trust
-            incentive[n.uid] = n.incentive
-            dividends[n.uid] = n.dividends
-            emission[n.uid] = n.emission
-            last_updates[n.uid] = n.last_update
-            validator_permit[n.uid] = n.validator_permit
-            endpoint =  bittensor.endpoint.from_neuron(n)
-            metagraph._endpoint_objs[n.uid] = endpoint 
-            endpoints[n.uid] = endpoint.to_tensor().tolist()
-            if len(n.weights) > 0:
-                w_uids, w_weights = zip(*n.weights)
-                weights[n.uid] = weight_utils.convert_weight_uids_and_vals_to_tensor( n_total, w_uids, w_weights ).tolist()
-            else:
-                weights[n.uid] = [0] * n_total
-            if len(n.bonds) > 0:
-                b_uids, b_bonds = zip(*n.bonds)
-                bonds[n.uid] = weight_utils.convert_bond_uids_and_vals_to_tensor( n_total, b_uids, b_bonds ).tolist()
-            else:
-                bonds[n.uid] = [0] * n_total
-
-        # Set tensors.
-        tn = torch.tensor( n_total, dtype=torch.int64 )
-        tblock = torch.tensor( block, dtype=torch.int64 )
-        tuids = torch.tensor( uids, dtype=torch.int64 )
-        tactive = torch.tensor( active, dtype=torch.int64 )
-       
-        ttotal_stake = torch.tensor( total_stake, dtype=torch.float32 )
-
-        tranks = torch.tensor( ranks, dtype=torch.float32 )
-        ttrust = torch.tensor( trust, dtype=torch.float32 )
-        tconsensus = torch.tensor( consensus, dtype=torch.float32 )
-        tvalidator_trust = torch.tensor( validator_trust, dtype=torch.float32 )
-        tincentive = torch.tensor( incentive, dtype=torch.float32 )
-        temission = torch.tensor( emission, dtype=torch.float32 )
-        tdividends = torch.tensor( dividends, dtype=torch.float32 )
-        tlast_update = torch.tensor( last_updates, dtype=torch.int64 )
-        tvalidator_permit = torch.tensor( validator_permit, dtype=torch.bool )
-        tbonds = torch.tensor( bonds, dtype=torch.int64 )
-        tweights = torch.tensor( weights, dtype=torch.float32 )
-        tendpoints = torch.tensor( endpoints, dtype=torch.int64 )
-
-        # Normalize bond ownership.
-        tbonds = torch.nn.functional.normalize( tbonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( tn ) * 0.5
-
-        # Set params.
-        metagraph.n = torch.nn.Parameter( tn, requires_grad=False )
-        metagraph.block = torch.nn.Parameter( tblock, requires_grad=False )
-        metagraph.uids = torch.nn.Parameter( tuids, requires_grad=False )
-
-        metagraph.stake = stake
-        metagraph.total_stake = torch.nn.Parameter( ttotal_stake, requires_grad=False )
-        
-        metagraph.ranks = torch.nn.Parameter( tranks, requires_grad=False )
-        metagraph.trust = torch.nn.Parameter( ttrust, requires_grad=False )
-        metagraph.consensus = torch.nn.Parameter( tconsensus, requires_grad=False )
-        metagraph.validator_trust = torch.nn.Parameter( tvalidator_trust, requires_grad=False )
-        metagraph.incentive = torch.nn.Parameter( tincentive, requires_grad=False )
-        metagraph.emission = torch.nn.Parameter( temission, requires_grad=False )
-        metagraph.dividends = torch.nn.Parameter( tdividends, requires_grad=False )
-        metagraph.active = torch.nn.Parameter( tactive, requires_grad=False )
-        metagraph.last_update = torch.nn.Parameter( tlast_update, requires_grad=False )
-        metagraph.validator_permit = torch.nn.Parameter( tvalidator_permit, requires_grad=False )
-        metagraph.weights = torch.nn.Parameter( tweights, requires_grad=False )
-        metagraph.bonds = torch.nn.Parameter( tbonds, requires_grad=False )
-        metagraph.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
-
-        return metagraph
\ No newline at end of file
+        # Sparse weights and bonds from the (uid, value) pairs of all neurons.
+        w_rows = [ n.uid for n in neurons for _ in n.weights ]
+        w_cols = [ uid for n in neurons for uid, _ in n.weights ]
+        w_vals = torch.tensor( [ val for n in neurons for _, val in n.weights ], dtype=torch.float64 ) / weight_utils.U16_MAX
+        tweights = torch.sparse_coo_tensor( torch.tensor( [ w_rows, w_cols ], dtype=torch.int64 ).reshape(2, -1),
+                                            w_vals.float(), ( n_total, n_total ) ).coalesce()
+
+        b_rows = torch.tensor( [ n.uid for n in neurons for _ in n.bonds ], dtype=torch.int64 )
+        b_cols = torch.tensor( [ uid for n in neurons for uid, _ in n.bonds ], dtype=torch.int64 )
+        b_vals = torch.tensor( [ val for n in neurons for _, val in n.bonds ], dtype=torch.int64 ).float()
+
+        # Normalize bond ownership, the L1 norm per column plus half of the identity.
+        b_col_sums = torch.zeros( n_total, dtype=torch.float32 ).index_add_( 0, b_cols, b_vals.abs() )
+        b_vals = b_vals / torch.clamp( b_col_sums[ b_cols ], min=1e-12 ) * 0.5
+        diagonal = torch.arange( n_total, dtype=torch.int64 )
+        tbonds = torch.sparse_coo_tensor( torch.stack( [ torch.cat( [ b_rows, diagonal ] ), torch.cat( [ b_cols, diagonal ] ) ] ),
+                                          torch.cat( [ b_vals, torch.full( [ n_total ], 0.5 ) ] ), ( n_total, n_total ) ).coalesce()
+
+        metagraph.weights = tweights # stored sparse, see Metagraph.weights
+        metagraph.bonds = tbonds
+
+        return metagraph
+
+    @staticmethod
+    def from_neurons_lite( network: str, netuid: int, info: 'bittensor.SubnetInfo', neurons: List['bittensor.NeuronInfoLite'], block: int ) -> 'bittensor.Metagraph':
+        r""" Creates a metagraph from a list of neurons without weights and bonds.
+            The weights and bonds of the metagraph are unavailable, see Metagraph.lite.
+            Args: 
+                network: (:obj:`str`, required):
+                    Name of the network for the metagraph.
+                netuid: (:obj:`int`, required):
+                    netuid of the subnet for the metagraph.
+                info: (:obj:`SubnetInfo`, required):
+                    SubnetInfo object for the metagraph, including the subnet's hyperparameters.
+                neurons: (:obj:`List[NeuronInfoLite]`, required):
+                    List of lite neurons to create metagraph from.
+                block: (:obj:`int`, required):
+                    Block number at time of the metagraph.
+        """
+        metagraph = metagraph_impl.Metagraph( network = network, netuid = netuid )
+        metagraph._set_neuron_columns( info, neurons, block )
+        metagraph.weights = None
+        metagraph.bonds = None
+
+        return metagraph
@@ -0,0 +1,134 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Memory-mappable columnar file format of the metagraph state.
+
+A file holds a magic and format version, a json header with the network, netuid, block and the
+dtype, shape and offset of every column, followed by one contiguous array per column.
+Sparse tensors are stored as an indices and a values column.
+"""
+import json
+import os
+import struct
+from typing import Dict, Tuple
+
+import numpy
+import torch
+
+MAGIC = b'BTMG'
+VERSION = 1
+PREAMBLE = struct.Struct('<4sIQ')  # magic, format version, header length
+ALIGNMENT = 64
+
+
+def _align( offset: int ) -> int:
+    return ( offset + ALIGNMENT - 1 ) // ALIGNMENT * ALIGNMENT
+
+
+def write( path: str, tensors: Dict[str, torch.Tensor], header: Dict ):
+    r""" Writes the tensors and header to path, through a temporary file atomically renamed to path,
+    so that readers see either the previous or the new file in full.
+        Args:
+            path (:obj:`str`, `required`):
+                Path of the file.
+            tensors (:obj:`Dict[str, torch.Tensor]`, `required`):
+                Tensors by name, dense or sparse COO.
+            header (:obj:`Dict`, `required`):
+                Json serializable header, stored with the columns.
+    """
+    arrays = {}
+    sparse = {}
+    for name, tensor in tensors.items():
+        tensor = tensor.detach().cpu()
+        if tensor.is_sparse:
+            tensor = tensor.coalesce()
+            sparse[name] = list( tensor.shape )
+            arrays[name + '.indices'] = tensor.indices().numpy()
+            arrays[name + '.values'] = tensor.values().numpy()
+        else:
+            arrays[name] = tensor.numpy()
+
+    # Offsets depend on the header length, so they are relative to the aligned end of the header.
+    columns = {}
+    offset = 0
+    for name, array in arrays.items():
+        columns[name] = { 'dtype': array.dtype.str, 'shape': list( array.shape ), 'offset': offset }
+        offset = _align( offset + array.nbytes )
+    header_bytes = json.dumps( dict( header, columns = columns, sparse = sparse ) ).encode()
+    data_start = _align( PREAMBLE.size + len( header_bytes ) )
+
+    tmp_path = path + '.tmp'
+    with open( tmp_path, 'wb' ) as f:
+        f.write( PREAMBLE.pack( MAGIC, VERSION, len( header_bytes ) ) + header_bytes )
+        for name, array in arrays.items():
+            f.seek( data_start + columns[name]['offset'] )
+            f.write( numpy.ascontiguousarray( array ).tobytes() )
+        f.truncate( data_start + offset )
+        f.flush()
+        os.fsync( f.fileno() )
+    os.replace( tmp_path, path )
+
+
+def read_header( path: str ) -> Tuple[Dict, int]:
+    r""" Returns the header of the file at path and the offset of its first column.
+    """
+    with open( path, 'rb' ) as f:
+        magic, version, header_length = PREAMBLE.unpack( f.read( PREAMBLE.size ) )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError( 'Not a columnar metagraph file of version {}: {}'.format( VERSION, path ) )
+        header = json.loads( f.read( header_length ) )
+    return header, _align( PREAMBLE.size + header_length )
+
+
+def read( path: str, mmap: bool = False ) -> Tuple[Dict[str, torch.Tensor], Dict]:
+    r""" Reads the tensors and header of the file at path.
+        Args:
+            path (:obj:`str`, `required`):
+                Path of the file.
+            mmap (:obj:`bool`, `optional`, defaults to False):
+                If True, dense tensors are memory mapped copy on write, so that processes reading the same
+                file share its pages and no column is read before it is accessed.
+        Returns:
+            tensors (:obj:`Dict[str, torch.Tensor]`):
+                Tensors by name, as passed to write.
+            header (:obj:`Dict`):
+                Header, as passed to write.
+    """
+    header, data_start = read_header( path )
+    columns = header.pop( 'columns' )
+    sparse = header.pop( 'sparse' )
+
+    arrays = {}
+    with open( path, 'rb' ) as f:
+        for name, column in columns.items():
+            dtype = numpy.dtype( column['dtype'] )
+            shape = tuple( column['shape'] )
+            count = int( numpy.prod( shape ) )
+            if mmap and count > 0:
+                array = numpy.memmap( path, dtype = dtype, mode = 'c', offset = data_start + column['offset'], shape = shape )
+            else:
+                f.seek( data_start + column['offset'] )
+                array = numpy.fromfile( f, dtype = dtype, count = count ).reshape( shape )
+            arrays[name] = torch.from_numpy( array )
+
+    tensors = {}
+    for name, tensor in arrays.items():
+        if name.endswith( '.indices' ) and name[:-len( '.indices' )] in sparse:
+            name = name[:-len( '.indices' )]
+            tensors[name] = torch.sparse_coo_tensor( tensor, arrays[name + '.values'], sparse[name] ).coalesce()
+        elif not ( name.endswith( '.values' ) and name[:-len( '.values' )] in sparse ):
+            tensors[name] = tensor
+    return tensors, header
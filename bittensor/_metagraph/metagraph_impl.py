@@ -19,7 +19,7 @@
 
 import os
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from loguru import logger
 
 import pandas
@@ -30,6 +30,50 @@ import bittensor
 import bittensor.utils.networking as net
 from bittensor import Balance
 
+from . import columnar
+
+class KeyList( list ):
+    r""" Immutable list of keys ordered by uid, with O(1) index and membership checks through a key to uid dict.
+    Concatenation and slicing return plain lists.
+    """
+    def __init__( self, keys: List[str] ):
+        super(KeyList, self).__init__( keys )
+        self._uids = {}
+        for uid, key in enumerate( self ):
+            self._uids.setdefault( key, uid ) # first uid, as list.index
+
+    def index( self, key: str, *args ) -> int:
+        if args:
+            return super(KeyList, self).index( key, *args )
+        try:
+            return self._uids[ key ]
+        except (KeyError, TypeError):
+            raise ValueError( '{} is not in list'.format( key ) )
+
+    def uid( self, key: str, default: int = -1 ) -> int:
+        r""" Returns the first uid of key, or default if key is not in the list.
+        """
+        try:
+            return self._uids.get( key, default )
+        except TypeError:
+            return default
+
+    def __contains__( self, key: str ) -> bool:
+        try:
+            return key in self._uids
+        except TypeError:
+            return False
+
+    def __reduce__( self ):
+        return ( self.__class__, ( list( self ), ) )
+
+    def _immutable( self, *args, **kwargs ):
+        raise TypeError( 'Metagraph key lists are immutable, copy with list() to modify.' )
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+
 class Metagraph( torch.nn.Module ):
     r""" Maintains chain state as a torch.nn.Module.
 
@@ -50,7 +94,10 @@ class Metagraph( torch.nn.Module ):
                 Last emission call for each neuron ordered by uid.
 
             weights (:obj:`torch.FloatTensor` of shape :obj:`(metagraph.n, metagraph.n)`):
-                Full weight matrix on chain ordered by uid.
+                Full weight matrix on chain ordered by uid, a dense view of sparse_weights.
+
+            sparse_weights (:obj:`torch.sparse.FloatTensor` of shape :obj:`(metagraph.n, metagraph.n)`):
+                Weight matrix as a sparse COO tensor, None for a lite metagraph.
 
             neurons (:obj:`torch.LongTensor` of shape :obj:`(metagraph.n, -1)`) 
                 Tokenized endpoint information.
@@ -98,15 +145,69 @@ class Metagraph( torch.nn.Module ):
         self.active = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.last_update = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.validator_permit = torch.nn.Parameter(  torch.tensor( [], dtype=torch.bool), requires_grad=False )
-        self.weights = torch.nn.Parameter(  torch.tensor( [], dtype=torch.float32), requires_grad=False )
-        self.bonds = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
+        self.weights = torch.tensor( [], dtype=torch.float32)
+        self.bonds = torch.tensor( [], dtype=torch.float32)
         self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
         self._endpoint_objs = None
+        self._key_index = None
         self.neurons = None
         self.info = None
         return self
     
+    def __setattr__( self, name: str, value ):
+        if name in ['weights', 'bonds']:
+            object.__setattr__( self, name, value ) # property setters, stored sparse instead of as dense parameters
+        else:
+            super(Metagraph, self).__setattr__( name, value )
+
+    @staticmethod
+    def _to_sparse( tensor: torch.Tensor ) -> torch.Tensor:
+        tensor = tensor.detach()
+        return tensor.coalesce() if tensor.is_sparse else tensor.to_sparse().coalesce()
+
+    @property
+    def lite( self ) -> bool:
+        r""" True if the metagraph was synced without weights and bonds, which are then unavailable.
+        """
+        return self.sparse_weights is None
+
+    def _check_available( self, name: str ):
+        if getattr( self, 'sparse_' + name ) is None:
+            raise ValueError( 'Metagraph {} are unavailable, the metagraph was synced with lite=True. '
+                              'Sync with lite=False to download {}.'.format( name, name ) )
+
+    @property
+    def weights( self ) -> torch.FloatTensor:
+        r""" Dense weight matrix, materialized from sparse_weights on first access.
+        Raises ValueError if the metagraph is lite.
+        """
+        self._check_available( 'weights' )
+        if self._weights is None or self._weights.device != self.sparse_weights.device:
+            self._weights = self.sparse_weights.to_dense()
+        return self._weights
+
+    @weights.setter
+    def weights( self, weights: Optional[torch.Tensor] ):
+        # None marks the weights unavailable, the parameter is then left out of the state_dict.
+        self.sparse_weights = torch.nn.Parameter( Metagraph._to_sparse( weights ), requires_grad=False ) if weights is not None else None
+        self._weights = None
+
+    @property
+    def bonds( self ) -> torch.FloatTensor:
+        r""" Dense bond matrix, materialized from sparse_bonds on first access.
+        Raises ValueError if the metagraph is lite.
+        """
+        self._check_available( 'bonds' )
+        if self._bonds is None or self._bonds.device != self.sparse_bonds.device:
+            self._bonds = self.sparse_bonds.to_dense()
+        return self._bonds
+
+    @bonds.setter
+    def bonds( self, bonds: Optional[torch.Tensor] ):
+        self.sparse_bonds = torch.nn.Parameter( Metagraph._to_sparse( bonds ), requires_grad=False ) if bonds is not None else None
+        self._bonds = None
+
     @property
     def S(self) -> torch.FloatTensor:
         """ Stake
@@ -168,27 +269,97 @@ class Metagraph( torch.nn.Module ):
         """
         return self.weights
 
+    def _set_neuron_columns( self, info: 'bittensor.SubnetInfo', neurons: List['bittensor.NeuronInfoLite'], block: int ):
+        r""" Sets the per uid state of the metagraph from a list of neurons, all but weights and bonds.
+        """
+        self.info = info
+
+        n_total = len(neurons)
+        index = torch.tensor( [ n.uid for n in neurons ], dtype=torch.int64 )
+
+        def column( values: list, dtype: torch.dtype, default = 0 ) -> torch.Tensor:
+            # Per uid column in a single construction, uids without a neuron keep the default.
+            tensor = torch.full( [ n_total ], default, dtype=dtype )
+            tensor[ index ] = torch.tensor( values, dtype=dtype )
+            return tensor
+
+        self.neurons = [ None for _ in range(n_total) ]
+        self._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range(n_total) ]
+        for n in neurons:
+            self.neurons[n.uid] = n
+            self._endpoint_objs[n.uid] = bittensor.endpoint.from_neuron(n)
+        stake = [ {} for _ in range(n_total) ]
+        for n in neurons:
+            stake[n.uid] = n.stake # stake is a Dict[str, Balance]
+
+        tendpoints = torch.stack( [ endpoint.to_tensor() for endpoint in self._endpoint_objs ] ) if n_total > 0 \
+                     else torch.tensor( [], dtype=torch.int64 )
+
+        # Set params.
+        self.n = torch.nn.Parameter( torch.tensor( n_total, dtype=torch.int64 ), requires_grad=False )
+        self.block = torch.nn.Parameter( torch.tensor( block, dtype=torch.int64 ), requires_grad=False )
+        self.uids = torch.nn.Parameter( torch.arange( n_total, dtype=torch.int64 ), requires_grad=False )
+
+        self.stake = stake
+        self.total_stake = torch.nn.Parameter( column( [ n.total_stake.tao for n in neurons ], torch.float32 ), requires_grad=False )
+
+        self.ranks = torch.nn.Parameter( column( [ n.rank for n in neurons ], torch.float32 ), requires_grad=False )
+        self.trust = torch.nn.Parameter( column( [ n.trust for n in neurons ], torch.float32 ), requires_grad=False )
+        self.consensus = torch.nn.Parameter( column( [ n.consensus for n in neurons ], torch.float32 ), requires_grad=False )
+        self.validator_trust = torch.nn.Parameter( column( [ n.validator_trust for n in neurons ], torch.float32 ), requires_grad=False )
+        self.incentive = torch.nn.Parameter( column( [ n.incentive for n in neurons ], torch.float32 ), requires_grad=False )
+        self.emission = torch.nn.Parameter( column( [ n.emission for n in neurons ], torch.float32 ), requires_grad=False )
+        self.dividends = torch.nn.Parameter( column( [ n.dividends for n in neurons ], torch.float32 ), requires_grad=False )
+        self.active = torch.nn.Parameter( column( [ n.active for n in neurons ], torch.int64 ), requires_grad=False )
+        self.last_update = torch.nn.Parameter( column( [ n.last_update for n in neurons ], torch.int64, default=-1 ), requires_grad=False )
+        self.validator_permit = torch.nn.Parameter( column( [ n.validator_permit for n in neurons ], torch.bool, default=False ), requires_grad=False )
+        self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
+        self.build_key_index()
+
+    def build_key_index( self ) -> Tuple[KeyList, KeyList, Dict[str, Tuple[int]]]:
+        r""" Builds the hotkey and coldkey index from the endpoints, once per sync and load.
+            Returns:
+                hotkeys (:obj:`KeyList`), coldkeys (:obj:`KeyList`), coldkey_uids (:obj:`Dict[str, Tuple[int]]`)
+        """
+        dummy = bittensor.endpoint.dummy()
+        endpoints = [ endpoint if endpoint != dummy else None for endpoint in self.endpoint_objs ]
+        hotkeys = KeyList( [ endpoint.hotkey if endpoint is not None else '' for endpoint in endpoints ] )
+        coldkeys = KeyList( [ endpoint.coldkey if endpoint is not None else '' for endpoint in endpoints ] )
+        coldkey_uids = {}
+        for uid, coldkey in enumerate( coldkeys ):
+            coldkey_uids.setdefault( coldkey, [] ).append( uid )
+        self._key_index = ( hotkeys, coldkeys, { coldkey: tuple( uids ) for coldkey, uids in coldkey_uids.items() } )
+        return self._key_index
+
+    @property
+    def key_index( self ) -> Tuple[KeyList, KeyList, Dict[str, Tuple[int]]]:
+        r""" Returns the cached hotkey and coldkey index, built on first access after a sync or load.
+        """
+        if getattr( self, '_key_index', None ) is None or len( self._key_index[0] ) != self.n.item():
+            return self.build_key_index()
+        return self._key_index
+
     @property
     def hotkeys( self ) -> List[str]:
         r""" Returns hotkeys for each neuron.
             Returns:
                 hotkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
-                    Neuron hotkeys.
+                    Neuron hotkeys, an immutable list with O(1) index and membership checks.
         """
         if self.n.item() == 0:
             return []
-        return [ neuron.hotkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.key_index[0]
 
     @property
     def coldkeys( self ) -> List[str]:
         r""" Returns coldkeys for each neuron.
             Returns:
                 coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
-                    Neuron coldkeys.
+                    Neuron coldkeys, an immutable list with O(1) index and membership checks.
         """
         if self.n.item() == 0:
             return []
-        return [ neuron.coldkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.key_index[1]
 
     @property
     def modalities( self ) -> List[str]:
@@ -240,28 +411,45 @@ class Metagraph( torch.nn.Module ):
                 uid: (`int`):
                     The uid for specified hotkey, -1 if hotkey does not exist.
         """ 
-        if hotkey in self.hotkeys:
-            return self.hotkeys.index(hotkey) 
-        else:
+        if self.n.item() == 0:
             return -1
+        return self.key_index[0].uid( hotkey )
+
+    def coldkey_to_uids( self, coldkey:str ) -> Tuple[int]:
+        r""" Fetch the uids of the hotkeys of a coldkey.
+            Args:
+                coldkey: (`str`, required):
+                    Coldkey to fetch the uids for.
 
-    def load( self, network: Optional[str] = None, netuid: Optional[int] = None  ) -> 'Metagraph':
-        r""" Loads this metagraph object's state_dict from bittensor root dir.
+            Return:
+                uids: (`Tuple[int]`):
+                    The uids for specified coldkey, empty if coldkey does not exist.
+        """
+        if self.n.item() == 0:
+            return ()
+        return self.key_index[2].get( coldkey, () )
+
+    def load( self, network: Optional[str] = None, netuid: Optional[int] = None, mmap: bool = False ) -> 'Metagraph':
+        r""" Loads this metagraph object from bittensor root dir, from the columnar file written by save
+            or else from the state_dict of previous versions.
             Args: 
                 network (:obj:`str`, `optional`, defaults to None):
                     Network of state_dict to load, defaults to the network of the metagraph object.
                 netuid (:obj:`int`, `optional`, defaults to None):
                     netuid of the subnet of state_dict to load, defaults to the netuid of the metagraph object.
+                mmap (:obj:`bool`, `optional`, defaults to False):
+                    If True, memory maps the columnar file, see load_from_path.
         """
         try:
             if network == None:
                 network = self.network
             if netuid == None:
                 netuid = self.netuid
-            metagraph_path = f"~/.bittensor/{str(network)}_{str(netuid)}.pt"
-            metagraph_path = os.path.expanduser(metagraph_path)
+            metagraph_path = os.path.expanduser(f"~/.bittensor/{str(network)}_{str(netuid)}.mg")
+            if not os.path.isfile(metagraph_path):
+                metagraph_path = os.path.expanduser(f"~/.bittensor/{str(network)}_{str(netuid)}.pt")
             if os.path.isfile(metagraph_path):
-                self.load_from_path( path = metagraph_path )
+                self.load_from_path( path = metagraph_path, mmap = mmap )
                 # Update network and netuid.
                 self.network = network
                 self.netuid = netuid
@@ -272,7 +460,7 @@ class Metagraph( torch.nn.Module ):
         return self
 
     def save( self, network: Optional[str] = None, netuid: Optional[int] = None ) -> 'Metagraph':
-        r""" Saves this metagraph object's state_dict under bittensor root dir.
+        r""" Saves this metagraph object as a columnar file under bittensor root dir.
             Args: 
                 network (:obj:`str`, `optional`, defaults to None):
                     Network of state_dict to save, defaults to the network of the metagraph object.
@@ -283,17 +471,28 @@ class Metagraph( torch.nn.Module ):
             network = self.network
         if netuid == None:
             netuid = self.netuid
-        return self.save_to_path( path = '~/.bittensor/', filename = f"{str(network)}_{str(netuid)}.pt")
+        return self.save_columnar_to_path( path = '~/.bittensor/', filename = f"{str(network)}_{str(netuid)}.mg")
 
-    def load_from_path(self, path:str ) -> 'Metagraph':
-        r""" Loads this metagraph object with state_dict under the specified path.
+    def load_from_path(self, path:str, mmap: bool = False ) -> 'Metagraph':
+        r""" Loads this metagraph object from a columnar file or a state_dict under the specified path.
             Args: 
                 path: (:obj:`str`, required):
-                    Path to load state_dict.
+                    Path to load from.
+                mmap: (:obj:`bool`, optional, defaults to False):
+                    If True, memory maps the columns of a columnar file instead of reading them, so that
+                    processes loading the same file share its pages. Ignored for state_dicts.
         """
         full_path = os.path.expanduser(path)
-        metastate = torch.load( full_path )
-        metagraph = self.load_from_state_dict( metastate )
+        with open( full_path, 'rb' ) as f:
+            is_columnar = f.read( len( columnar.MAGIC ) ) == columnar.MAGIC
+        if is_columnar:
+            metastate, header = columnar.read( full_path, mmap = mmap )
+            metagraph = self.load_from_state_dict( metastate )
+            info = header['info']
+            metagraph.info = bittensor.SubnetInfo( **dict( info, burn = Balance.from_rao( info['burn'] ) ) ) if info is not None else None
+        else:
+            metastate = torch.load( full_path )
+            metagraph = self.load_from_state_dict( metastate )
         self.__dict__.update(metagraph.__dict__)
         return self
 
@@ -309,6 +508,24 @@ class Metagraph( torch.nn.Module ):
         torch.save(metastate, full_path + '/' + filename)
         return self
 
+    def save_columnar_to_path(self, path:str, filename:str ) -> 'Metagraph':
+        r""" Saves this metagraph object as a columnar file to the specified path, one contiguous array per
+            state_dict entry and a header with the network, netuid, block and subnet info.
+            The file is replaced atomically, processes loading it concurrently see the previous or the new metagraph.
+            Args: 
+                path: (:obj:`str`, required):
+                    Path to save the file.
+                filename: (:obj:`str`, required):
+                    Name of the file.
+        """
+        full_path = os.path.expanduser(path)
+        os.makedirs(full_path, exist_ok=True)
+        metastate = { name: tensor for name, tensor in self.state_dict().items() if name != 'info' }
+        info = dict( self.info.__dict__, burn = self.info.burn.rao ) if isinstance( self.info, bittensor.SubnetInfo ) else None
+        header = { 'network': self.network, 'netuid': self.netuid, 'block': self.block.item(), 'info': info }
+        columnar.write( os.path.join( full_path, filename ), metastate, header )
+        return self
+
     def load_from_state_dict(self, state_dict: dict ) -> 'Metagraph':
         r""" Loads this metagraph object from passed state_dict.
             Args: 
@@ -335,14 +552,19 @@ class Metagraph( torch.nn.Module ):
         self.active = torch.nn.Parameter( state_dict['active'], requires_grad=False )
         self.last_update = torch.nn.Parameter( state_dict['last_update'], requires_grad=False )
         self.validator_permit = torch.nn.Parameter( state_dict['validator_permit'], requires_grad=False )
-        self.weights = torch.nn.Parameter( state_dict['weights'], requires_grad=False )
-        self.bonds = torch.nn.Parameter( state_dict['bonds'], requires_grad=False )
+        # Dense weights and bonds of state_dicts saved by previous versions are converted to sparse,
+        # lite metagraphs are saved without weights and bonds.
+        self.weights = state_dict['sparse_weights'] if 'sparse_weights' in state_dict else state_dict.get('weights')
+        self.bonds = state_dict['sparse_bonds'] if 'sparse_bonds' in state_dict else state_dict.get('bonds')
         self.endpoints = torch.nn.Parameter( state_dict['endpoints'], requires_grad=False )
         self._endpoint_objs = None
+        self._key_index = None
+        if self.n.item() > 0:
+            self.build_key_index()
         self.info = bittensor.SubnetInfo.from_parameter_dict( state_dict['info'] ) if 'info' in state_dict else None
         return self
 
-    def sync ( self, netuid: Optional[int] = None, subtensor: 'bittensor.Subtensor' = None, block: Optional[int] = None ) -> 'Metagraph':
+    def sync ( self, netuid: Optional[int] = None, subtensor: 'bittensor.Subtensor' = None, block: Optional[int] = None, incremental: bool = False, lite: bool = False ) -> 'Metagraph':
         r""" Synchronizes this metagraph with the chain state.
             Args:
                 subtensor: (:obj:`bittensor.Subtensor`, optional, defaults to None):
@@ -353,6 +575,11 @@ class Metagraph( torch.nn.Module ):
                     Defaults to the netuid of the metagraph object.
                 block: (:obj:`int`, optional, defaults to None):
                     block to sync with. If None, syncs with the current block.
+                incremental: (:obj:`bool`, optional, defaults to False):
+                    If True, syncs from the current state, downloading in full only the neurons
+                    whose weights or bonds may have changed. Falls back to a full sync without a previous sync.
+                lite: (:obj:`bool`, optional, defaults to False):
+                    If True, syncs without weights and bonds, which are then unavailable.
             Returns:
                 self: (:obj:`Metagraph`, required):
                     Returns self.
@@ -365,7 +592,7 @@ class Metagraph( torch.nn.Module ):
             if netuid == None:
                 raise ValueError('Metagraph.sync() requires a netuid to sync with.')
         # Pull metagraph from chain using subtensor.
-        metagraph = subtensor.metagraph( netuid = netuid, block = block )
+        metagraph = subtensor.metagraph( netuid = netuid, block = block, previous = self if incremental else None, lite = lite )
         # Update self with new values.
         self.__dict__.update(metagraph.__dict__)
         return self
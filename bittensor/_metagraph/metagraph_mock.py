@@ -84,8 +84,8 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         self.active = torch.nn.Parameter( tactive, requires_grad=False )
         self.last_update = torch.nn.Parameter( tlast_update, requires_grad=False )
         self.validator_permit = torch.nn.Parameter( tvalidator_permit, requires_grad=False )
-        self.weights = torch.nn.Parameter( tweights, requires_grad=False )
-        self.bonds = torch.nn.Parameter( tbonds, requires_grad=False )
+        self.weights = tweights
+        self.bonds = tbonds
         self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
 
         print("---- MOCKED METAGRAPH INITIALIZED ----")
@@ -111,11 +111,12 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         self.active = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.last_update = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.validator_permit = torch.nn.Parameter(  torch.tensor( [], dtype=torch.bool), requires_grad=False )
-        self.weights = torch.nn.Parameter(  torch.tensor( [], dtype=torch.float32), requires_grad=False )
-        self.bonds = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
+        self.weights = torch.tensor( [], dtype=torch.float32)
+        self.bonds = torch.tensor( [], dtype=torch.int64)
         self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
         self._endpoint_objs = None
+        self._key_index = None
         return self
 
     def load( self, network:str = None  ) -> 'bittensor.Metagraph':
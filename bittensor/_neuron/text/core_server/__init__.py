@@ -214,7 +214,7 @@ class neuron:
 
         # Load/Create our bittensor wallet.
         self.wallet.reregister(subtensor=self.subtensor, netuid = self.config.netuid)
-        self.metagraph.load().sync(netuid = self.config.netuid, subtensor=self.subtensor).save()
+        self.metagraph.load().sync(netuid = self.config.netuid, subtensor=self.subtensor, lite = self.config.neuron.lite_sync).save()
 
         # Create our optimizer.
         optimizer = torch.optim.SGD(
@@ -287,15 +287,14 @@ class neuron:
                             current_block = self.subtensor.get_current_block()
                             logger.info(f'local training\titeration: {iteration}\tloss: {loss}')
                     else:
-                        time.sleep(1)
+                        # Wakes on the next block, current_block is then read from the block subscription.
+                        self.subtensor.wait_for_block( timeout = 1 )
                 
                 if iteration != 0:
                     (losses/iteration).backward()
             
             else:
-                while end_block > current_block:
-                    time.sleep(12)
-                    current_block = self.subtensor.get_current_block()
+                current_block = self.subtensor.wait_for_block( end_block )
 
             # --- Update parameters
             if (self.config.neuron.local_train and iteration > 0) or (self.config.neuron.remote_train and self.model.backward_gradients_count > 0):
@@ -310,6 +309,8 @@ class neuron:
                     clip_grad_norm_(self.model.parameters(), 1.0)
                     optimizer.step()
                     optimizer.zero_grad()
+                    # Cached outputs were computed with the previous parameters.
+                    self.model.model_output_cache.clear()
                 logger.info('Optimization Successful: Model updated')
 
                 if (self.config.neuron.local_train and iteration > 0):
@@ -342,10 +343,12 @@ class neuron:
             
             if self.config.wandb.api_key != 'default':
 
-                df = pandas.concat( [
-                    bittensor.utils.indexed_values_to_dataframe( prefix = 'w_i_{}'.format(nn.uid), index = self.metagraph.uids, values = self.metagraph.W[:, uid] ),
-                    self.axonaxon.to_dataframe( metagraph = self.metagraph ),
-                ], axis = 1)
+                columns = []
+                # Lite metagraphs have no weights to log.
+                if not self.metagraph.lite:
+                    columns.append( bittensor.utils.indexed_values_to_dataframe( prefix = 'w_i_{}'.format(nn.uid), index = self.metagraph.uids, values = self.metagraph.W[:, uid] ) )
+                columns.append( self.axonaxon.to_dataframe( metagraph = self.metagraph ) )
+                df = pandas.concat( columns, axis = 1)
                 df['uid'] = df.index
                 wandb_info_axon = self.axon.to_wandb()                
                 wandb.log( { **data, **wandb_info_axon, **local_data }, step = current_block )
@@ -379,7 +382,7 @@ class neuron:
 
 
             if current_block - last_set_block > blocks_per_set_weights:
-                self.metagraph.sync(netuid=self.config.netuid, subtensor = self.subtensor)
+                self.metagraph.sync(netuid=self.config.netuid, subtensor = self.subtensor, lite = self.config.neuron.lite_sync)
                 last_set_block = current_block
                 epoch_starting_successes = self.axon.stats.total_successes
                 epoch_starting_requests = self.axon.stats.total_requests
@@ -449,7 +452,7 @@ class neuron:
             if (self.metagraph.S[incoming_uid] < self.config.neuron.seq2seq_stake) \
                 or (batch_size > self.config.neuron.max_batch_size) \
                 or (sequence_len > self.config.neuron.max_sequence_len) \
-                or (self.metagraph.W[incoming_uid,  self.uid]):
+                or (not self.metagraph.lite and self.metagraph.W[incoming_uid,  self.uid]):
                 return False     
         else:
             raise Exception('Unknown Synapse')
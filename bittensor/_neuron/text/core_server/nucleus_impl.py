@@ -1,9 +1,13 @@
 import argparse
+import hashlib
 import math
+import time
 import bittensor
 import torch
 from torch import nn
 import torch.nn.functional as F
+from collections import OrderedDict
+from threading import Lock
 from types import SimpleNamespace
 from typing import Tuple, Optional
 
@@ -15,6 +19,111 @@ from bittensor.utils.tokenizer_utils import prep_tokenizer, get_translation_map,
 
 from loguru import logger; logger = logger.opt(colors=True)
 
+class ModelOutputCache:
+    r""" LRU cache of pretrained model outputs keyed by a hash of the remapped input ids and attention mask.
+        Lets the model run once when several synapses or validators query the same batch within a short window.
+        Only the logits and last hidden state are kept, and entries expire after ttl seconds.
+
+        Args:
+            max_bytes (:obj:`int`, `required`):
+                Memory budget of the cached tensors in bytes, a budget of 0 disables the cache.
+            ttl (:obj:`float`, `required`):
+                Seconds an entry stays valid after it was inserted.
+    """
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (insert_time, nbytes, logits, last_hidden), least recently used first
+        self.inserted = OrderedDict()  # key -> insert_time, oldest first, entries expire in this order
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def key(input_ids: torch.LongTensor, attention_mask: Optional[torch.Tensor] = None) -> str:
+        r""" Device independent hash of the remapped input ids and of the attention mask passed to the model,
+            outputs computed without a mask are keyed apart from outputs computed with one.
+        """
+        input_ids = input_ids.detach().to('cpu', torch.int64).contiguous()
+        digest = hashlib.blake2b(str(tuple(input_ids.shape)).encode(), digest_size=16)
+        digest.update(input_ids.numpy().tobytes())
+        if attention_mask is None:
+            digest.update(b'no_attention_mask')
+        else:
+            attention_mask = attention_mask.detach().to('cpu', torch.int64).contiguous()
+            digest.update(b'attention_mask' + attention_mask.numpy().tobytes())
+        return digest.hexdigest()
+
+    def get(self, input_ids: torch.LongTensor, attention_mask: Optional[torch.Tensor] = None) -> Optional[transformers.modeling_outputs.CausalLMOutputWithPast]:
+        r""" Returns a fresh model output holding the cached logits and last hidden state, or None on a miss.
+        """
+        if self.max_bytes <= 0:
+            return None
+        key = self.key(input_ids, attention_mask)
+        with self.lock:
+            self._expire()
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        _, _, logits, last_hidden = entry
+        hidden_states = (last_hidden,) if last_hidden is not None else None
+        return transformers.modeling_outputs.CausalLMOutputWithPast(logits=logits, hidden_states=hidden_states)
+
+    def put(self, input_ids: torch.LongTensor, model_output: transformers.modeling_outputs.CausalLMOutputWithPast,
+            attention_mask: Optional[torch.Tensor] = None):
+        r""" Stores the detached logits and last hidden state of model_output, evicting least recently used entries.
+        """
+        if self.max_bytes <= 0:
+            return
+        logits = model_output.logits.detach()
+        hidden_states = getattr(model_output, 'hidden_states', None)
+        last_hidden = hidden_states[-1].detach() if hidden_states is not None else None
+        nbytes = logits.element_size() * logits.nelement()
+        if last_hidden is not None:
+            nbytes += last_hidden.element_size() * last_hidden.nelement()
+        if nbytes > self.max_bytes:
+            return
+
+        key = self.key(input_ids, attention_mask)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+                del self.inserted[key]
+            now = time.time()
+            self.entries[key] = (now, nbytes, logits, last_hidden)
+            self.inserted[key] = now
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                evicted, (_, evicted_bytes, _, _) = self.entries.popitem(last=False)
+                del self.inserted[evicted]
+                self.total_bytes -= evicted_bytes
+
+    def clear(self):
+        r""" Removes all entries, e.g. after the model parameters change.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.inserted.clear()
+            self.total_bytes = 0
+
+    def _expire(self):
+        # Only the expired entries at the front of the insertion order are visited.
+        now = time.time()
+        while self.inserted:
+            key, insert_time = next(iter(self.inserted.items()))
+            if now - insert_time <= self.ttl:
+                break
+            del self.inserted[key]
+            self.total_bytes -= self.entries.pop(key)[1]
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class server(torch.nn.Module):
     def __init__(self, 
                 config: 'bittensor.config' = None,
@@ -115,6 +224,8 @@ class server(torch.nn.Module):
         
         self.outputs_cache = None
         self.gradients_cache = None
+        self.model_output_cache = ModelOutputCache(max_bytes=int(self.config.neuron.output_cache.size_mb * 1024 ** 2),
+                                                   ttl=self.config.neuron.output_cache.ttl)
         self.best_loss = math.inf
         self.best_remote_loss = math.inf
 
@@ -269,16 +380,11 @@ class server(torch.nn.Module):
         tokens = self.token_remap(token_batch, std_tokenizer=tokenizer, return_offsets_mapping=True)  # remap to server tokenizer
         if model_output == None:
             if self.config.neuron.local_train:
-                model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                                attention_mask=tokens['attention_mask'],
-                                                output_hidden_states=True)
+                model_output = self.pre_model_forward(tokens)
             else:
                 with torch.no_grad():
-                    model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                                    attention_mask=tokens['attention_mask'],
-                                                    output_hidden_states=True)
+                    model_output = self.pre_model_forward(tokens)
 
-            self.model_output_check(model_output)
         return None, model_output, model_output.logits
     
     def encode_forward(self,inputs,tokenizer=None, model_output = None):
@@ -308,14 +414,10 @@ class server(torch.nn.Module):
 
         if model_output == None:
             if self.config.neuron.remote_train:
-                model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                                attention_mask=tokens['attention_mask'],
-                                                output_hidden_states=True)
+                model_output = self.pre_model_forward(tokens)
             else:
                 with torch.no_grad():
-                    model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                                    attention_mask=tokens['attention_mask'],
-                                                    output_hidden_states=True)
+                    model_output = self.pre_model_forward(tokens)
 
         self.model_output_check(model_output)
         pre_hidden = model_output.hidden_states[-1]
@@ -366,10 +468,7 @@ class server(torch.nn.Module):
         def _forward(_model_output=model_output):
             if _model_output is None:
                 # transformer models like gerpt2 typically perform worse with left-side attention mask, so turning it off
-                _model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                                #attention_mask=tokens['attention_mask'],
-                                               output_hidden_states=True)
-                self.model_output_check(_model_output)
+                _model_output = self.pre_model_forward(tokens, attention_mask=False)
             pre_logits = _model_output.logits  # [batch_size, sequence_len, self.tokenizer.vocab_len]
             probs_std = translate_logits_to_probs_std(pre_logits,
                                                       tokens['offset_mapping'], tokens['offset_mapping_std'],
@@ -437,10 +536,7 @@ class server(torch.nn.Module):
 
         def _forward(_model_output=model_output):
             if _model_output is None:
-                _model_output = self.pre_model(input_ids=tokens['input_ids'],
-                                               attention_mask=tokens['attention_mask'],
-                                               output_hidden_states=True)
-                self.model_output_check(_model_output)
+                _model_output = self.pre_model_forward(tokens)
             # model_output.logits: [batch_size, sequence_len, server_vocab_size]
             last_logits = _model_output.logits[:, -1, :]  # [batch_size] server prediction of continuation, right-aligned
 
@@ -461,6 +557,36 @@ class server(torch.nn.Module):
         with torch.no_grad():
             return _forward()  # no gradients
 
+    def pre_model_forward(self, tokens, attention_mask: bool = True) -> transformers.modeling_outputs.CausalLMOutputWithPast:
+        r""" Runs the pretrained model on remapped tokens, reusing a cached output for identical input ids and mask.
+            The cache is only consulted when gradients are disabled, so training paths always run the model.
+
+            Args:
+                tokens (:obj:`transformers.BatchEncoding`, `required`):
+                    Remapped tokens with input_ids and attention_mask.
+                attention_mask (:obj:`bool`, `optional`):
+                    If the attention mask should be passed to the pretrained model.
+
+            Returns:
+                model_output (:obj:`transformers.modeling_outputs.CausalLMOutputWithPast`, `required`):
+                    The output of transformers AutoModel.
+        """
+        mask = tokens['attention_mask'] if attention_mask else None
+        use_cache = not torch.is_grad_enabled()
+        if use_cache:
+            model_output = self.model_output_cache.get(tokens['input_ids'], mask)
+            if model_output is not None:
+                return model_output
+
+        model_output = self.pre_model(input_ids=tokens['input_ids'],
+                                      attention_mask=mask,
+                                      output_hidden_states=True)
+        self.model_output_check(model_output)
+
+        if use_cache:
+            self.model_output_cache.put(tokens['input_ids'], model_output, mask)
+        return model_output
+
     def model_output_check(self, model_output: transformers.modeling_outputs.CausalLMOutputWithPast):
         """
             Verify the model has been ran correctly with valid output.
@@ -533,6 +659,7 @@ class server(torch.nn.Module):
                     self.mapping.load_state_dict(state_dict['mapping'])
                 self.best_loss = state_dict['best_loss']
                 self.best_remote_loss = state_dict['best_remote_loss']
+                self.model_output_cache.clear()
                 bittensor.logging.success( prefix = 'Reloaded model', sufix = '<blue>{}/model.torch</blue>'.format( path ))
 
 
@@ -571,6 +698,7 @@ class server(torch.nn.Module):
         parser.add_argument('--neuron.blacklist.time', type=int, help='how often a peer can query you (seconds) ', default=1)
         parser.add_argument('--neuron.blocks_per_set_weights', type=float, help='how often to set weights', default=-1)
         parser.add_argument('--neuron.metagraph_sync', type=float, help='how often to sync the metagraph', default=100000)
+        parser.add_argument('--neuron.lite_sync', action='store_true', help='If true, sync the metagraph without weights and bonds, the seq2seq blacklist on weights is then skipped.', default=False)
         parser.add_argument('--neuron.blacklist_allow_non_registered', action='store_true', help='''If true, allow non-registered peers''', default=False)
         parser.add_argument('--neuron.disable_blacklist', action='store_true', help='Turns off blacklisting', default=False)
         parser.add_argument('--neuron.disable_priority', action='store_true', help='Turns off priority threadpool', default=False)
@@ -578,6 +706,8 @@ class server(torch.nn.Module):
         parser.add_argument('--neuron.max_batch_size', type=int, help='The maximum batch size for forward requests.', default=-1)
         parser.add_argument('--neuron.max_sequence_len', type=int, help='The maximum sequence length for forward requests.', default=-1)
         parser.add_argument('--neuron.blacklist.hotkeys', type=str, required=False, nargs='*', action='store', help='To blacklist certain hotkeys', default=[])
+        parser.add_argument('--neuron.output_cache.size_mb', type=float, help='Memory budget (MB) of the model output cache shared across synapses and requests, 0 disables it.', default=512)
+        parser.add_argument('--neuron.output_cache.ttl', type=float, help='Seconds a cached model output stays valid.', default=12)
 
         # Synapse Arguements
         parser.add_argument('--neuron.lasthidden', action='store_false', help='To turn off last hidden synapse', default=True)
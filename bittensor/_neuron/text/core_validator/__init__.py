@@ -37,10 +37,17 @@ from rich import print
 from rich.console import Console
 from rich.traceback import install
 from typing import List, Tuple, Callable, Dict, Any, Union, Set
+from types import SimpleNamespace
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from ..neuron_utilities import ThreadQueue, PositionalEncoding, calc_loss_fct
+from .neuron_stats import NeuronStats
+from .checkpoint import ValidatorCheckpoint
+from .replay import ValidationRecorder
+from .scoring_pool import ScoringPool
 from ..log_utilities import ValidatorLogger
-from bittensor.utils.tokenizer_utils import phrase_cross_entropy, topk_tokens_to_vocab_size, prune_tokens
+from bittensor.utils.tokenizer_utils import phrase_cross_entropy, topk_tokens_to_sparse, prune_tokens
 
 from torch.nn.functional import kl_div
 from torch.nn.utils import clip_grad_norm_
@@ -142,16 +149,13 @@ class neuron:
         self.dendrite = bittensor.dendrite ( config = self.config, wallet = self.wallet, max_active_receptors = 0 ) if dendrite == None else dendrite # Dendrite should not store receptor in validator.
         self.axon = bittensor.axon ( netuid=self.config.netuid, config = self.config, wallet = self.wallet ) if axon == None else axon
         self.device = torch.device ( device = self.config.neuron.device )    
-        self.nucleus = nucleus ( config = self.config, device = self.device, subtensor = self.subtensor, vlogger = self.vlogger ).to( self.device )
-        if self.config.subtensor.network == 'nakamoto':
-            self.dataset = (bittensor.dataset(config=self.config, batch_size=self.subtensor.validator_batch_size,
-                                            block_size=self.subtensor.validator_sequence_length + self.config.neuron.validation_len +  self.subtensor.validator_prune_len)
-                            if dataset is None else dataset)
-        else:
-            # Default to finney
-            self.dataset = (bittensor.dataset(config=self.config, batch_size=self.subtensor.validator_batch_size(self.config.netuid),
-                                            block_size=self.subtensor.validator_sequence_length(self.config.netuid) + self.config.neuron.validation_len +  self.subtensor.validator_prune_len(netuid=self.config.netuid))
-                            if dataset is None else dataset)
+        self.hyperparameters = self.subtensor.get_subnet_hyperparameters( netuid = self.config.netuid )  # refreshed every epoch
+        if self.hyperparameters is None:
+            raise ValueError( 'Could not find subnet hyperparameters for netuid: {}'.format( self.config.netuid ) )
+        self.nucleus = nucleus ( config = self.config, device = self.device, subtensor = self.subtensor, vlogger = self.vlogger, hyperparameters = self.hyperparameters ).to( self.device )
+        self.dataset = (bittensor.dataset(config=self.config, batch_size=self.hyperparameters.validator_batch_size,
+                                        block_size=self.hyperparameters.validator_sequence_length + self.config.neuron.validation_len +  self.hyperparameters.validator_prune_len)
+                        if dataset is None else dataset)
 
         self.optimizer = torch.optim.SGD(
             self.nucleus.parameters(), lr=self.config.neuron.learning_rate, momentum=self.config.neuron.momentum
@@ -160,8 +164,13 @@ class neuron:
         self.loss = None
         self.loss_agg_mutex = Lock()
 
+        # === Create query executor ===
+        # Keeps up to pipeline_depth dendrite requests in flight while the oldest request is scored.
+        self.query_executor = (ThreadPoolExecutor(max_workers=self.config.neuron.pipeline_depth)
+                               if self.config.neuron.pipeline_depth > 0 else None)
+
         # === Neuron statistics variables ===
-        self.neuron_stats = {}  # neuron statistics dict of dicts: [uid] -> {'stat1': val1, 'stat2': val2, ...}
+        self.neuron_stats = NeuronStats()  # neuron statistics columns, with dict of dicts view: [uid] -> {'stat1': val1, 'stat2': val2, ...}
         self.neuron_hotkeys = []  # keep neuron hotkeys to compare and check for changes after metagraph.sync()
         self.neuron_changes = {}  # neuron hotkey changes dict of dicts of dicts: [uid] -> [block] -> {'new_hotkey': , 'old_hotkey': , 'old_stats':}
         self.alpha = 0.1  # EMA coefficient in [0, 1], higher alpha discounts older observations faster
@@ -177,6 +186,7 @@ class neuron:
             self.synapse_keys = ['shapley_values_min']
 
         # load last saved validator values from the file system
+        self.checkpoint = ValidatorCheckpoint(self.config.neuron.full_path, compact_every=self.config.neuron.checkpoint_compact_every)
         if not config.neuron.restart:
             self.load()
         
@@ -213,10 +223,14 @@ class neuron:
         parser.add_argument('--neuron.clip_gradients', type=float, help='Implement gradient clipping to avoid exploding loss on smaller architectures.', default=1.0 )
         parser.add_argument('--neuron.track_hotkey_changes', action='store_true', help='If True, track hotkey changes.', default=False)
         parser.add_argument('--neuron.restart', action='store_true', help='If True, reset neuron_stats and validate anew.', default=False)
+        parser.add_argument('--neuron.checkpoint_compact_every', type=int, help='Number of incremental checkpoints after which the checkpoint journal is compacted into a snapshot.', default=100)
+        parser.add_argument('--neuron.incremental_sync', action='store_true', help='If True, sync the metagraph incrementally, downloading in full only neurons whose weights or bonds may have changed.', default=False)
         parser.add_argument('--neuron.restart_on_failure',  action='store_true', help='''Restart neuron on unknown error.''', default=True )
         parser.add_argument('--neuron._mock', action='store_true', help='To turn on neuron mocking for testing purposes.', default=False )
         parser.add_argument('--neuron.wait_for_finalization', action='store_true', help='''when setting weights the miner waits for trnasaction finalization.''', default=False)
         parser.add_argument('--neuron.forward_num', type=int, help='''How much forward request before a backward call.''', default=3)
+        parser.add_argument('--neuron.pipeline_depth', type=int, help='''Number of dendrite requests kept in flight while scoring, 0 queries and scores serially.''', default=0)
+        parser.add_argument('--neuron.record_dir', type=str, help='''Directory to record dendrite responses to for offline scoring replay, no recording if empty.''', default='')
         parser.add_argument('--neuron.validation_synapse', type=str, help='''Synapse used for validation.''', default='TextCausalLMNext', choices = ['TextCausalLMNext', 'TextCausalLM'])
         parser.add_argument('--neuron.exclude_quantile', type=float, help='Exclude the lowest quantile from weight setting. (default value: -1, pulling from subtensor directly)', default=-1)
 
@@ -249,6 +263,18 @@ class neuron:
                 f'{self.config.wallet.hotkey}:[bold]{self.wallet.hotkey.ss58_address[:7]}[/bold])')
 
     def __del__(self):
+        if getattr(self, 'checkpoint', None) is not None:
+            self.checkpoint.close()
+
+        if getattr(self, 'query_executor', None) is not None:
+            self.query_executor.shutdown(wait=False)
+
+        if getattr(getattr(self, 'nucleus', None), 'recorder', None) is not None:
+            self.nucleus.recorder.close()
+
+        if getattr(getattr(self, 'nucleus', None), 'scoring_pool', None) is not None:
+            self.nucleus.scoring_pool.close()
+
         if getattr(self, 'dataset', None) is not None:
             self.dataset.close()
         
@@ -304,21 +330,15 @@ class neuron:
         )
 
     def save(self, path=None):
-        r""" Save validated hotkeys and neuron_stats to filesystem. """
+        r""" Save validated hotkeys and neuron_stats to filesystem.
+        Writes the uids changed since the last save in the background, see ValidatorCheckpoint.
+        """
         try:
-            if path is None:
-                path = self.config.neuron.full_path
-
-            state_dict = {
-                'neuron_stats': self.neuron_stats,
-                'neuron_hotkeys': self.neuron_hotkeys
-            }
-
-            if self.config.neuron.track_hotkey_changes:
-                state_dict['neuron_changes'] = self.neuron_changes
-
-            torch.save(state_dict, f'{path}/model.torch')
-            bittensor.logging.success(prefix='Saved model', sufix=f'<blue>{path}/model.torch</blue>')
+            checkpoint = self.checkpoint if path is None else ValidatorCheckpoint(path)
+            checkpoint.write(self.neuron_stats, self.neuron_hotkeys,
+                             self.neuron_changes if self.config.neuron.track_hotkey_changes else None)
+            if checkpoint is not self.checkpoint:
+                checkpoint.close()
 
         except Exception as e:
             logger.warning(f'Failed to save model with error: {e}')
@@ -326,17 +346,18 @@ class neuron:
     def load(self, path=None):
         r""" Load validated hotkeys and neuron_stats from filesystem. """
         try:
-            if path is None:
-                path = self.config.neuron.full_path
-            state_dict = torch.load(f'{path}/model.torch')
+            checkpoint = self.checkpoint if path is None else ValidatorCheckpoint(path)
+            state = checkpoint.load()
+            if checkpoint is not self.checkpoint:
+                checkpoint.close()
 
-            self.neuron_stats = state_dict['neuron_stats']
-            self.neuron_hotkeys = state_dict['neuron_hotkeys']
+            self.neuron_stats = state.neuron_stats
+            self.neuron_hotkeys = state.neuron_hotkeys
 
-            if 'neuron_changes' in state_dict and self.config.neuron.track_hotkey_changes:
-                self.neuron_changes = state_dict['neuron_changes']
+            if self.config.neuron.track_hotkey_changes:
+                self.neuron_changes = state.neuron_changes
 
-            bittensor.logging.success(prefix='Reloaded model', sufix=f'<blue>{path}/model.torch</blue>')
+            bittensor.logging.success(prefix='Reloaded model', sufix=f'<blue>{checkpoint.snapshot_path}</blue>')
 
         except Exception as e:
             logger.warning(f'Failed to load model with error: {e}')
@@ -380,30 +401,25 @@ class neuron:
             At the end of the epoch we set weights on the chain and optionally log to wandb.
         """
         # === Get params for epoch ===
-        # Pulling the latest chain parameters.
-        if self.config.subtensor.network == 'nakamoto':
-            batch_size = self.subtensor.validator_batch_size
-            sequence_length = self.subtensor.validator_sequence_length
-            # Number of tokens to prune for phrase validation beyond sequence context
-            prune_len = self.config.neuron.prune_len = self.subtensor.validator_prune_len
-            self.config.nucleus.logits_divergence = self.subtensor.validator_logits_divergence
-            min_allowed_weights = self.subtensor.min_allowed_weights
-            max_weight_limit = self.subtensor.max_weight_limit
-            self.config.nucleus.scaling_law_power = self.subtensor.scaling_law_power
-            self.config.nucleus.synergy_scaling_law_power = self.subtensor.synergy_scaling_law_power
+        # Pulling the latest chain parameters, all read at the same block.
+        hyperparameters = self.subtensor.get_subnet_hyperparameters(netuid=self.config.netuid)
+        if hyperparameters is not None:
+            self.hyperparameters = hyperparameters
+            current_block = self.hyperparameters.block
         else:
-            # Default to finney
-            batch_size = self.subtensor.validator_batch_size(netuid=self.config.netuid)
-            sequence_length = self.subtensor.validator_sequence_length(netuid=self.config.netuid)
-            # Number of tokens to prune for phrase validation beyond sequence context
-            prune_len = self.config.neuron.prune_len = self.subtensor.validator_prune_len(netuid=self.config.netuid)
-            self.config.nucleus.logits_divergence = self.subtensor.validator_logits_divergence(netuid=self.config.netuid)
-            min_allowed_weights = self.subtensor.min_allowed_weights(netuid=self.config.netuid)
-            max_weight_limit = self.subtensor.max_weight_limit(netuid=self.config.netuid)
-            self.config.nucleus.scaling_law_power = self.subtensor.scaling_law_power(netuid=self.config.netuid)
-            self.config.nucleus.synergy_scaling_law_power = self.subtensor.synergy_scaling_law_power(netuid=self.config.netuid)
-
-        current_block = self.subtensor.block
+            # Keeps the parameters of the previous epoch, they are read again at the next epoch.
+            logger.warning(f'Could not find subnet hyperparameters for netuid: {self.config.netuid}, using the previous values')
+            current_block = self.subtensor.block
+        batch_size = self.hyperparameters.validator_batch_size
+        sequence_length = self.hyperparameters.validator_sequence_length
+        # Number of tokens to prune for phrase validation beyond sequence context
+        prune_len = self.config.neuron.prune_len = self.hyperparameters.validator_prune_len
+        self.config.nucleus.logits_divergence = self.hyperparameters.validator_logits_divergence
+        min_allowed_weights = self.hyperparameters.min_allowed_weights
+        max_weight_limit = self.hyperparameters.max_weight_limit
+        self.config.nucleus.scaling_law_power = self.hyperparameters.scaling_law_power
+        self.config.nucleus.synergy_scaling_law_power = self.hyperparameters.synergy_scaling_law_power
+
         validation_len = self.config.neuron.validation_len  # Number of tokens to holdout for phrase validation beyond sequence context
         epochs_until_reset = self.get_validator_epochs_per_reset() if self.config.neuron.epochs_until_reset == -1 else self.config.neuron.epochs_until_reset
         blocks_per_epoch = self.get_validator_epoch_length()
@@ -418,6 +434,7 @@ class neuron:
         # Here we run until blocks_per_epochs have progressed.
 
         epoch_steps = 0
+        pending_requests = deque()  # dendrite requests in flight, scored oldest first
         epoch_responsive_uids = set()
         epoch_queried_uids = set()
         epoch_start_time = time.time()
@@ -446,7 +463,8 @@ class neuron:
         # try to query each UID at least once - assumes nucleus samples without replacement
         # but keep minimum epoch duration at blocks_per_epoch * block_period
         # in case of subtensor outage causing invalid block readings to prevent fast repeated weight setting
-        start_block = self.subtensor.block
+        # Starts the block subscription, self.subtensor.block is then read without a query at every step.
+        start_block = self.subtensor.wait_for_block( timeout = 0 )
         while (self.subtensor.block < start_block + blocks_per_epoch or
                time.time() - epoch_start_time < blocks_per_epoch * bittensor.__blocktime__):
 
@@ -456,10 +474,18 @@ class neuron:
 
             start_time = time.time()
 
+            # === Query ===
+            # Sends the next batch to the network. In pipelined mode the request stays in flight
+            # until pipeline_depth newer requests have been sent, while older requests are scored.
+            pending_requests.append(self.nucleus.query(next(self.dataset), self.metagraph, self.dendrite,
+                                                       executor=self.query_executor))
+            if len(pending_requests) <= self.config.neuron.pipeline_depth:
+                continue
+
             # === Forward ===
-            # Forwards inputs through the network and returns the loss
+            # Scores the oldest request and returns the loss
             # and endpoint scores using shapely approximation of salience.
-            loss, stats = self.nucleus( next(self.dataset) , self.metagraph, self.dendrite )
+            loss, stats = self.nucleus.score(pending_requests.popleft())
 
             # === Backward ===
             # Backwards gradients through model to train gating and remote endpoints.
@@ -537,8 +563,8 @@ class neuron:
                 # console table - weight table (every validation step)
                 sample_uids, sample_weights = self.calculate_weights()
                 self.vlogger.print_weights_table(
-                    min_allowed_weights = self.subtensor.min_allowed_weights(netuid=self.config.netuid) if self.config.subtensor.network != 'nakamoto' else self.subtensor.min_allowed_weights,
-                    max_weight_limit = self.subtensor.max_weight_limit(netuid=self.config.netuid)  if self.config.subtensor.network != 'nakamoto' else self.subtensor.max_weight_limit,
+                    min_allowed_weights = min_allowed_weights,
+                    max_weight_limit = max_weight_limit,
                     neuron_stats = self.neuron_stats,
                     title = str(self),
                     metagraph_n = self.metagraph.n.item(),
@@ -566,6 +592,17 @@ class neuron:
                            'epoch/global_steps': self.global_step, 'epoch/loss': loss.item(),
                            'epoch/time': step_time}, step=current_block, commit=True)
 
+        # === Drain pipeline ===
+        # Scores the requests still in flight, so that all queried UIDs count towards this epoch's weights.
+        while len(pending_requests) > 0:
+            loss, stats = self.nucleus.score(pending_requests.popleft())
+            if hasattr(loss, 'grad_fn') and loss.grad_fn is not None:
+                (loss / self.config.neuron.forward_num).backward()
+
+            responsive_uids, queried_uids = self.neuron_stats_update(stats)
+            epoch_responsive_uids |= set(responsive_uids)
+            epoch_queried_uids |= set(queried_uids)
+
         self.metagraph_sync()  # Reset metagraph.
 
         # === Calculate neuron weights ===
@@ -582,8 +619,8 @@ class neuron:
         if self.config.logging.debug or self.config.logging.trace:
                 # console table - weight table (every end of epoch)
             self.vlogger.print_weights_table(
-                min_allowed_weights = self.subtensor.min_allowed_weights(netuid=self.config.netuid)  if self.config.subtensor.network != 'nakamoto' else self.subtensor.min_allowed_weights,
-                max_weight_limit = self.subtensor.max_weight_limit(netuid=self.config.netuid)  if self.config.subtensor.network != 'nakamoto' else self.subtensor.min_allowed_weights,
+                min_allowed_weights = min_allowed_weights,
+                max_weight_limit = max_weight_limit,
                 neuron_stats = self.neuron_stats,
                 title = str(self),
                 metagraph_n = self.metagraph.n.item(),
@@ -622,8 +659,12 @@ class neuron:
         r""" Syncing metagraph together with other metagraph-size related objects
         """
         old_hotkeys = self.neuron_hotkeys + [] if self.neuron_hotkeys else self.metagraph.hotkeys
-        self.metagraph.sync( subtensor=self.subtensor, netuid=self.config.netuid)
+        if self.config.neuron.incremental_sync:
+            self.metagraph.sync( subtensor=self.subtensor, netuid=self.config.netuid, incremental=True )
+        else:
+            self.metagraph.sync( subtensor=self.subtensor, netuid=self.config.netuid)
         self.neuron_hotkeys = self.metagraph.hotkeys
+        self.neuron_stats.resize(self.metagraph.n.item())
 
         changed_hotkeys = []
         # === Reset neuron stats if uid got replaced
@@ -640,85 +681,80 @@ class neuron:
                     del self.neuron_stats[uid]
                     changed_hotkeys += [uid]
 
+                self.nucleus.reset_endpoint_failures([uid])
+
         if len(changed_hotkeys):
             logger.info(f"Hotkeys changed: {changed_hotkeys}")
             self.save()  # save neuron_stats, neuron_hotkeys, and neuron_changes to filesystem
 
     def neuron_stats_update(self, neuron_stats: Dict[int, Dict[str, Any]]):
         r""" Updates self.neuron_stats with new individual dictionaries per uid.
+        Each stat key is updated for all uids of the batch at once.
         """
+        uids = torch.tensor(list(neuron_stats.keys()), dtype=torch.long)
+        batch = NeuronStats.gather(neuron_stats)  # [key] -> (uids, values) of uids with key
+        stats = self.neuron_stats
+        stats.add(uids)
+
+        # === EMA normal update ===
+        # If synapse responsive push available values into EMA for normal update.
+        # Normal EMA values provide a view on neuron performance if fully responsive.
+        for key, (_uids, values) in batch.items():  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
+            stats.ema(key, _uids, values, self.alpha)
+
+        # === Extra stats computation ===
+        # Compute values on EMA stats, such as the scaling law on EMA loss.
+        # Required for values that need to be computed on longer-term stats.
+        extra_stats = {}  # [key] -> (uids, values)
+        if 'loss_nxt' in batch:
+            loss_nxt, valid = stats.get_values('loss_nxt', batch['loss_nxt'][0])  # elif neuron not responsive then omit
+            _uids, loss_nxt = batch['loss_nxt'][0][valid], loss_nxt[valid]
+
+            # estimate the effective number of model parameters from EMA loss
+            _num_params = scaling_law_loss_to_params(loss_nxt)
+
+            # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
+            _pow_num_params = torch.pow(_num_params, self.config.nucleus.scaling_law_power)
+
+            extra_stats.update({'est_params_nxt': (_uids, _num_params), 'base_params_nxt': (_uids, _pow_num_params)})
+
+            synergy_nxt, valid = stats.get_values('synergy_nxt', _uids)
+            if valid.any():
+                _uids = _uids[valid]
+                shapley_values_nxt = _pow_num_params[valid] + synergy_nxt[valid]
+
+                # penalize by logits divergence excess
+                logits_excess_nxt, valid = stats.get_values('logits_excess_nxt', _uids)
+                shapley_values_nxt = torch.where(valid, shapley_values_nxt / (1 + self.config.nucleus.logits_divergence * logits_excess_nxt),
+                                                 shapley_values_nxt)
+                extra_stats['shapley_values_nxt'] = (_uids, shapley_values_nxt)
+
+        # === EMA zeroing update ===
+        # Push zero into EMA for synapse_keys to exponentially decay weighting keys if neuron non-responsive
+        stats.increment('updates!', uids)  # number of EMA zeroing updates
+
         responsive_uids = []
-        for _uid, _stats in neuron_stats.items():
-            stats = self.neuron_stats.setdefault(_uid, {})
+        for key in self.synapse_keys:
+            values = torch.full((stats.n,), float('nan'), dtype=torch.float64)  # NaN pushes zero into EMA
+            observed = torch.zeros(stats.n, dtype=torch.bool)  # uids with key in stats or extra_stats
+            for source in [extra_stats, batch]:  # batch stats take precedence over extra stats when not NaN
+                if key in source:
+                    _uids, _values = source[key]
+                    observed[_uids] = True
+                    _keep = ~torch.isnan(_values)
+                    values[_uids[_keep]] = _values[_keep]
+
+            values = values[uids]
+            responsive_uids += uids[~torch.isnan(values)].tolist()
+            stats.zeroing_ema(key + '!', uids, values, self.alpha)  # zeroing key
 
             # === EMA normal update ===
             # If synapse responsive push available values into EMA for normal update.
             # Normal EMA values provide a view on neuron performance if fully responsive.
-            for key in _stats:  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
-                if math.isnan(_stats[key]):
-                    continue
-                if key in stats:
-                    stats[key] = (1 - self.alpha) * stats[key] + self.alpha * _stats[key]  # update EMA
-                else:
-                    stats.setdefault(key, _stats[key])
-
-            # === Extra stats computation ===
-            # Compute values on EMA stats, such as the scaling law on EMA loss.
-            # Required for values that need to be computed on longer-term stats.
-            extra_stats = {}
-            if 'loss_nxt' in _stats and 'loss_nxt' in stats:  # elif neuron not responsive then omit
-                # estimate the effective number of model parameters from EMA loss
-                _num_params = scaling_law_loss_to_params(torch.tensor(stats['loss_nxt']))
-
-                # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
-                _pow_num_params = torch.pow(_num_params, self.config.nucleus.scaling_law_power)
-
-                extra_stats.update({'est_params_nxt': _num_params.item(), 'base_params_nxt': _pow_num_params.item()})
-
-                if 'synergy_nxt' in stats:
-                    extra_stats['shapley_values_nxt'] = extra_stats['base_params_nxt'] + stats['synergy_nxt']
-
-                if 'logits_excess_nxt' in stats:
-                    # penalize by logits divergence excess
-                    extra_stats['shapley_values_nxt'] /= 1 + self.config.nucleus.logits_divergence * stats['logits_excess_nxt']
-
-            # === EMA zeroing update ===
-            # Push zero into EMA for synapse_keys to exponentially decay weighting keys if neuron non-responsive
-            if 'updates!' in stats:
-                stats['updates!'] += 1  # increment number of EMA zeroing updates
-            else:
-                stats.setdefault('updates!', 1)  # number of EMA zeroing updates init to zero
-
-            for key in self.synapse_keys:
-                zkey = key + '!'  # zeroing key
-                stats.setdefault(zkey, 0.)  # initialize zkey val to zero to gradually increase with observations
-                if key in _stats and not math.isnan(_stats[key]):
-                    responsive_uids += [_uid]
-                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * _stats[key]
-                elif key in extra_stats and not math.isnan(extra_stats[key]):
-                    responsive_uids += [_uid]
-                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * extra_stats[key]
-                else:
-                    stats[zkey] = (1 - self.alpha) * stats[zkey]  # + self.alpha * 0
+            stats.increment('updates_' + key, uids[observed[uids]])  # number of normal EMA updates made
 
-            # === EMA normal update ===
-            # If synapse responsive push available values into EMA for normal update.
-            # Normal EMA values provide a view on neuron performance if fully responsive.
-            for key in self.synapse_keys:
-                if key in _stats or key in extra_stats:
-                    updates = 'updates_' + key
-                    if updates in stats:
-                        stats[updates] += 1  # increment number of normal EMA updates made
-                    else:
-                        stats.setdefault(updates, 1)  # add updates fields for new uid entries
-
-            for key in extra_stats:  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
-                if math.isnan(extra_stats[key]):
-                    continue
-                if key in stats:
-                    stats[key] = (1 - self.alpha) * stats[key] + self.alpha * extra_stats[key]  # update EMA
-                else:
-                    stats.setdefault(key, extra_stats[key])
+        for key, (_uids, values) in extra_stats.items():  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
+            stats.ema(key, _uids, values, self.alpha)
 
         return responsive_uids, list(neuron_stats.keys())  # responsive_uids, queried_uids
 
@@ -729,15 +765,16 @@ class neuron:
 
         weight_key = self.weight_key + '!'  # use zeroing key to penalize non-responsive neurons
 
-        min_allowed_weights = self.subtensor.min_allowed_weights(netuid=self.config.netuid) if self.config.subtensor.network != 'nakamoto' else self.subtensor.min_allowed_weights
-        max_weight_limit = self.subtensor.max_weight_limit(netuid=self.config.netuid) if self.config.subtensor.network != 'nakamoto' else  self.subtensor.max_weight_limit
+        min_allowed_weights = self.hyperparameters.min_allowed_weights
+        max_weight_limit = self.hyperparameters.max_weight_limit
 
 
         # === Populate neuron weights ===
         neuron_weights = torch.zeros_like(self.metagraph.total_stake)  # allow unevaluated UIDs for min_allowed_weights
-        for uid in self.neuron_stats:
-            if weight_key in self.neuron_stats[uid]:
-                neuron_weights[uid] = torch.tensor([self.neuron_stats[uid][weight_key]])
+        if weight_key in self.neuron_stats.columns:
+            values, valid = self.neuron_stats.column(weight_key)
+            n = min(len(neuron_weights), len(values))
+            neuron_weights[:n] = torch.where(valid[:n], values[:n], torch.zeros_like(values[:n])).to(neuron_weights.dtype)
 
         # === Filter to non-zero weights ===
         sample_uids = torch.argwhere(neuron_weights > 0).squeeze(dim=1)  # find uids with non-zero weight
@@ -750,11 +787,7 @@ class neuron:
         # === Exclude lowest quantile from weight setting ===
         max_exclude = (len(sample_weights) - min_allowed_weights) / len(sample_weights)  # max excludable weight quantile
         
-        if self.config.subtensor.network == 'nakamoto':  
-            quantile = self.subtensor.validator_exclude_quantile if self.config.neuron.exclude_quantile == -1 else self.config.neuron.exclude_quantile 
-        else:
-            # Default to finney
-            quantile = self.subtensor.validator_exclude_quantile(netuid=self.config.netuid) if self.config.neuron.exclude_quantile == -1 else self.config.neuron.exclude_quantile 
+        quantile = self.hyperparameters.validator_exclude_quantile if self.config.neuron.exclude_quantile == -1 else self.config.neuron.exclude_quantile 
         if 0 < max_exclude:
             exclude_quantile = min([quantile , max_exclude])  # reduce quantile to meet min_allowed_weights
             lowest_quantile = sample_weights.quantile(exclude_quantile)  # find lowest quantile threshold
@@ -773,37 +806,40 @@ class neuron:
         return sample_uids, sample_weights
 
     def get_validator_epoch_length(self):
-        validator_epoch_length = self.subtensor.validator_epoch_length(self.config.netuid) if self.subtensor.network != 'nakamoto' else self.subtensor.validator_epoch_length
+        validator_epoch_length = self.hyperparameters.validator_epoch_length
         
         return validator_epoch_length
 
     def get_validator_epochs_per_reset(self):
-        validator_epochs_per_reset = self.subtensor.validator_epochs_per_reset(self.config.netuid) if self.subtensor.network != 'nakamoto' else self.subtensor.validator_epochs_per_reset
+        validator_epochs_per_reset = self.hyperparameters.validator_epochs_per_reset
         
         return validator_epochs_per_reset
 
 class nucleus( torch.nn.Module ):
     """ Nucleus class which holds the validator model.
     """
-    def __init__( self, config, device, subtensor, vlogger ):
+    def __init__( self, config, device, subtensor, vlogger, hyperparameters: 'bittensor.SubnetHyperparameters' = None ):
         super(nucleus, self).__init__()
         self.config = config
         self.vlogger = vlogger
 
-        if self.config.subtensor.network == 'nakamoto':
-            self.config.nucleus.logits_divergence = subtensor.validator_logits_divergence if self.config.nucleus.logits_divergence == -1 else self.config.nucleus.logits_divergence
-            self.config.nucleus.scaling_law_power = subtensor.scaling_law_power if self.config.nucleus.scaling_law_power == -1 else self.config.nucleus.scaling_law_power
-            self.config.nucleus.synergy_scaling_law_power = subtensor.synergy_scaling_law_power if self.config.nucleus.synergy_scaling_law_power == -1 else self.config.nucleus.synergy_scaling_law_power
-            self.max_n = subtensor.max_n
-        else:
-            # Default to finney
-            self.config.nucleus.logits_divergence = subtensor.validator_logits_divergence(netuid=self.config.netuid) if self.config.nucleus.logits_divergence == -1 else self.config.nucleus.logits_divergence
-            self.config.nucleus.scaling_law_power = subtensor.scaling_law_power(netuid=self.config.netuid) if self.config.nucleus.scaling_law_power == -1 else self.config.nucleus.scaling_law_power
-            self.config.nucleus.synergy_scaling_law_power = subtensor.synergy_scaling_law_power(netuid=self.config.netuid) if self.config.nucleus.synergy_scaling_law_power == -1 else self.config.nucleus.synergy_scaling_law_power
-            self.max_n = subtensor.max_n(netuid=self.config.netuid)
+        if hyperparameters is None:
+            hyperparameters = subtensor.get_subnet_hyperparameters(netuid=self.config.netuid)
+        if hyperparameters is None:
+            raise ValueError('Could not find subnet hyperparameters for netuid: {}'.format(self.config.netuid))
+        self.config.nucleus.logits_divergence = hyperparameters.validator_logits_divergence if self.config.nucleus.logits_divergence == -1 else self.config.nucleus.logits_divergence
+        self.config.nucleus.scaling_law_power = hyperparameters.scaling_law_power if self.config.nucleus.scaling_law_power == -1 else self.config.nucleus.scaling_law_power
+        self.config.nucleus.synergy_scaling_law_power = hyperparameters.synergy_scaling_law_power if self.config.nucleus.synergy_scaling_law_power == -1 else self.config.nucleus.synergy_scaling_law_power
+        self.max_n = hyperparameters.max_n
 
         self.device = device
         self.permute_uids = []  # iterable of next UIDs to query, reset to permuted UIDs when empty
+        self.permute_generator = torch.Generator().manual_seed(torch.initial_seed())  # UID permutations only
+        self.query_step = 0  # number of query calls, the clock of endpoint failure cooldowns
+        self.endpoint_failures = torch.zeros(0, dtype=torch.long)  # consecutive Unavailable responses per UID
+        self.endpoint_cooldown = torch.zeros(0, dtype=torch.long)  # last query_step at which a UID is passed over
+        self.recorder = ValidationRecorder(self.config.neuron.record_dir) if self.config.neuron.record_dir else None
+        self.scoring_pool = ScoringPool(self.config.nucleus.scoring_workers) if self.config.nucleus.scoring_workers > 0 else None
 
         tokenizer = bittensor.tokenizer()
         self.pad_token = tokenizer(tokenizer.pad_token)['input_ids'][0]
@@ -848,6 +884,10 @@ class nucleus( torch.nn.Module ):
         parser.add_argument('--nucleus.scaling_law_power', type=float, help='Power for modified scaling law, powered down to improve dynamic range, e.g. 3 → 6 nats for 0.5. (default value: -1, pulling from subtensor directly)', default=-1)
         parser.add_argument('--nucleus.synergy_scaling_law_power', type=float, help='Power for synergy modified scaling law, powered down to improve dynamic range, e.g. 3 → 6 nats for 0.5. (default value: -1, pulling from subtensor directly)', default=-1)
         parser.add_argument('--nucleus.logits_divergence', type=float, help=' the divergence value for logit anomaly detection (default value: -1, pulling from subtensor directly)', default=-1)
+        parser.add_argument('--nucleus.scoring_workers', type=int, help='Number of worker processes to compute endpoint losses in, 0 scores in process. Used with --nucleus.no_dendrite_backward on cpu.', default=0)
+        parser.add_argument('--nucleus.query_unserving', action='store_true', help='Query UIDs that are not serving or in failure cooldown, instead of zeroing their stats without a query.', default=False)
+        parser.add_argument('--nucleus.failure_threshold', type=int, help='Consecutive Unavailable responses before an endpoint enters failure cooldown, 0 disables the cooldown.', default=3)
+        parser.add_argument('--nucleus.failure_cooldown', type=int, help='Number of validator queries an endpoint in failure cooldown is passed over.', default=100)
 
     @classmethod
     def config ( cls ):
@@ -896,71 +936,65 @@ class nucleus( torch.nn.Module ):
                 neuron_stats (:obj:`Dict`, `required`):
                     Statistics per endpoint for this batch.
         """
-        start_time = time.time()
+        return self.score( self.query( inputs, metagraph, dendrite ) )
 
+    def query(
+            self,
+            inputs: torch.FloatTensor,
+            metagraph: 'bittensor.Metagraph',
+            dendrite: 'bittensor.Dendrite',
+            executor: ThreadPoolExecutor = None,
+    ) -> SimpleNamespace:
+        r"""
+        Selects endpoints to query and sends the dendrite request, the first half of the forward validator pass.
+        With an executor the dendrite request runs in the background, so that it can be in flight while
+        a previous request is being scored.
+            Args:
+                inputs (:obj:`torch.FloatTensor` of shape :obj:`(batch_size, *-1*)`, `required`):
+                    Tensor inputs to distribute to neurons using query context.
+                metagraph (bittensor.Metagraph):
+                    Metagraph object used to query network information.
+                dendrite (bittensor.Dendrite):
+                    Dendrite RPC client used to make network queries.
+                executor (:obj:`ThreadPoolExecutor`, `optional`):
+                    Executor to submit the dendrite request to, the request is made in place if None.
+            Returns:
+                request (:obj:`SimpleNamespace`, `required`):
+                    Pruned inputs, selected uids and synapses, with the dendrite responses or their future.
+        """
         val_len = self.config.neuron.validation_len  # Number of tokens to holdout for phrase validation beyond sequence context
         prune_len = self.config.neuron.prune_len  # Number of tokens to prune from each validation input sequence
         inputs = prune_tokens(inputs.to(self.device), prune_len=prune_len, margin=val_len+3)  # prune input sequence without last validation tokens [batch_size, sequence_len]
         inputs_seq = inputs[..., :-val_len]  # sequence without validation tokens [batch_size, sequence_len]
 
-        # === Create the local context used to select endpoints ===
-        # The context tensor returns a hidden unit representation for the text inputs
-        # this context can be used as input to the gates in the next step.
-        # embedding: retrieve learned representation vectors for input vocabulary tokens.
-        # inputs.shape = [batch_size, sequence_len]
-        # embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
-        embedding = self.token_embedding(inputs_seq) * math.sqrt(bittensor.__network_dim__)
-
-        # === Create an attention mask ===
-        # The attention mask will mask out parts of the context
-        # This prevents cheating and forward-looking when predicting each token in the sequence.
-        # src_mask: (torch.FloatTensor) attention mask adds -inf to positions not allowed to attend
-        # src_mask.shape = [sequence_len, sequence_len]
-        src_mask = torch.triu(torch.ones(embedding.size(1), embedding.size(1)) * float('-inf'), diagonal=1)
-        src_mask = src_mask.to(self.device)
-
-        # === Apply the positional encoding to help select endpoints ===
-        # The positional encoder provides information based on the relative postion of each token
-        # embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
-        # pos_embedding: (torch.FloatTensor) positional encoded embedding.
-        # pos_embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
-        pos_embedding = self.local_pos_encoder(embedding)
-
-        # routing_context: (torch.FloatTensor): context tensor which is used to select endpoints.
-        # routing_context.shape = [ batch size, __network_dim__ ]
-        routing_context = self.routing_encoder(pos_embedding, mask=src_mask)
-
-        # === Get gate values for UIDs. ===
-        # We iterate over each of the network UIDs and compute a querying score for each
-        # using the gating function. This returns a score per endpoint per example.
-        # routing_score: (torch.FloatTensor): score per example, per endpoint.
-        # routing_score.shape = [metagraph.n]
-        # The gates act over the last embedding of the routing_context.
-        routing_score = torch.mean(self.sigmoid(self.gates(routing_context[:, -1, :])), dim=0)
-
         # Ensure number of queried neurons does not exceed metagraph.n
         num_endpoints = min([self.config.nucleus.topk, metagraph.n])
 
         # === Ensure each UID is queried once ===
         # Persist object variable self.permute_uids across forward calls.
         # Reset to new permutation of all UIDs once empty.
+        # The permutation has its own generator, so that the UID order does not depend on how
+        # query and score calls of different batches interleave.
         if len(self.permute_uids) == 0:  # no more UIDs to query
-            self.permute_uids = torch.randperm(metagraph.n)  # reset to new permutation of all UIDs
+            self.permute_uids = torch.randperm(metagraph.n, generator=self.permute_generator)  # reset to new permutation of all UIDs
 
         # === Randomly select num_endpoints UIDs ===
-        random_uids = self.permute_uids[:num_endpoints]  # newest selection of UIDs to query
-        self.permute_uids = self.permute_uids[num_endpoints:]  # slice out remaining selection
+        # UIDs that are not serving or in failure cooldown are passed over without taking a query slot.
+        # They are still consumed from the permutation as skipped UIDs, which have their stats zeroed,
+        # so every UID keeps being covered once per permutation.
+        self.query_step += 1
+        available = self.available_uids(metagraph)[self.permute_uids]  # [len(permute_uids)]
+        cutoff = torch.nonzero(torch.cumsum(available.long(), dim=0) == num_endpoints)
+        cutoff = cutoff[0].item() + 1 if len(cutoff) else len(self.permute_uids)  # take until num_endpoints available
+        random_uids = self.permute_uids[:cutoff][available[:cutoff]]  # newest selection of UIDs to query
+        skipped_uids = self.permute_uids[:cutoff][~available[:cutoff]]  # passed over UIDs
+        self.permute_uids = self.permute_uids[cutoff:]  # slice out remaining selection
 
         # === Get endpoint information for the selected UIDs ===
         # We index into the metagraph's endpoints and return a list of the filtered set of endpoints we wish to query.
         # random_endpoints: List[bittensor.endpoints]: endpoint information for filtered uids.
         # len(neurons) == self.config.nucleus.topk
         random_endpoints = [metagraph.endpoints[uid] for uid in random_uids]
-        num_endpoints = len(random_endpoints)  # in case len(self.permute_uids) < num_endpoints during random_uids select
-
-        logger.info(f'Forward \t| Routing forward <dim>[{time.time() - start_time:.3g}s]</dim>')
-        logger.info(f'Dendrite \t| Request {num_endpoints} x {list(inputs_seq.shape)} (prune_len={prune_len})')
-        request_start_time = time.time()
 
         # === Define which synapse we want to use ===
         # The synapse defines the task we are sending to the neurons
@@ -971,6 +1005,75 @@ class nucleus( torch.nn.Module ):
         else: 
             synapses = [(bittensor.synapse.TextCausalLM(), textcausallm)]
 
+        request = SimpleNamespace(inputs=inputs, inputs_seq=inputs_seq, uids=random_uids, skipped_uids=skipped_uids,
+                                  synapses=synapses, responses=None, future=None)
+        if len(random_uids) == 0:
+            request.responses = [], [], []  # nothing to query
+        elif executor is None:
+            request.responses = self._dendrite_query(dendrite, random_endpoints, inputs_seq, synapses)
+        else:
+            request.future = executor.submit(self._dendrite_query, dendrite, random_endpoints, inputs_seq, synapses)
+
+        return request
+
+    def available_uids(self, metagraph: 'bittensor.Metagraph') -> torch.BoolTensor:
+        r""" Returns the mask of UIDs to query, which are serving and not in failure cooldown.
+            Args:
+                metagraph (bittensor.Metagraph):
+                    Metagraph object used to query network information.
+            Returns:
+                available (:obj:`torch.BoolTensor` of shape :obj:`[metagraph.n]`):
+                    True for UIDs to query.
+        """
+        n = metagraph.n.item()
+        if self.config.nucleus.query_unserving:
+            return torch.ones(n, dtype=torch.bool)
+
+        self._resize_endpoint_failures(n)
+        serving = torch.tensor([endpoint.is_serving for endpoint in metagraph.endpoint_objs], dtype=torch.bool)
+        return serving & (self.endpoint_cooldown[:n] < self.query_step)
+
+    def update_endpoint_failures(self, uids: torch.LongTensor, return_ops: List[torch.LongTensor]):
+        r""" Counts consecutive Unavailable responses per UID, and puts a UID in failure cooldown
+        once failure_threshold is reached. Any other return code resets the count.
+            Args:
+                uids (:obj:`torch.LongTensor` of shape :obj:`[num_endpoints]`, `required`):
+                    Queried UIDs.
+                return_ops (:obj:`List[torch.LongTensor]` of shape :obj:`[num_endpoints]`, `required`):
+                    Return code per call per synapse.
+        """
+        if len(uids) == 0 or self.config.nucleus.failure_threshold <= 0:
+            return
+
+        self._resize_endpoint_failures(uids.max().item() + 1)
+        failed = torch.stack([(ops == bittensor.proto.ReturnCode.Unavailable).all() for ops in return_ops]).cpu()
+        self.endpoint_failures[uids] = torch.where(failed, self.endpoint_failures[uids] + 1,
+                                                   torch.zeros_like(self.endpoint_failures[uids]))
+
+        cooldown_uids = uids[self.endpoint_failures[uids] >= self.config.nucleus.failure_threshold]
+        self.endpoint_cooldown[cooldown_uids] = self.query_step + self.config.nucleus.failure_cooldown
+
+    def reset_endpoint_failures(self, uids: List[int]):
+        r""" Clears the failure counts and cooldowns of UIDs, e.g. after their hotkeys changed.
+        """
+        uids = torch.tensor([uid for uid in uids if uid < len(self.endpoint_failures)], dtype=torch.long)
+        self.endpoint_failures[uids] = 0
+        self.endpoint_cooldown[uids] = 0
+
+    def _resize_endpoint_failures(self, n: int):
+        if n > len(self.endpoint_failures):
+            pad = torch.zeros(n - len(self.endpoint_failures), dtype=torch.long)
+            self.endpoint_failures = torch.cat([self.endpoint_failures, pad])
+            self.endpoint_cooldown = torch.cat([self.endpoint_cooldown, pad])
+
+    def _dendrite_query(self, dendrite: 'bittensor.Dendrite', endpoints: List['bittensor.Endpoint'],
+                        inputs_seq: torch.FloatTensor, synapses: List[Tuple]):
+        r""" Makes the dendrite call and moves the responses to the nucleus device.
+        """
+        num_endpoints = len(endpoints)  # in case len(self.permute_uids) < num_endpoints during random_uids select
+        logger.info(f'Dendrite \t| Request {num_endpoints} x {list(inputs_seq.shape)} (prune_len={self.config.neuron.prune_len})')
+        request_start_time = time.time()
+
         # === Query the endpoints ===
         # Makes the dendrite call into the network returning the representations
         # for each of the endpoints. The return ops can be used to filter weights and outputs.
@@ -979,7 +1082,7 @@ class nucleus( torch.nn.Module ):
         # return_ops: (torch.int64): Return ops.
         # return_ops.shape = self.config.nucleus.topk * [num_synapses]
         query_responses, return_ops, times = dendrite.text(
-            endpoints=random_endpoints,
+            endpoints=endpoints,
             inputs=inputs_seq,
             synapses=[syn for syn, _ in synapses],
             timeout=bittensor.__blocktime__
@@ -999,10 +1102,74 @@ class nucleus( torch.nn.Module ):
         logger.info(f'Dendrite \t| Request {num_endpoints} x {list(inputs_seq.shape)} '
                     f'<dim>[{time.time() - request_start_time:.3g}s]</dim>')
 
+        return query_responses, return_ops, times
+
+    def score( self, request: SimpleNamespace ):
+        r"""
+        Scores the responses of a query request, the second half of the forward validator pass.
+        Calculates routing_score and Shapley values for validated synapses.
+            Args:
+                request (:obj:`SimpleNamespace`, `required`):
+                    Request returned by nucleus.query, waits for its dendrite responses if still in flight.
+            Returns:
+                loss (:obj:`torch.FloatTensor`):
+                    Loss for training validator nucleus and dendrite backward to endpoints.
+                neuron_stats (:obj:`Dict`, `required`):
+                    Statistics per endpoint for this batch.
+        """
+        start_time = time.time()
+
+        inputs, inputs_seq = request.inputs, request.inputs_seq
+        val_len = self.config.neuron.validation_len  # Number of tokens to holdout for phrase validation beyond sequence context
+
+        # === Create the local context used to select endpoints ===
+        # The context tensor returns a hidden unit representation for the text inputs
+        # this context can be used as input to the gates in the next step.
+        # embedding: retrieve learned representation vectors for input vocabulary tokens.
+        # inputs.shape = [batch_size, sequence_len]
+        # embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
+        embedding = self.token_embedding(inputs_seq) * math.sqrt(bittensor.__network_dim__)
+
+        # === Create an attention mask ===
+        # The attention mask will mask out parts of the context
+        # This prevents cheating and forward-looking when predicting each token in the sequence.
+        # src_mask: (torch.FloatTensor) attention mask adds -inf to positions not allowed to attend
+        # src_mask.shape = [sequence_len, sequence_len]
+        src_mask = torch.triu(torch.ones(embedding.size(1), embedding.size(1)) * float('-inf'), diagonal=1)
+        src_mask = src_mask.to(self.device)
+
+        # === Apply the positional encoding to help select endpoints ===
+        # The positional encoder provides information based on the relative postion of each token
+        # embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
+        # pos_embedding: (torch.FloatTensor) positional encoded embedding.
+        # pos_embedding.shape = [batch_size, sequence_len, bittensor.__network_dim__]
+        pos_embedding = self.local_pos_encoder(embedding)
+
+        # routing_context: (torch.FloatTensor): context tensor which is used to select endpoints.
+        # routing_context.shape = [ batch size, __network_dim__ ]
+        routing_context = self.routing_encoder(pos_embedding, mask=src_mask)
+
+        # === Get gate values for UIDs. ===
+        # We iterate over each of the network UIDs and compute a querying score for each
+        # using the gating function. This returns a score per endpoint per example.
+        # routing_score: (torch.FloatTensor): score per example, per endpoint.
+        # routing_score.shape = [metagraph.n]
+        # The gates act over the last embedding of the routing_context.
+        routing_score = torch.mean(self.sigmoid(self.gates(routing_context[:, -1, :])), dim=0)
+
+        logger.info(f'Forward \t| Routing forward <dim>[{time.time() - start_time:.3g}s]</dim>')
+
+        # === Wait for the dendrite responses ===
+        if request.future is not None:
+            request.responses = request.future.result()
+            request.future = None
+        query_responses, return_ops, times = request.responses
+        self.update_endpoint_failures(request.uids, return_ops)
+
         # === Prepare validation parameter set ===
         console_width = self.config.get('width', None)  # console width for rich table displays of synapse measures
         validation_params = {
-            'uids': random_uids, 
+            'uids': request.uids, 
             'query_responses': query_responses, 
             'return_ops': return_ops, 
             'times': times, 
@@ -1014,15 +1181,20 @@ class nucleus( torch.nn.Module ):
             'scaling_law_power': self.config.nucleus.scaling_law_power, 
             'synergy_scaling_law_power': self.config.nucleus.synergy_scaling_law_power,
             'vlogger': self.vlogger,
-            'logging': self.config.logging.debug or self.config.logging.trace
+            'logging': self.config.logging.debug or self.config.logging.trace,
+            'scoring_pool': self.scoring_pool,
         }
+        if self.recorder is not None and len(request.uids) > 0:
+            self.recorder.record(request.synapses, validation_params)  # for offline replay of scoring
 
         loss = torch.tensor(0.).to(self.device)  # to accumulate neuron_loss and routing_loss over synapses
         neuron_stats = {}  # to gather neuron synapse validation measures and statistics
 
         # === Validate synapse responses ===
         # Iterate over all queried synapses and validate responses
-        for i, (synapse, validate_func) in enumerate(synapses):
+        for i, (synapse, validate_func) in enumerate(request.synapses):
+            if len(request.uids) == 0:
+                break  # no queried UIDs to validate
             _loss, stats = validate_func(**validation_params, synapse=synapse, index_s=i)  # validate individual synapse
             loss += _loss  # add neuron_loss and routing_loss
 
@@ -1030,6 +1202,11 @@ class nucleus( torch.nn.Module ):
                 neuron_stats.setdefault(_uid, {})
                 neuron_stats[_uid].update(_stats)  # gather neuron synapse validation measures and statistics
 
+        # === Skipped UIDs ===
+        # UIDs passed over as not serving or in failure cooldown count as unresponsive, which zeroes their stats.
+        for _uid in request.skipped_uids.tolist():
+            neuron_stats.setdefault(_uid, {'uid': _uid})
+
         return loss, neuron_stats
 
 def scaling_law_loss_to_params(loss):
@@ -1044,8 +1221,8 @@ def textcausallm(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
                  times: List[torch.FloatTensor], routing_score: torch.FloatTensor,
                  inputs: torch.FloatTensor, validation_len: int, loss_fct: Callable,                 
                  scaling_law_power: float, synergy_scaling_law_power: float, vlogger: ValidatorLogger,
-                 logits_divergence_penalty: float,logging, synapse: 'bittensor.TextCausalLM' = None, index_s: int = 0
-                 ) -> Tuple[torch.FloatTensor, Dict]:
+                 logits_divergence_penalty: float,logging, synapse: 'bittensor.TextCausalLM' = None, index_s: int = 0,
+                 scoring_pool: ScoringPool = None) -> Tuple[torch.FloatTensor, Dict]:
     r"""
     Calculate Shapley values and neuron response validation measure statistics, given TextCausalLM synapse responses.
         Args:
@@ -1080,6 +1257,8 @@ def textcausallm(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
                 TextCausalLM synapse object.
             index_s (:obj:`int`, `optional`):
                 Index of synapse to extract responses.
+            scoring_pool (:obj:`ScoringPool`, `optional`):
+                Process pool to compute endpoint losses in, computed in process if None.
 
         Returns:
             loss (:obj:`torch.FloatTensor`):
@@ -1090,12 +1269,21 @@ def textcausallm(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
     inputs_seq = inputs[..., :-validation_len]  # input sequence without last token [batch_size, sequence_len]
     inputs_val = inputs[..., -validation_len]  # input validation with next token [batch_size]
 
+    # endpoint losses computed across the scoring pool processes, if any
+    pool_losses = scoring_pool.map(textcausallm_losses, uids, query_responses, return_ops, index_s,
+                                   inputs_seq=inputs_seq, inputs_val=inputs_val, loss_fct=loss_fct) if scoring_pool is not None else {}
+
     def _base_params(_stats, query_response):
         _stats.update({'logits': query_response[:, :-1, :],
                        'logits_val': query_response[:, -1:, :]})
 
-        for target, _ext in [(inputs_seq[:, 1:], ''), (inputs_val, '_val')]:
-            _loss = calc_loss_fct(loss_fct, _stats['logits' + _ext], target)  # CausalLM loss
+        losses = pool_losses.get(_stats['uid'], None)
+        if losses is None:
+            losses = textcausallm_losses(query_response, inputs_seq, inputs_val, loss_fct)  # CausalLM loss
+        elif isinstance(losses, Exception):
+            raise losses
+
+        for _loss, _ext in zip(losses, ['', '_val']):
             if _loss.isnan() or _loss.isinf():
                 _loss = 20  # assign large loss
 
@@ -1109,13 +1297,12 @@ def textcausallm(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
                            'est_params' + _ext: _num_params, 'base_params' + _ext: _pow_num_params,
                            'synergy' + _ext: 0, 'synergy_loss_diff' + _ext: 0})
 
-    def _synergy(first, second, target, _ext):
-        # Combined logits: log of average probabilities per token between responses
-        combined_logits = torch.log((torch.softmax(first['logits' + _ext], dim=-1) +
-                                     torch.softmax(second['logits' + _ext], dim=-1)) / 2 + 1e-40)
-        measured_loss = calc_loss_fct(loss_fct, combined_logits, target)  # actual measured loss
-
-        return measured_loss
+    def _synergy(responsives, target, _ext):
+        # Probability of each target token per response, with the softmax computed once per endpoint.
+        # The cross entropy of combined logits log((p_first + p_second) / 2) only depends on these target probabilities.
+        _target = target.reshape(-1, 1)
+        return torch.stack([torch.softmax(s['logits' + _ext].reshape(_target.shape[0], -1), dim=-1).gather(1, _target).squeeze(1)
+                            for s in responsives])  # [num_responsives, batch_size * sequence_len]
 
     shapley_start_time = time.time()
 
@@ -1172,8 +1359,8 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
                      times: List[torch.FloatTensor], routing_score: torch.FloatTensor,
                      inputs: torch.FloatTensor, validation_len: int, loss_fct: Callable,                     
                      scaling_law_power: float, synergy_scaling_law_power: float, vlogger:ValidatorLogger,
-                     logits_divergence_penalty: float,logging, synapse: 'bittensor.TextCausalLMNext' = None, index_s: int = 0
-                     ) -> Tuple[torch.FloatTensor, Dict]:
+                     logits_divergence_penalty: float,logging, synapse: 'bittensor.TextCausalLMNext' = None, index_s: int = 0,
+                     scoring_pool: ScoringPool = None) -> Tuple[torch.FloatTensor, Dict]:
     r"""
     Calculate Shapley values and neuron response validation measure statistics, given TextCausalLMNext synapse responses.
         Args:
@@ -1208,6 +1395,8 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
                 TextCausalLMNext Synapse object.
             index_s (:obj:`int`, `optional`):
                 Index of synapse to extract responses.
+            scoring_pool (:obj:`ScoringPool`, `optional`):
+                Process pool to compute endpoint losses in, computed in process if None.
 
         Returns:
             loss (:obj:`torch.FloatTensor`):
@@ -1217,23 +1406,26 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
     """
     inputs_nxt = inputs[..., -validation_len:]  # input validation with next token target phrase [batch_size, val_len]
 
+    # endpoint losses computed across the scoring pool processes, if any
+    pool_losses = scoring_pool.map(textcausallmnext_losses, uids, query_responses, return_ops, index_s,
+                                   inputs_nxt=inputs_nxt) if scoring_pool is not None else {}
+
     def _base_params(_stats, query_response):
-        # topk_tensor = unravel_topk_token_phrases(query_response, topk=synapse.topk)  # [batch_size, topk + 1, max_len]
-        _losses_val, _losses = phrase_cross_entropy(inputs_nxt, query_response, reduce=False)
-        _losses_val[_losses_val.isnan()] = 20  # assign large loss
-        _losses[_losses.isnan()] = 20  # assign large loss
+        losses = pool_losses.get(_stats['uid'], None)
+        if losses is None:
+            losses = textcausallmnext_losses(query_response, inputs_nxt)
+        elif isinstance(losses, Exception):
+            raise losses
+        _losses_val, _losses = losses
         _loss_val = _losses_val.mean()
         _loss = _losses.mean()
 
         _stats.update({'loss_val_nxt': _loss_val, 'losses_nxt': _losses, 'loss_nxt': _loss,
                        'synergy_nxt': 0, 'synergy_loss_diff_nxt': 0})
 
-    def _synergy(first, second, target, ext):
-        # average first + second probabilities per batch item, convert to loss
-        measured_loss = -torch.log((torch.exp(-first['losses_nxt']) +
-                                    torch.exp(-second['losses_nxt'])) / 2 + 1e-40).mean()
-
-        return measured_loss
+    def _synergy(responsives, target, ext):
+        # target phrase probabilities per batch item, averaged pairwise and converted to loss by shapley_synergy
+        return torch.stack([torch.exp(-s['losses_nxt']) for s in responsives])  # [num_responsives, batch_size]
 
     shapley_start_time = time.time()
     loss, stats, unsuccessful = shapley_base(uids, query_responses, return_ops, times, routing_score,
@@ -1283,6 +1475,33 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
     return loss, stats
 
 
+def textcausallm_losses(query_response: torch.FloatTensor, inputs_seq: torch.Tensor, inputs_val: torch.Tensor,
+                        loss_fct: Callable) -> Tuple[torch.FloatTensor, torch.FloatTensor]:
+    r"""
+    CausalLM losses of a TextCausalLM response over the input sequence and the validation token.
+    Module level, so that it can run in a scoring pool process.
+        Returns:
+            loss (:obj:`torch.FloatTensor`), loss_val (:obj:`torch.FloatTensor`)
+    """
+    return (calc_loss_fct(loss_fct, query_response[:, :-1, :], inputs_seq[:, 1:]),
+            calc_loss_fct(loss_fct, query_response[:, -1:, :], inputs_val))
+
+
+def textcausallmnext_losses(query_response: torch.FloatTensor,
+                            inputs_nxt: torch.Tensor) -> Tuple[torch.FloatTensor, torch.FloatTensor]:
+    r"""
+    Phrase cross entropy losses per batch item of a TextCausalLMNext response, NaN losses are assigned a large loss.
+    Module level, so that it can run in a scoring pool process.
+        Returns:
+            losses_val (:obj:`torch.FloatTensor`), losses (:obj:`torch.FloatTensor`): [batch_size]
+    """
+    # topk_tensor = unravel_topk_token_phrases(query_response, topk=synapse.topk)  # [batch_size, topk + 1, max_len]
+    _losses_val, _losses = phrase_cross_entropy(inputs_nxt, query_response, reduce=False)
+    _losses_val[_losses_val.isnan()] = 20  # assign large loss
+    _losses[_losses.isnan()] = 20  # assign large loss
+    return _losses_val, _losses
+
+
 def shapley_base(uids: torch.Tensor, query_responses: List[List[torch.FloatTensor]], return_ops: List[torch.LongTensor],
                  times: List[torch.FloatTensor], routing_score: torch.FloatTensor,
                  base_params: Callable, index_s: int = 0, ext: str = None) -> Tuple[Union[float, torch.FloatTensor],
@@ -1368,6 +1587,7 @@ def logits_divergence(stats: Dict, uids: torch.Tensor, query_responses: List[Lis
     r"""
     Calculate each logits divergence per neuron per task from the average logits over all neurons per task,
     given responses from a synapse.
+    Works on the union of topk token ids across endpoints instead of vocab-sized probability tensors.
         Args:
             stats (:obj:`Dict`, `required`):
                 Statistics per endpoint for this batch.
@@ -1386,82 +1606,92 @@ def logits_divergence(stats: Dict, uids: torch.Tensor, query_responses: List[Lis
             ext (:obj:`str`, `optional`):
                 Extension to parameter string for stats key.
     """
-    probs_k = 0
-    probs_avg = None
+    topk_uids = []
+    topk_tokens = []
+    topk_probs = []
 
-    # === Probs averaging ===
-    # Calculate the average token distribution for each batch task.
+    # === Sparse token probabilities ===
+    # Collect the normalized topk first-token probabilities of each successful response.
     for index, _uid in enumerate(uids.tolist()):
         if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
             try:
-                probs = topk_tokens_to_vocab_size(query_responses[index][index_s],
-                                                  bittensor.__vocab_size__)  # [batch_size, vocab_size]
-                if probs_avg is None:
-                    probs_avg = probs
-                else:
-                    probs_avg += probs
-                probs_k += 1
+                tokens, probs = topk_tokens_to_sparse(query_responses[index][index_s],
+                                                      bittensor.__vocab_size__)  # [batch_size, topk]
+                if len(topk_tokens) and tokens.shape[0] != topk_tokens[0].shape[0]:
+                    raise ValueError(f'batch size {tokens.shape[0]} does not match {topk_tokens[0].shape[0]}')
+                topk_uids += [_uid]
+                topk_tokens += [tokens.to('cpu')]
+                topk_probs += [probs.detach().to('cpu', torch.float64)]
 
             except Exception as e:
                 logger.warning(f'Synapse {index_s} error (logits_divergence)\t| '
                                f'UID {_uid} <dim>[{times[index][index_s]:.2f}s]</dim>: {e}')
 
-    if probs_avg is not None:
-        probs_avg /= probs_k
-        probs_avg_sqrt = probs_avg.sqrt()
-        batch_divergences = []
-
-        # === Distribution divergence ===
-        # Calculate the Hellinger distance (f-divergence) from the average probability distribution for each batch task.
-        for index, _uid in enumerate(uids.tolist()):
-            if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
-                try:
-                    probs = topk_tokens_to_vocab_size(query_responses[index][index_s],
-                                                      bittensor.__vocab_size__)  # [batch_size, vocab_size]
-                    divergences = 0.5 * torch.pow(probs.sqrt() - probs_avg_sqrt, 2).sum(dim=1)  # [batch_size] in [0, 1]
-                    divergences = divergences.sqrt()
-                    stats[_uid]['logits_divergences' + ext] = divergences  # [batch_size]
-                    stats[_uid]['logits_divergence' + ext] = divergences.mean()  # scalar
-                    batch_divergences += [divergences]
-
-                except Exception as e:
-                    logger.warning(f'Synapse {index_s} error (logits_divergence)\t| '
-                                   f'UID {_uid} <dim>[{times[index][index_s]:.2f}s]</dim>: {e}')
-
-        batch_divergences = torch.stack(batch_divergences)  # [uids_len, batch_size]
-        avg = batch_divergences.mean(dim=0)  # [batch_size]
-        std = batch_divergences.std(dim=0)  # [batch_size]
-
-        # logger.info(f"Logits divergences: "
-        #             f"avg={', '.join([f'{i}:{v:.3g}' for i, v in enumerate(avg)])}")
-        # logger.info(f"std={', '.join([f'{i}:{v:.3g}' for i, v in enumerate(std)])}")
-
-        # === Calculate divergence excess ===
-        # For each batch task, calculate excess deviation above a single stddev, in terms of stddev,
-        # and apply power to increase score above two stddev, and decrease between one and two stddev.
-        # This will effectively allow zero excess below one stddev, and minimal excess below two stddev,
-        # but amplify any excess above two stddev (only 2.1% of population for normal dist).
-        for _uid, _stats in stats.items():
-            if 'logits_divergences' + ext in _stats:
-                try:
-                    excess = torch.clamp(_stats['logits_divergences' + ext] - (avg + std), 0)  # divergence > avg + std
-                    excess /= std + 1e-9  # stddev multiples above 1 stddev
-                    excess = torch.pow(excess, 3)  # reduce < 2std, increase > 2std
-                    excess = torch.clamp(excess, 0, 10)  # maximum excess ratio of 10
+    if len(topk_uids) == 0:
+        return
+
+    # === Stack endpoints ===
+    # Pad to the largest topk with zero probabilities, which add nothing to any distribution.
+    num_endpoints = len(topk_uids)
+    batch_size = topk_tokens[0].shape[0]
+    vocab_size = bittensor.__vocab_size__
+    topk = max(tokens.shape[1] for tokens in topk_tokens)
+    tokens = torch.zeros((num_endpoints, batch_size, topk), dtype=torch.int64)
+    probs = torch.zeros((num_endpoints, batch_size, topk), dtype=torch.float64)
+    for i, (_tokens, _probs) in enumerate(zip(topk_tokens, topk_probs)):
+        tokens[i, :, :_tokens.shape[1]] = _tokens
+        probs[i, :, :_probs.shape[1]] = _probs
 
-                    _stats['logits_excess' + ext] = excess.mean()  # in [0, 10]
-                    del _stats['logits_divergences' + ext]  # keep only scalar stats beyond this
-
-                    # logger.info(f"UID{uid} divergences [{_stats['logits_divergences' + ext].mean():.4g}]: "
-                    #             f"{', '.join([f'{i}:{dist:.3g}' for i, dist in enumerate(_stats['logits_divergences' + ext])])}")
-                    # logger.info(f"UID{uid} excess [{excess.mean():.3g}]: "
-                    #             f"{', '.join([f'{i}:{exc:.3g}' for i, exc in enumerate(excess)])}")
-
-                except Exception as e:
-                    logger.warning(f'Synapse {index_s} error (logits_divergence)\t| UID {_uid}: {e}')
-
-
-def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tensor = None, scaling_law_power: float = 0.5):
+    # === Probs averaging ===
+    # Accumulate repeated tokens per (endpoint, batch item), then average over endpoints per (batch item, token).
+    endpoint_idx = torch.arange(num_endpoints)[:, None, None].expand_as(tokens)
+    batch_idx = torch.arange(batch_size)[None, :, None].expand_as(tokens)
+    keys, inverse = torch.unique(((endpoint_idx * batch_size + batch_idx) * vocab_size + tokens).flatten(),
+                                 return_inverse=True)
+    token_probs = torch.zeros(len(keys), dtype=torch.float64).scatter_add_(0, inverse, probs.flatten())
+    endpoint_batch = keys // vocab_size  # endpoint * batch_size + batch item
+    batch_token = keys % (batch_size * vocab_size)  # batch item * vocab_size + token
+
+    union_keys, union_inverse = torch.unique(batch_token, return_inverse=True)
+    probs_avg = torch.zeros(len(union_keys), dtype=torch.float64).scatter_add_(0, union_inverse, token_probs)
+    probs_avg /= num_endpoints
+    probs_avg_mass = torch.zeros(batch_size, dtype=torch.float64).scatter_add_(0, union_keys // vocab_size, probs_avg)
+
+    # === Distribution divergence ===
+    # Calculate the Hellinger distance (f-divergence) from the average probability distribution for each batch task.
+    # Only the union of topk tokens carries probability mass: the floor probability of non-topk tokens is
+    # normalized into the topk probabilities, so tokens outside the union contribute zero to the distance.
+    # Union tokens outside the support of an endpoint contribute their average probability, which is
+    # the average mass of the batch item minus the average mass on the endpoint support.
+    token_avg = probs_avg[union_inverse]
+    within = torch.pow(token_probs.sqrt() - token_avg.sqrt(), 2)
+    within = torch.zeros(num_endpoints * batch_size, dtype=torch.float64).scatter_add_(0, endpoint_batch, within)
+    support_avg = torch.zeros(num_endpoints * batch_size, dtype=torch.float64).scatter_add_(0, endpoint_batch, token_avg)
+    outside = torch.clamp(probs_avg_mass.repeat(num_endpoints) - support_avg, 0)
+    batch_divergences = (0.5 * (within + outside)).sqrt().view(num_endpoints, batch_size).float()  # [uids_len, batch_size] in [0, 1]
+
+    avg = batch_divergences.mean(dim=0)  # [batch_size]
+    std = batch_divergences.std(dim=0)  # [batch_size]
+
+    # === Calculate divergence excess ===
+    # For each batch task, calculate excess deviation above a single stddev, in terms of stddev,
+    # and apply power to increase score above two stddev, and decrease between one and two stddev.
+    # This will effectively allow zero excess below one stddev, and minimal excess below two stddev,
+    # but amplify any excess above two stddev (only 2.1% of population for normal dist).
+    excess = torch.clamp(batch_divergences - (avg + std), 0)  # divergence > avg + std
+    excess /= std + 1e-9  # stddev multiples above 1 stddev
+    excess = torch.pow(excess, 3)  # reduce < 2std, increase > 2std
+    excess = torch.clamp(excess, 0, 10)  # maximum excess ratio of 10
+    excess = excess.mean(dim=1)  # [uids_len] in [0, 10]
+    divergence = batch_divergences.mean(dim=1)  # [uids_len]
+
+    for i, _uid in enumerate(topk_uids):
+        stats[_uid]['logits_divergence' + ext] = divergence[i]  # scalar
+        stats[_uid]['logits_excess' + ext] = excess[i]  # in [0, 10]
+
+
+def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tensor = None, scaling_law_power: float = 0.5,
+                    max_block_bytes: int = 2 ** 28):
     r"""
     Calculates Shapley synergy for coalition size 2, measured performance above expected performance.
     Measured in effective number of model parameters, just like base Shapley values.
@@ -1469,13 +1699,16 @@ def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tens
             stats (:obj:`Dict`, `required`):
                 Statistics per endpoint for this batch.
             synergy (:obj:`Callable`, `required`)
-                Function to calculate measured loss.
+                Function returning the target probabilities [num_responsives, -1] of a list of responsive stats,
+                the measured loss of a pair is the cross entropy of their averaged target probabilities.
             ext (:obj:`str`, `optional`):
                 Extension to parameter string for stats key.
             target (:obj:`torch.Tensor`, `optional`):
                 Target to measure loss against.
             scaling_law_power (:obj:`float`, `optional`):
                 Power for modified scaling law, powered down to improve dynamic range, e.g. 3 → 6 nats for 0.5.
+            max_block_bytes (:obj:`int`, `optional`):
+                Memory budget for a block of pairwise combined probabilities.
 
         Returns:
             syn_loss_diff (:obj:`Dict`, `required`):
@@ -1486,47 +1719,82 @@ def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tens
     # Synergy = measured performance above expected performance
     # Measured in effective number of model parameters, just like base Shapley values.
     syn_loss_diff = {}  # expected_loss - measured_loss (where > 0)
-    responsives = [uid for uid, stat in stats.items() if 'loss' + ext in stat]
-    for _first, first in stats.items():
-        if 'loss' + ext not in first:
-            continue
-        first_diff = syn_loss_diff.setdefault(_first, {})
-        first_diff[_first] = first['loss' + ext]  # diagonal keeps direct loss
-
-        for _second, second in stats.items():
-            if 'loss' + ext not in second or _second <= _first:
-                continue
-            second_diff = syn_loss_diff.setdefault(_second, {})
+    responsives = sorted([uid for uid, stat in stats.items() if 'loss' + ext in stat])
+    for _uid in responsives:
+        syn_loss_diff[_uid] = {_uid: stats[_uid]['loss' + ext]}  # diagonal keeps direct loss
+
+    if len(responsives) < 2:
+        return syn_loss_diff
+
+    with torch.no_grad():
+        probs = synergy([stats[_uid] for _uid in responsives], target, ext)  # [num_responsives, -1]
+        losses = torch.stack([torch.as_tensor(stats[_uid]['loss' + ext], dtype=probs.dtype).to(probs.device)
+                              for _uid in responsives])  # [num_responsives]
+
+        expected_loss = torch.min(losses[:, None], losses[None, :])  # expecting min loss
+        measured_loss = pairwise_synergy_loss(probs, max_block_bytes)  # actual measured loss
 
-            with torch.no_grad():
-                expected_loss = torch.min(first['loss' + ext], second['loss' + ext])  # expecting min loss
+        off_diagonal = 1. - torch.eye(len(responsives), dtype=probs.dtype, device=probs.device)
 
-                measured_loss = synergy(first, second, target, ext)
+        loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2  # record direct loss diff
+        loss_diff_share *= off_diagonal / len(responsives)  # average over responsives
 
-                loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2  # record direct loss diff
-                loss_diff_share /= len(responsives)  # average over responsives
-                first['synergy_loss_diff' + ext] += loss_diff_share
-                second['synergy_loss_diff' + ext] += loss_diff_share
+        measured_params = scaling_law_loss_to_params(measured_loss)
+        expected_params = scaling_law_loss_to_params(expected_loss)
 
-                # pairwise loss reduction of expected to measured loss due to synergy between first and second
-                first_diff[_second] = loss_diff_share
-                second_diff[_first] = loss_diff_share
+        # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
+        pow_measured_params = torch.pow(measured_params, scaling_law_power)
+        pow_expected_params = torch.pow(expected_params, scaling_law_power)
 
-                measured_params = scaling_law_loss_to_params(measured_loss)
-                expected_params = scaling_law_loss_to_params(expected_loss)
+        synergy_share = torch.clamp(pow_measured_params - pow_expected_params, 0) / 2
+        synergy_share *= off_diagonal / len(responsives)  # average over responsives
 
-                # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
-                pow_measured_params = torch.pow(measured_params, scaling_law_power)
-                pow_expected_params = torch.pow(expected_params, scaling_law_power)
+        # share synergy amongst coalition members
+        synergy_loss_diffs = loss_diff_share.sum(dim=1)
+        synergies = synergy_share.sum(dim=1)
+        for i, _uid in enumerate(responsives):
+            stats[_uid]['synergy_loss_diff' + ext] += synergy_loss_diffs[i]
+            stats[_uid]['synergy' + ext] += synergies[i]
 
-                synergy_share = torch.clamp(pow_measured_params - pow_expected_params, 0) / 2
-                synergy_share /= len(responsives)  # average over responsives
-                first['synergy' + ext] += synergy_share  # share synergy amongst coalition members
-                second['synergy' + ext] += synergy_share
+    # pairwise loss reduction of expected to measured loss due to synergy between first and second
+    loss_diff_share = loss_diff_share.tolist()
+    for i, _first in enumerate(responsives):
+        for j, _second in enumerate(responsives):
+            if i != j:
+                syn_loss_diff[_first][_second] = loss_diff_share[i][j]
 
     return syn_loss_diff
 
 
+def pairwise_synergy_loss(probs: torch.FloatTensor, max_block_bytes: int = 2 ** 28) -> torch.FloatTensor:
+    r"""
+    Calculates the pairwise cross entropy of averaged target probabilities, in blocks of endpoint chunks
+    so that the [chunk, chunk, -1] intermediate stays within max_block_bytes.
+        Args:
+            probs (:obj:`torch.FloatTensor`, `required`):
+                [num_responsives, num_targets] Target probabilities per responsive endpoint.
+            max_block_bytes (:obj:`int`, `optional`):
+                Memory budget for a block of pairwise combined probabilities.
+
+        Returns:
+            measured_loss (:obj:`torch.FloatTensor`, `required`):
+                [num_responsives, num_responsives] Symmetric matrix of measured pairwise losses.
+    """
+    num_responsives, num_targets = probs.shape
+    chunk = int(math.sqrt(max_block_bytes / max(num_targets * probs.element_size(), 1)))
+    chunk = min(max(chunk, 1), num_responsives)
+
+    measured_loss = torch.empty(num_responsives, num_responsives, dtype=probs.dtype, device=probs.device)
+    for i in range(0, num_responsives, chunk):
+        for j in range(i, num_responsives, chunk):
+            combined = (probs[i:i + chunk, None, :] + probs[None, j:j + chunk, :]) / 2  # [chunk, chunk, num_targets]
+            block = -torch.log(combined + 1e-40).mean(dim=-1)
+            measured_loss[i:i + chunk, j:j + chunk] = block
+            measured_loss[j:j + chunk, i:i + chunk] = block.T
+
+    return measured_loss
+
+
 def format_predictions(uids: torch.Tensor, query_responses: List[List[torch.FloatTensor]],
                        return_ops: List[torch.LongTensor], inputs: torch.FloatTensor,
                        validation_len: int, index_s: int = 0, number_of_predictions: int = 3) -> List:
@@ -0,0 +1,229 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Incremental, crash-safe checkpoints of validator state.
+"""
+import copy
+import os
+import pickle
+import struct
+import zlib
+import torch
+import bittensor
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from .neuron_stats import NeuronStats
+
+from loguru import logger
+
+FRAME_HEADER = struct.Struct('<II')  # journal record frame header: payload length, payload crc32
+
+
+class ValidatorCheckpoint:
+    r""" Checkpoints validator neuron_stats, neuron_hotkeys and neuron_changes as a columnar snapshot
+    plus an append-only journal of the rows of uids changed since the previous checkpoint.
+    The journal is compacted into a new snapshot every compact_every records.
+
+    Snapshots are written to a temporary file and atomically renamed, journal records are framed with
+    their length and checksum, so that a crash at any point leaves a loadable checkpoint. Records are
+    numbered, a snapshot stores the number of the last record it includes, and loading replays only the
+    newer journal records. The state to write is copied on the calling thread, at a cost of the changed
+    rows for journal records, while file writes run on a background thread. After a failed write no
+    further records are appended, as they would be deltas against missing state, and the next checkpoint
+    is a full snapshot, which includes the changed rows of the lost records.
+
+        Args:
+            path (:obj:`str`, `required`):
+                Directory of the checkpoint files.
+            compact_every (:obj:`int`, `optional`):
+                Number of journal records after which the journal is compacted into a new snapshot.
+    """
+    snapshot_name = 'model.torch'
+    journal_name = 'journal.bin'
+
+    def __init__( self, path: str, compact_every: int = 100 ):
+        self.path = path
+        self.compact_every = compact_every
+        self.snapshot_path = os.path.join(path, self.snapshot_name)
+        self.journal_path = os.path.join(path, self.journal_name)
+
+        self.seq = 0  # number of the last checkpoint record
+        self.records = None  # journal records since the last snapshot, None until a snapshot is written or loaded
+        self._hotkeys = None  # neuron_hotkeys list as of the last record
+        self._hotkeys_copy = []  # copy of the neuron_hotkeys as of the last record
+        self._changes = set()  # (uid, block) of neuron_changes as of the last record
+        self._failed = False  # set by the writer when a write fails, until a snapshot is written
+
+        self.executor = ThreadPoolExecutor(max_workers=1)  # single writer keeps records in order
+
+    def write( self, neuron_stats: NeuronStats, neuron_hotkeys: List[str], neuron_changes: Optional[Dict] = None ):
+        r""" Checkpoints the validator state in the background, as a journal record of changed rows
+        or as a new snapshot when the journal is due for compaction.
+            Args:
+                neuron_stats (:obj:`NeuronStats`, `required`):
+                    Neuron statistics store.
+                neuron_hotkeys (:obj:`List[str]`, `required`):
+                    Validated hotkeys per uid.
+                neuron_changes (:obj:`Dict`, `optional`):
+                    Hotkey changes [uid] -> [block] -> {'new_hotkey': , 'old_hotkey': , 'old_stats':}, if tracked.
+        """
+        self.seq += 1
+        neuron_changes = neuron_changes or {}
+        if self._failed:
+            self.records = None
+        if self.records is None or self.records >= self.compact_every:
+            neuron_stats.pop_changed()
+            state = {
+                'version': 2,
+                'seq': self.seq,
+                'neuron_stats': neuron_stats.state_dict(),
+                'neuron_hotkeys': list(neuron_hotkeys),
+                'neuron_changes': copy.deepcopy(neuron_changes),
+            }
+            self.records = 0
+            self.executor.submit(self._write_snapshot, state)
+        else:
+            record = {
+                'seq': self.seq,
+                'neuron_stats': neuron_stats.rows(neuron_stats.pop_changed()),
+                'neuron_hotkeys': self._changed_hotkeys(neuron_hotkeys),
+                'num_hotkeys': len(neuron_hotkeys),
+                'neuron_changes': [(uid, block, copy.deepcopy(change)) for uid, blocks in neuron_changes.items()
+                                   for block, change in blocks.items() if (uid, block) not in self._changes],
+            }
+            self.records += 1
+            self.executor.submit(self._append_record, record)
+
+        if neuron_hotkeys is not self._hotkeys:
+            self._hotkeys, self._hotkeys_copy = neuron_hotkeys, list(neuron_hotkeys)
+        self._changes = {(uid, block) for uid, blocks in neuron_changes.items() for block in blocks}
+
+    def _changed_hotkeys( self, neuron_hotkeys: List[str] ) -> Dict[int, str]:
+        if neuron_hotkeys is self._hotkeys:
+            return {}  # metagraph_sync assigns a new hotkeys list, the same list is unchanged
+        return {uid: hotkey for uid, hotkey in enumerate(neuron_hotkeys)
+                if uid >= len(self._hotkeys_copy) or self._hotkeys_copy[uid] != hotkey}
+
+    def _write_snapshot( self, state: Dict ):
+        try:
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                torch.save(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)  # atomic, a crash leaves the previous snapshot
+
+            # the journal only holds records included in the snapshot, start a new one
+            tmp_path = self.journal_path + '.tmp'
+            open(tmp_path, 'wb').close()
+            os.replace(tmp_path, self.journal_path)
+            bittensor.logging.success(prefix='Saved model', sufix=f'<blue>{self.snapshot_path}</blue>')
+            self._failed = False
+
+        except Exception as e:
+            logger.warning(f'Failed to save model with error: {e}')
+            self._failed = True
+
+    def _append_record( self, record: Dict ):
+        if self._failed:
+            return  # a previous write failed, the next checkpoint is a snapshot
+        try:
+            payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(self.journal_path, 'ab') as f:
+                f.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+        except Exception as e:
+            logger.warning(f'Failed to save model with error: {e}')
+            self._failed = True
+
+    def _read_records( self ) -> List[Dict]:
+        r""" Returns the journal records up to the first truncated or corrupt record.
+        """
+        records = []
+        if not os.path.exists(self.journal_path):
+            return records
+
+        with open(self.journal_path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        while offset + FRAME_HEADER.size <= len(data):
+            length, crc = FRAME_HEADER.unpack_from(data, offset)
+            payload = data[offset + FRAME_HEADER.size: offset + FRAME_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break  # torn write of the last record before a crash
+            records += [pickle.loads(payload)]
+            offset += FRAME_HEADER.size + length
+
+        if offset < len(data):
+            logger.warning(f'Ignoring {len(data) - offset} bytes of incomplete records in {self.journal_path}')
+            self.records = None  # compact before appending after the incomplete record
+
+        return records
+
+    def load( self ) -> SimpleNamespace:
+        r""" Loads the latest snapshot and replays the newer journal records.
+            Returns:
+                state (:obj:`SimpleNamespace`):
+                    neuron_stats (:obj:`NeuronStats`), neuron_hotkeys (:obj:`List[str]`) and neuron_changes (:obj:`Dict`).
+        """
+        self.flush()
+        state_dict = torch.load(self.snapshot_path)
+
+        if 'version' not in state_dict:
+            # dict of dicts neuron_stats saved by previous versions, without journal
+            state = SimpleNamespace(neuron_stats=NeuronStats.from_dict(state_dict['neuron_stats']),
+                                    neuron_hotkeys=state_dict['neuron_hotkeys'],
+                                    neuron_changes=state_dict.get('neuron_changes', {}))
+            self.seq, self.records = 0, None
+        else:
+            state = SimpleNamespace(neuron_stats=NeuronStats.from_state_dict(state_dict['neuron_stats']),
+                                    neuron_hotkeys=state_dict['neuron_hotkeys'],
+                                    neuron_changes=state_dict['neuron_changes'])
+            self.seq, self.records = state_dict['seq'], 0
+
+            for record in self._read_records():
+                if record['seq'] <= self.seq:
+                    continue  # included in the snapshot
+                state.neuron_stats.apply_rows(record['neuron_stats'])
+                state.neuron_hotkeys = state.neuron_hotkeys[:record['num_hotkeys']]
+                state.neuron_hotkeys += [''] * (record['num_hotkeys'] - len(state.neuron_hotkeys))
+                for uid, hotkey in record['neuron_hotkeys'].items():
+                    state.neuron_hotkeys[uid] = hotkey
+                for uid, block, change in record['neuron_changes']:
+                    state.neuron_changes.setdefault(uid, {})[block] = change
+                self.seq = record['seq']
+                if self.records is not None:
+                    self.records += 1
+
+        state.neuron_stats.pop_changed()
+        self._hotkeys, self._hotkeys_copy = state.neuron_hotkeys, list(state.neuron_hotkeys)
+        self._changes = {(uid, block) for uid, blocks in state.neuron_changes.items() for block in blocks}
+        return state
+
+    def flush( self ):
+        r""" Waits until all submitted checkpoints are written.
+        """
+        self.executor.submit(lambda: None).result()
+
+    def close( self ):
+        r""" Writes the submitted checkpoints and stops the background writer.
+        """
+        self.executor.shutdown(wait=True)
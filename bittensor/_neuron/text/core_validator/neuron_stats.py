@@ -0,0 +1,220 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Columnar store of validator neuron statistics.
+"""
+import torch
+from collections.abc import MutableMapping
+from typing import Dict, Tuple, Any
+
+
+class NeuronStats( MutableMapping ):
+    r""" Columnar store of validator neuron statistics. Holds one tensor per stat key indexed by uid,
+    with a validity mask per key and a mask of uids that have an entry, so that EMA updates over a batch
+    of uids are single tensor ops.
+
+    Behaves as a mapping of uid to a dict of its valid stats, e.g. neuron_stats[uid] -> {'stat1': val1, ...},
+    which is the dict of dicts view used for logging.
+
+    Uids changed since the last call of pop_changed are tracked, so that checkpoints can write
+    only the rows of changed uids.
+
+        Args:
+            n (:obj:`int`, `optional`):
+                Initial number of uids, the store grows when updated with larger uids.
+    """
+    def __init__( self, n: int = 0 ):
+        self.n = 0
+        self.present = torch.zeros(0, dtype=torch.bool)  # uids with an entry
+        self.changed = torch.zeros(0, dtype=torch.bool)  # uids changed since the last pop_changed
+        self.columns: Dict[str, torch.Tensor] = {}  # [key] -> values per uid
+        self.valid: Dict[str, torch.BoolTensor] = {}  # [key] -> mask of uids with a value for key
+        self.resize(n)
+
+    def resize( self, n: int ):
+        r""" Grows all columns and masks to n uids, existing values are kept.
+        """
+        if n <= self.n:
+            return
+        pad = n - self.n
+        self.present = torch.cat([self.present, torch.zeros(pad, dtype=torch.bool)])
+        self.changed = torch.cat([self.changed, torch.zeros(pad, dtype=torch.bool)])
+        for key in self.columns:
+            self.columns[key] = torch.cat([self.columns[key], torch.zeros(pad, dtype=self.columns[key].dtype)])
+            self.valid[key] = torch.cat([self.valid[key], torch.zeros(pad, dtype=torch.bool)])
+        self.n = n
+
+    def add( self, uids: torch.LongTensor ):
+        r""" Adds entries for uids, growing the store if needed.
+        """
+        if len(uids):
+            self.resize(int(uids.max()) + 1)
+        self.present[uids] = True
+        self.changed[uids] = True
+
+    def column( self, key: str, dtype: torch.dtype = torch.float64 ) -> Tuple[torch.Tensor, torch.BoolTensor]:
+        r""" Returns the (values, valid) tensors of key over all uids, creating an empty column if needed.
+        """
+        if key not in self.columns:
+            self.columns[key] = torch.zeros(self.n, dtype=dtype)
+            self.valid[key] = torch.zeros(self.n, dtype=torch.bool)
+        return self.columns[key], self.valid[key]
+
+    def get_values( self, key: str, uids: torch.LongTensor ) -> Tuple[torch.Tensor, torch.BoolTensor]:
+        r""" Returns the (values, valid) of key at uids, all invalid if the store has no such key.
+        """
+        if key not in self.columns:
+            return torch.zeros(len(uids), dtype=torch.float64), torch.zeros(len(uids), dtype=torch.bool)
+        return self.columns[key][uids], self.valid[key][uids]
+
+    def ema( self, key: str, uids: torch.LongTensor, values: torch.Tensor, alpha: float ):
+        r""" Pushes values into the EMA of key at uids, a uid without a value for key is initialized
+        to its new value. NaN values are skipped.
+        """
+        keep = ~torch.isnan(values)
+        uids, values = uids[keep], values[keep].to(torch.float64)
+        column, valid = self.column(key)
+        column[uids] = torch.where(valid[uids], (1 - alpha) * column[uids] + alpha * values, values)
+        valid[uids] = True
+        self.changed[uids] = True
+
+    def zeroing_ema( self, key: str, uids: torch.LongTensor, values: torch.Tensor, alpha: float ):
+        r""" Pushes values into the EMA of key at uids, where NaN values push zero to decay the EMA.
+        A uid without a value for key starts from zero.
+        """
+        column, valid = self.column(key)
+        previous = torch.where(valid[uids], column[uids], torch.zeros_like(column[uids]))
+        column[uids] = (1 - alpha) * previous + alpha * torch.nan_to_num(values.to(torch.float64), nan=0.)
+        valid[uids] = True
+        self.changed[uids] = True
+
+    def increment( self, key: str, uids: torch.LongTensor ):
+        r""" Increments the update count of key at uids, a uid without a count starts at one.
+        """
+        column, valid = self.column(key, dtype=torch.int64)
+        column[uids] = torch.where(valid[uids], column[uids] + 1, torch.ones_like(column[uids]))
+        valid[uids] = True
+        self.changed[uids] = True
+
+    @staticmethod
+    def gather( neuron_stats: Dict[int, Dict[str, Any]] ) -> Dict[str, Tuple[torch.LongTensor, torch.Tensor]]:
+        r""" Converts a batch of stats {uid: {key: value}} to {key: (uids, values)} columns of the uids having key.
+        """
+        gathered = {}
+        for uid, stats in neuron_stats.items():
+            for key, value in stats.items():
+                uids, values = gathered.setdefault(key, ([], []))
+                uids.append(int(uid))
+                values.append(float(value))
+        return {key: (torch.tensor(uids, dtype=torch.long), torch.tensor(values, dtype=torch.float64))
+                for key, (uids, values) in gathered.items()}
+
+    def __getitem__( self, uid: int ) -> Dict[str, Any]:
+        if uid not in self:
+            raise KeyError(uid)
+        uid = int(uid)
+        return {key: self.columns[key][uid].item() for key in self.columns if self.valid[key][uid]}
+
+    def __setitem__( self, uid: int, stats: Dict[str, Any] ):
+        uid = int(uid)
+        if uid in self:
+            del self[uid]
+        self.add(torch.tensor([uid]))
+        for key, value in stats.items():
+            column, valid = self.column(key, dtype=torch.int64 if isinstance(value, int) else torch.float64)
+            column[uid] = value
+            valid[uid] = True
+        self.changed[uid] = True
+
+    def __delitem__( self, uid: int ):
+        if uid not in self:
+            raise KeyError(uid)
+        uid = int(uid)
+        self.present[uid] = False
+        self.changed[uid] = True
+        for valid in self.valid.values():
+            valid[uid] = False
+
+    def __contains__( self, uid: Any ) -> bool:
+        try:
+            uid = int(uid)
+        except (TypeError, ValueError):
+            return False
+        return 0 <= uid < self.n and bool(self.present[uid])
+
+    def __iter__( self ):
+        return iter(torch.nonzero(self.present).flatten().tolist())
+
+    def __len__( self ) -> int:
+        return int(self.present.sum())
+
+    def to_dict( self ) -> Dict[int, Dict[str, Any]]:
+        r""" Returns the dict of dicts view [uid] -> {'stat1': val1, 'stat2': val2, ...}.
+        """
+        return {uid: self[uid] for uid in self}
+
+    @classmethod
+    def from_dict( cls, neuron_stats: Dict[int, Dict[str, Any]] ) -> 'NeuronStats':
+        r""" Creates a store from a dict of dicts [uid] -> {'stat1': val1, 'stat2': val2, ...}.
+        """
+        store = cls(n=max(neuron_stats.keys(), default=-1) + 1)
+        for uid, stats in neuron_stats.items():
+            store[uid] = stats
+        return store
+
+    def pop_changed( self ) -> torch.LongTensor:
+        r""" Returns the uids changed since the last call, and clears the changed mask.
+        """
+        uids = torch.nonzero(self.changed).flatten()
+        self.changed[uids] = False
+        return uids
+
+    def rows( self, uids: torch.LongTensor ) -> Dict[str, Any]:
+        r""" Returns a columnar copy of the rows of uids, to be applied with apply_rows.
+        """
+        return {
+            'n': self.n,
+            'uids': uids.clone(),
+            'present': self.present[uids].clone(),
+            'columns': {key: column[uids].clone() for key, column in self.columns.items()},
+            'valid': {key: valid[uids].clone() for key, valid in self.valid.items()},
+        }
+
+    def apply_rows( self, rows: Dict[str, Any] ):
+        r""" Overwrites the rows of uids with a copy returned by rows.
+        """
+        self.resize(rows['n'])
+        uids = rows['uids']
+        self.present[uids] = rows['present']
+        for valid in self.valid.values():
+            valid[uids] = False
+        for key, values in rows['columns'].items():
+            column, valid = self.column(key, dtype=values.dtype)
+            column[uids] = values
+            valid[uids] = rows['valid'][key]
+
+    def state_dict( self ) -> Dict[str, Any]:
+        r""" Returns a columnar copy of the whole store.
+        """
+        return self.rows(torch.arange(self.n))
+
+    @classmethod
+    def from_state_dict( cls, state_dict: Dict[str, Any] ) -> 'NeuronStats':
+        r""" Creates a store from a columnar copy returned by state_dict.
+        """
+        store = cls()
+        store.apply_rows(state_dict)
+        return store
@@ -0,0 +1,291 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Record and replay of validator dendrite responses, to profile validator scoring offline.
+
+Example:
+    $ python3 bittensor/_neuron/text/core_validator/main.py --neuron.record_dir ~/recording ...
+    $ python3 -m bittensor._neuron.text.core_validator.replay --path ~/recording
+"""
+import argparse
+import functools
+import glob
+import math
+import os
+import threading
+import time
+import psutil
+import torch
+import bittensor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Any
+
+from loguru import logger
+from rich import print as rich_print
+from rich.table import Table
+
+# module level functions of core_validator timed as replay stages, the synapse validation functions are added
+PROFILED_STAGES = ['shapley_base', 'logits_divergence', 'shapley_synergy']
+
+
+def compress_logits( logits: torch.FloatTensor, topk: int ):
+    r""" Returns a compact encoding of logits [..., vocab], the topk logits per position in fp16 with their indices,
+    and one tail logit per position which gives every other token an equal share of the remaining probability.
+    Logits of at most topk tokens are stored dense in fp16.
+    """
+    logits = logits.detach().float()
+    vocab = logits.shape[-1]
+    if vocab <= topk:
+        return logits.half().cpu()
+    values, indices = logits.topk(topk, dim=-1)
+    log_norm = logits.logsumexp(dim=-1, keepdim=True)
+    tail_mass = 1 - (values - log_norm).exp().sum(dim=-1, keepdim=True)
+    tail = tail_mass.clamp(min=1e-30).log() - math.log(vocab - topk) + log_norm
+    return {'shape': list(logits.shape), 'values': values.half().cpu(), 'indices': indices.int().cpu(),
+            'tail': tail.half().cpu()}
+
+
+def decompress_logits( encoded, device: str = 'cpu' ) -> torch.FloatTensor:
+    r""" Returns the fp32 logits of an encoding returned by compress_logits.
+    """
+    if torch.is_tensor(encoded):
+        return encoded.to(device).float()
+    logits = encoded['tail'].to(device).float().expand(encoded['shape']).clone()
+    return logits.scatter_(-1, encoded['indices'].to(device).long(), encoded['values'].to(device).float())
+
+
+class ValidationRecorder:
+    r""" Records the dendrite responses of validator requests with their validation parameters,
+    one file per request in a recording directory, written on a background thread.
+    Non-successful responses are stored by shape only, since the dendrite returns zeros for them.
+    TextCausalLM logits are stored as their topk logits in fp16, see compress_logits.
+    Requests are dropped while max_pending requests wait to be written, so that a slow disk does not hold
+    an unbounded number of responses in memory.
+
+        Args:
+            path (:obj:`str`, `required`):
+                Recording directory, requests are appended to an existing recording.
+            topk (:obj:`int`, `optional`):
+                Number of logits stored per position of TextCausalLM responses.
+            max_pending (:obj:`int`, `optional`):
+                Maximum number of requests waiting to be written.
+    """
+    def __init__( self, path: str, topk: int = 4096, max_pending: int = 16 ):
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.topk = topk
+        self.max_pending = max_pending
+        self.index = len(glob.glob(os.path.join(self.path, '*.pt')))  # next request file
+        self.pending = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def record( self, synapses: List[Tuple], validation_params: Dict[str, Any] ):
+        r""" Records a validator request.
+            Args:
+                synapses (:obj:`List[Tuple]`, `required`):
+                    (synapse, validate_func) per queried synapse.
+                validation_params (:obj:`Dict`, `required`):
+                    Validation parameters of the request, as passed to the validate functions.
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                logger.warning(f'Dropped validator request recording, {self.pending} requests are waiting to be written')
+                return
+            self.pending += 1
+
+        success = bittensor.proto.ReturnCode.Success
+        names = [type(synapse).__name__ for synapse, _ in synapses]
+
+        def encode( response: torch.Tensor, name: str ):
+            if name == 'TextCausalLM':
+                return compress_logits(response, self.topk)
+            return response.detach().cpu()
+
+        return_ops = [ops.detach().cpu() for ops in validation_params['return_ops']]
+        recording = {
+            'version': 2,
+            'synapses': names,
+            'uids': validation_params['uids'].detach().cpu(),
+            'inputs': validation_params['inputs'].detach().cpu(),
+            'routing_score': validation_params['routing_score'].detach().cpu(),
+            'return_ops': return_ops,
+            'times': [t.detach().cpu() for t in validation_params['times']],
+            'query_responses': [[encode(response, names[index_s]) if ops[index_s] == success else None
+                                 for index_s, response in enumerate(responses)]
+                                for responses, ops in zip(validation_params['query_responses'], return_ops)],
+            'response_shapes': [[list(response.shape) for response in responses]
+                                for responses in validation_params['query_responses']],
+            'params': {key: validation_params[key] for key in ['validation_len', 'logits_divergence_penalty',
+                                                              'scaling_law_power', 'synergy_scaling_law_power']},
+        }
+        self.executor.submit(self._write, os.path.join(self.path, f'{self.index:08d}.pt'), recording)
+        self.index += 1
+
+    def _write( self, path: str, recording: Dict ):
+        try:
+            torch.save(recording, path + '.tmp')
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logger.warning(f'Failed to record validator request with error: {e}')
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def close( self ):
+        r""" Writes the submitted requests and stops the background writer.
+        """
+        self.executor.shutdown(wait=True)
+
+
+def load_recording( path: str, device: str = 'cpu' ) -> Dict[str, Any]:
+    r""" Loads a recorded request, with zeros in place of non-successful responses.
+    """
+    recording = torch.load(path, map_location=device)
+    recording['query_responses'] = [[decompress_logits(response, device) if response is not None else torch.zeros(shape, device=device)
+                                     for response, shape in zip(responses, shapes)]
+                                    for responses, shapes in zip(recording['query_responses'],
+                                                                 recording['response_shapes'])]
+    return recording
+
+
+class StageProfiler:
+    r""" Accumulates wall-clock time and memory per named stage, by wrapping the stage functions.
+    Memory is the change of process resident memory over a stage, and the peak allocated memory on cuda.
+    """
+    def __init__( self, device: str = 'cpu' ):
+        self.device = torch.device(device)
+        self.process = psutil.Process()
+        self.stages = {}  # [name] -> {'calls', 'time', 'rss', 'cuda_peak'}
+
+    def wrap( self, name: str, func ):
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            cuda = self.device.type == 'cuda'
+            if cuda:
+                torch.cuda.synchronize(self.device)
+                torch.cuda.reset_peak_memory_stats(self.device)
+            rss = self.process.memory_info().rss
+            start_time = time.perf_counter()
+
+            result = func(*args, **kwargs)
+
+            if cuda:
+                torch.cuda.synchronize(self.device)
+            stage = self.stages.setdefault(name, {'calls': 0, 'time': 0., 'rss': 0, 'cuda_peak': 0})
+            stage['calls'] += 1
+            stage['time'] += time.perf_counter() - start_time
+            stage['rss'] += self.process.memory_info().rss - rss
+            if cuda:
+                stage['cuda_peak'] = max(stage['cuda_peak'], torch.cuda.max_memory_allocated(self.device))
+            return result
+        return profiled
+
+    def print_table( self ):
+        table = Table(box=None)
+        table.title = f'[white] Validator replay [/white] | peak RSS {self.process.memory_info().rss / 2**20:.0f} MiB'
+        for column in ['Stage', 'Calls', 'Total [s]', 'Mean [ms]', 'RSS change [MiB]'] + (['CUDA peak [MiB]'] if self.device.type == 'cuda' else []):
+            table.add_column(column, justify='right')
+        for name, stage in self.stages.items():
+            row = [name, f"{stage['calls']}", f"{stage['time']:.3f}", f"{1000 * stage['time'] / stage['calls']:.2f}",
+                   f"{stage['rss'] / 2**20:.1f}"]
+            if self.device.type == 'cuda':
+                row += [f"{stage['cuda_peak'] / 2**20:.1f}"]
+            table.add_row(*row)
+        rich_print(table)
+
+
+def replay( path: str, device: str = 'cpu', repeat: int = 1, profiler: StageProfiler = None,
+            scoring_pool: 'ScoringPool' = None ) -> List[Tuple[torch.FloatTensor, Dict]]:
+    r""" Feeds a recording through validator scoring without network, timing each scoring stage.
+        Args:
+            path (:obj:`str`, `required`):
+                Recording directory.
+            device (:obj:`str`, `optional`):
+                Device to score on.
+            repeat (:obj:`int`, `optional`):
+                Number of passes over the recording.
+            profiler (:obj:`StageProfiler`, `optional`):
+                Profiler to accumulate stage timings in, a new profiler if None.
+            scoring_pool (:obj:`ScoringPool`, `optional`):
+                Process pool to compute endpoint losses in, computed in process if None.
+        Returns:
+            results (:obj:`List[Tuple[torch.FloatTensor, Dict]]`):
+                (loss, neuron_stats) per replayed request, as returned by nucleus.score.
+    """
+    import bittensor._neuron.text.core_validator as core_validator  # the validator package imports this module
+
+    profiler = StageProfiler(device) if profiler is None else profiler
+    validate_funcs = {'TextCausalLM': (bittensor.synapse.TextCausalLM, core_validator.textcausallm),
+                      'TextCausalLMNext': (bittensor.synapse.TextCausalLMNext, core_validator.textcausallmnext)}
+    loss_fct = torch.nn.CrossEntropyLoss()
+
+    originals = {name: getattr(core_validator, name) for name in PROFILED_STAGES}
+    results = []
+    try:
+        for name, func in originals.items():
+            setattr(core_validator, name, profiler.wrap(name, func))
+
+        files = sorted(glob.glob(os.path.join(os.path.expanduser(path), '*.pt')))
+        for _ in range(repeat):
+            for file in files:
+                recording = load_recording(file, device)
+                loss = torch.tensor(0.).to(device)
+                neuron_stats = {}
+                for index_s, name in enumerate(recording['synapses']):
+                    synapse, validate_func = validate_funcs[name]
+                    _loss, stats = profiler.wrap(name, validate_func)(
+                        uids=recording['uids'], query_responses=recording['query_responses'],
+                        return_ops=recording['return_ops'], times=recording['times'],
+                        routing_score=recording['routing_score'], inputs=recording['inputs'], loss_fct=loss_fct,
+                        vlogger=None, logging=False, synapse=synapse(), index_s=index_s, scoring_pool=scoring_pool,
+                        **recording['params'])
+                    loss += _loss
+                    for _uid, _stats in stats.items():
+                        neuron_stats.setdefault(_uid, {}).update(_stats)
+                results += [(loss, neuron_stats)]
+
+    finally:
+        for name, func in originals.items():
+            setattr(core_validator, name, func)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays recorded validator requests through scoring, with timing per stage.')
+    parser.add_argument('--path', type=str, required=True, help='Recording directory, as set with --neuron.record_dir.')
+    parser.add_argument('--device', type=str, default='cpu', help='Device to score on.')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of passes over the recording.')
+    parser.add_argument('--scoring_workers', type=int, default=0, help='Number of worker processes to compute endpoint losses in, 0 scores in process.')
+    args = parser.parse_args()
+
+    from .scoring_pool import ScoringPool
+    scoring_pool = ScoringPool(args.scoring_workers) if args.scoring_workers > 0 else None
+    profiler = StageProfiler(args.device)
+    try:
+        results = replay(args.path, device=args.device, repeat=args.repeat, profiler=profiler, scoring_pool=scoring_pool)
+    finally:
+        if scoring_pool is not None:
+            scoring_pool.close()
+    logger.info(f'Replayed {len(results)} requests from {args.path}')
+    profiler.print_table()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Process pool for validator scoring of endpoint responses.
+"""
+import multiprocessing
+import torch
+import torch.multiprocessing  # registers shared memory pickling of tensors for multiprocessing
+import bittensor
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Any
+
+from loguru import logger
+
+
+def _init_worker():
+    torch.set_num_threads(1)  # one core per worker, the pool provides the parallelism
+
+
+def _score_shard(func: Callable, shard: List, kwargs: Dict[str, Any]) -> Dict[int, Any]:
+    results = {}
+    with torch.no_grad():
+        for uid, response in shard:
+            try:
+                results[uid] = func(response, **kwargs)
+            except Exception as e:
+                results[uid] = RuntimeError(str(e))  # raised by the caller, for per-uid error handling
+    return results
+
+
+class ScoringPool:
+    r""" Pool of worker processes that computes the per-endpoint losses of successful responses, with the
+    responsive endpoints sharded across workers. Tensors are handed over to the workers through shared memory.
+
+    Responses are only scored in the pool when they are detached cpu tensors, i.e. with --nucleus.no_dendrite_backward
+    on a cpu validator, since the endpoint losses are backward() to the dendrite otherwise.
+
+        Args:
+            num_workers (:obj:`int`, `required`):
+                Number of worker processes.
+    """
+    def __init__( self, num_workers: int ):
+        self.num_workers = num_workers
+        # spawn, since forking a process with running dendrite threads is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self._fallback_logged = False
+
+    def map( self, func: Callable, uids: torch.Tensor, query_responses: List[List[torch.FloatTensor]],
+             return_ops: List[torch.LongTensor], index_s: int = 0, **kwargs ) -> Dict[int, Any]:
+        r""" Computes func(response, **kwargs) for the successful responses of a synapse across the workers.
+            Args:
+                func (:obj:`Callable`, `required`):
+                    Module level function of a response to compute, e.g. textcausallmnext_losses.
+                uids (:obj:`torch.Tensor`, `required`): [num_neurons]
+                    Neuron UIDs.
+                query_responses (:obj:`List[List[torch.FloatTensor]]`, `required`):
+                    List of outputs from synapses per endpoint.
+                return_ops (:obj:`List[torch.LongTensor]` of shape :obj:`[num_endpoints]`, `required`):
+                    Return code per call per synapse.
+                index_s (:obj:`int`, `optional`):
+                    Index of synapse to extract responses.
+            Returns:
+                results (:obj:`Dict[int, Any]`):
+                    [uid] -> func result, or the exception raised for that uid.
+                    Empty if the responses can not be scored in the pool.
+        """
+        shard = [(_uid, query_responses[index][index_s]) for index, _uid in enumerate(uids.tolist())
+                 if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success]
+        if any(response.requires_grad or response.is_cuda for _, response in shard):
+            if not self._fallback_logged:
+                logger.warning('Scoring pool \t| Responses require grad or are on cuda, scoring in process')
+                self._fallback_logged = True
+            return {}
+
+        shards = [shard[i::self.num_workers] for i in range(self.num_workers) if shard[i::self.num_workers]]
+        futures = [self.executor.submit(_score_shard, func, _shard, kwargs) for _shard in shards]
+        results = {}
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    def close( self ):
+        r""" Stops the worker processes.
+        """
+        self.executor.shutdown(wait=True)
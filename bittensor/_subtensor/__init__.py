@@ -27,7 +27,8 @@ from torch.cuda import is_available as is_cuda_available
 
 from bittensor.utils import strtobool_with_default
 from .naka_subtensor_impl import Subtensor as Nakamoto_subtensor
-from . import subtensor_impl, subtensor_mock
+from . import subtensor_impl, subtensor_mock, subtensor_sim
+from .query_cache import QueryCache
 
 logger = logger.opt(colors=True)
 
@@ -57,6 +58,7 @@ class subtensor:
                             -- local (local running network)
                             -- finney (main network)
                             -- mock (mock network for testing.)
+                            -- sim (in-process simulated chain, see --subtensor.sim.*)
                     If this option is set it overloads subtensor.chain_endpoint with 
                     an entry point node from that network.
                 chain_endpoint (default=None, type=str)
@@ -72,6 +74,17 @@ class subtensor:
         if config.subtensor._mock == True or network == 'mock' or config.subtensor.get('network', bittensor.defaults.subtensor.network) == 'mock':
             config.subtensor._mock = True
             return subtensor_mock.mock_subtensor.mock()
+
+        # Returns a subtensor served by an in-process simulated chain.
+        if network == 'sim' or ( network == None and chain_endpoint == None and config.subtensor.get('network', bittensor.defaults.subtensor.network) == 'sim' ):
+            sim = config.subtensor.get('sim', bittensor.defaults.subtensor.sim)
+            return subtensor_sim.Simulated_Subtensor(
+                n_subnets = int( sim.get('subnets', bittensor.defaults.subtensor.sim.subnets) ),
+                n_neurons = int( sim.get('neurons', bittensor.defaults.subtensor.sim.neurons) ),
+                seed = int( sim.get('seed', bittensor.defaults.subtensor.sim.seed) ),
+                block_time = float( sim.get('block_time', bittensor.defaults.subtensor.sim.block_time) ) or None,
+                latency = float( sim.get('latency', bittensor.defaults.subtensor.sim.latency) ),
+            )
         
         # Determine config.subtensor.chain_endpoint and config.subtensor.network config.
         # If chain_endpoint is set, we override the network flag, otherwise, the chain_endpoint is assigned by the network.
@@ -132,6 +145,8 @@ class subtensor:
                 substrate = substrate,
                 network = config.subtensor.get('network', bittensor.defaults.subtensor.network),
                 chain_endpoint = config.subtensor.chain_endpoint,
+                cache = QueryCache() if config.subtensor.get('cache', bittensor.defaults.subtensor.cache) else None,
+                pool_size = int( config.subtensor.get('pool_size', bittensor.defaults.subtensor.pool_size) ),
             )
 
     @staticmethod   
@@ -158,6 +173,7 @@ class subtensor:
                                         -- finney (main network)
                                         -- local (local running network)
                                         -- mock (creates a mock connection (for testing))
+                                        -- sim (in-process simulated chain, for load tests)
                                     If this option is set it overloads subtensor.chain_endpoint with 
                                     an entry point node from that network.
                                     ''')
@@ -165,6 +181,13 @@ class subtensor:
                                 help='''The subtensor endpoint flag. If set, overrides the --network flag.
                                     ''')       
             parser.add_argument('--' + prefix_str + 'subtensor._mock', action='store_true', help='To turn on subtensor mocking for testing purposes.', default=bittensor.defaults.subtensor._mock)
+            parser.add_argument('--' + prefix_str + 'subtensor.pool_size', type=int, help='''Number of connections for concurrent read queries, reads share the extrinsic connection if 1.''', default=bittensor.defaults.subtensor.pool_size)
+            parser.add_argument('--' + prefix_str + 'subtensor.cache', action='store_true', help='''If set, caches read query responses, responses at the latest block for one block.''', default=bittensor.defaults.subtensor.cache)
+            parser.add_argument('--' + prefix_str + 'subtensor.sim.subnets', type=int, help='''Number of subnets of the simulated chain (--subtensor.network sim).''', default=bittensor.defaults.subtensor.sim.subnets)
+            parser.add_argument('--' + prefix_str + 'subtensor.sim.neurons', type=int, help='''Number of neurons on each subnet of the simulated chain.''', default=bittensor.defaults.subtensor.sim.neurons)
+            parser.add_argument('--' + prefix_str + 'subtensor.sim.seed', type=int, help='''Seed of the simulated chain state.''', default=bittensor.defaults.subtensor.sim.seed)
+            parser.add_argument('--' + prefix_str + 'subtensor.sim.block_time', type=float, help='''Seconds between simulated blocks, lower for benchmarks. If 0, blocks are only produced when waited for.''', default=bittensor.defaults.subtensor.sim.block_time)
+            parser.add_argument('--' + prefix_str + 'subtensor.sim.latency', type=float, help='''Seconds added to every simulated query and extrinsic.''', default=bittensor.defaults.subtensor.sim.latency)
             # registration args. Used for register and re-register and anything that calls register.
             parser.add_argument('--' + prefix_str + 'subtensor.register.num_processes', '-n', dest=prefix_str + 'subtensor.register.num_processes', help="Number of processors to use for registration", type=int, default=bittensor.defaults.subtensor.register.num_processes)
             parser.add_argument('--' + prefix_str + 'subtensor.register.update_interval', '--' + prefix_str + 'subtensor.register.cuda.update_interval', '--' + prefix_str + 'cuda.update_interval', '-u', help="The number of nonces to process before checking for next block during registration", type=int, default=bittensor.defaults.subtensor.register.update_interval)
@@ -191,6 +214,15 @@ class subtensor:
         defaults.subtensor.network = os.getenv('BT_SUBTENSOR_NETWORK') if os.getenv('BT_SUBTENSOR_NETWORK') != None else 'finney'
         defaults.subtensor.chain_endpoint = os.getenv('BT_SUBTENSOR_CHAIN_ENDPOINT') if os.getenv('BT_SUBTENSOR_CHAIN_ENDPOINT') != None else None
         defaults.subtensor._mock = os.getenv('BT_SUBTENSOR_MOCK') if os.getenv('BT_SUBTENSOR_MOCK') != None else False
+        defaults.subtensor.cache = os.getenv('BT_SUBTENSOR_CACHE') if os.getenv('BT_SUBTENSOR_CACHE') != None else False
+        defaults.subtensor.pool_size = os.getenv('BT_SUBTENSOR_POOL_SIZE') if os.getenv('BT_SUBTENSOR_POOL_SIZE') != None else 1
+
+        defaults.subtensor.sim = bittensor.Config()
+        defaults.subtensor.sim.subnets = os.getenv('BT_SUBTENSOR_SIM_SUBNETS') if os.getenv('BT_SUBTENSOR_SIM_SUBNETS') != None else 1
+        defaults.subtensor.sim.neurons = os.getenv('BT_SUBTENSOR_SIM_NEURONS') if os.getenv('BT_SUBTENSOR_SIM_NEURONS') != None else 1024
+        defaults.subtensor.sim.seed = os.getenv('BT_SUBTENSOR_SIM_SEED') if os.getenv('BT_SUBTENSOR_SIM_SEED') != None else 0
+        defaults.subtensor.sim.block_time = os.getenv('BT_SUBTENSOR_SIM_BLOCK_TIME') if os.getenv('BT_SUBTENSOR_SIM_BLOCK_TIME') != None else bittensor.__blocktime__
+        defaults.subtensor.sim.latency = os.getenv('BT_SUBTENSOR_SIM_LATENCY') if os.getenv('BT_SUBTENSOR_SIM_LATENCY') != None else 0.
 
         defaults.subtensor.register = bittensor.Config()
         defaults.subtensor.register.num_processes = os.getenv('BT_SUBTENSOR_REGISTER_NUM_PROCESSES') if os.getenv('BT_SUBTENSOR_REGISTER_NUM_PROCESSES') != None else None # uses processor count by default within the function
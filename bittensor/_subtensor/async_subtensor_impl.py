@@ -0,0 +1,246 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Asyncio-native read-only chain client.
+"""
+import asyncio
+import itertools
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import bittensor
+from bittensor.utils.balance import Balance
+from loguru import logger
+from substrateinterface.exceptions import SubstrateRequestException
+from substrateinterface.utils.hasher import blake2_128_concat, xxh128
+
+from .chain_data import NeuronInfo, DelegateInfo, SubnetInfo, NeuronInfoLite
+
+logger = logger.opt(colors=True)
+
+# Storage key prefix of System.Account, twox128("System") ++ twox128("Account").
+SYSTEM_ACCOUNT_PREFIX = xxh128( b'System' ) + xxh128( b'Account' )
+
+
+class AsyncSubtensor:
+    r""" Asyncio client for the read queries of Subtensor, over a single websocket connection.
+    Requests are pipelined, any number of queries can be outstanding on the connection and responses are
+    matched to their requests by JSON-RPC id. Responses are decoded with the chain_data decoders of Subtensor.
+
+        Args:
+            network (:obj:`str`, `optional`):
+                The subtensor network, see bittensor.subtensor.
+            chain_endpoint (:obj:`str`, `optional`):
+                The subtensor endpoint, overrides the network if set.
+
+        Examples::
+            >>> async with bittensor.AsyncSubtensor( network = 'finney' ) as subtensor:
+            >>>     neurons, info = await asyncio.gather( subtensor.neurons( netuid = 3 ), subtensor.get_subnet_info( netuid = 3 ) )
+    """
+    def __init__( self, network: Optional[str] = None, chain_endpoint: Optional[str] = None ):
+        self.network = network if network != None else bittensor.defaults.subtensor.network
+        self.chain_endpoint = chain_endpoint if chain_endpoint != None else bittensor.subtensor.determine_chain_endpoint( self.network )
+        self.url = bittensor.utils.networking.get_formatted_ws_endpoint_url( self.chain_endpoint )
+        self._websocket = None
+        self._reader: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count( 1 )
+
+    def __str__(self) -> str:
+        return "AsyncSubtensor({}, {})".format( self.network, self.chain_endpoint )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    async def __aenter__( self ) -> 'AsyncSubtensor':
+        await self.connect()
+        return self
+
+    async def __aexit__( self, *args ):
+        await self.close()
+
+    async def connect( self ):
+        r""" Opens the websocket connection unless it is open, requests connect on first use.
+        Concurrent calls open a single connection.
+        """
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError('AsyncSubtensor requires websockets. Please install websockets.')
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._websocket is not None:
+                return
+            self._websocket = await websockets.connect( self.url, max_size = None )
+            self._reader = asyncio.get_running_loop().create_task( self._read( self._websocket ) )
+
+    async def close( self ):
+        r""" Closes the websocket connection, outstanding requests raise ConnectionError.
+        """
+        websocket, reader = self._websocket, self._reader
+        if websocket is not None:
+            await websocket.close()
+            await asyncio.gather( reader, return_exceptions = True )
+
+    async def _read( self, websocket ):
+        try:
+            async for message in websocket:
+                response = json.loads( message )
+                future = self._pending.pop( response.get( 'id' ), None )
+                if future is not None and not future.done():
+                    future.set_result( response )
+        except Exception as e:
+            logger.warning( 'AsyncSubtensor connection error: {}', e )
+        finally:
+            # Later requests open a new connection.
+            if self._websocket is websocket:
+                self._websocket = None
+                self._reader = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception( ConnectionError( 'AsyncSubtensor connection to {} closed'.format( self.url ) ) )
+            self._pending.clear()
+
+    async def rpc_request( self, method: str, params: List[Any] ) -> Any:
+        r""" Sends a JSON-RPC request and returns its result, without waiting for other outstanding requests.
+            Raises:
+                SubstrateRequestException: If the node returns an error.
+        """
+        if self._websocket is None:
+            await self.connect()
+        request_id = next( self._ids )
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._websocket.send( json.dumps( { 'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params } ) )
+        except Exception:
+            self._pending.pop( request_id, None )
+            raise
+        response = await future
+        if 'error' in response:
+            raise SubstrateRequestException( response['error'] )
+        return response['result']
+
+    async def _runtime_call( self, method: str, params: List[Any], block: Optional[int] = None ) -> Optional[List[int]]:
+        # Same parameter order as the runtime-API calls of Subtensor.
+        block_hash = None if block == None else await self.get_block_hash( block )
+        if block_hash:
+            params = [block_hash] + params
+        return await self.rpc_request( method, params )
+
+    ##################
+    #### Blocks ####
+    ##################
+
+    async def get_block_hash( self, block: int ) -> Optional[str]:
+        return await self.rpc_request( 'chain_getBlockHash', [block] )
+
+    async def get_current_block( self ) -> int:
+        r""" Returns the current block number on the chain.
+        """
+        header = await self.rpc_request( 'chain_getHeader', [] )
+        return int( header['number'], 16 )
+
+    ###################
+    #### Accounts ####
+    ###################
+
+    async def get_balance( self, address: str, block: Optional[int] = None ) -> Balance:
+        r""" Returns the free balance of the ss58 address.
+        """
+        account_id = bittensor.utils.ss58_address_to_bytes( address )
+        storage_key = '0x' + ( SYSTEM_ACCOUNT_PREFIX + blake2_128_concat( account_id ) ).hex()
+        params = [storage_key] if block == None else [storage_key, await self.get_block_hash( block )]
+        result = await self.rpc_request( 'state_getStorage', params )
+        if result is None:
+            return Balance( 0 )
+        # AccountInfo: nonce, consumers, providers, sufficients as u32, then the free balance as u128.
+        account_info = bytes.fromhex( result[2:] )
+        return Balance( int.from_bytes( account_info[16:32], 'little' ) )
+
+    ####################
+    #### Subnets ####
+    ####################
+
+    async def get_subnet_info( self, netuid: int, block: Optional[int] = None ) -> Optional[SubnetInfo]:
+        result = await self._runtime_call( 'subnetInfo_getSubnetInfo', [netuid], block )
+        if result in (None, []):
+            return None
+        return SubnetInfo.from_vec_u8( result )
+
+    async def get_all_subnets_info( self, block: Optional[int] = None ) -> List[SubnetInfo]:
+        result = await self._runtime_call( 'subnetInfo_getSubnetsInfo', [], block )
+        if result in (None, []):
+            return []
+        return SubnetInfo.list_from_vec_u8( result )
+
+    ####################
+    #### Delegates ####
+    ####################
+
+    async def get_delegates( self, block: Optional[int] = None ) -> List[DelegateInfo]:
+        result = await self._runtime_call( 'delegateInfo_getDelegates', [], block )
+        if result in (None, []):
+            return []
+        return DelegateInfo.list_from_vec_u8( result )
+
+    async def get_delegate_by_hotkey( self, hotkey_ss58: str, block: Optional[int] = None ) -> Optional[DelegateInfo]:
+        encoded_hotkey = list( bittensor.utils.ss58_address_to_bytes( hotkey_ss58 ) )
+        result = await self._runtime_call( 'delegateInfo_getDelegate', [encoded_hotkey], block )
+        if result in (None, []):
+            return None
+        return DelegateInfo.from_vec_u8( result )
+
+    async def get_delegated( self, coldkey_ss58: str, block: Optional[int] = None ) -> List[Tuple[DelegateInfo, Balance]]:
+        r""" Returns the list of delegates that a given coldkey is staked to.
+        """
+        encoded_coldkey = list( bittensor.utils.ss58_address_to_bytes( coldkey_ss58 ) )
+        result = await self._runtime_call( 'delegateInfo_getDelegated', [encoded_coldkey], block )
+        if result in (None, []):
+            return []
+        return DelegateInfo.delegated_list_from_vec_u8( result )
+
+    ##################
+    #### Neurons ####
+    ##################
+
+    async def neuron_for_uid( self, uid: int, netuid: int, block: Optional[int] = None ) -> NeuronInfo:
+        if uid == None: return NeuronInfo._null_neuron()
+        result = await self._runtime_call( 'neuronInfo_getNeuron', [netuid, uid], block )
+        if result in (None, []):
+            return NeuronInfo._null_neuron()
+        return NeuronInfo.from_vec_u8( result )
+
+    async def neurons( self, netuid: int, block: Optional[int] = None ) -> List[NeuronInfo]:
+        result = await self._runtime_call( 'neuronInfo_getNeurons', [netuid], block )
+        if result in (None, []):
+            return []
+        return NeuronInfo.list_from_vec_u8( result )
+
+    async def neuron_for_uid_lite( self, uid: int, netuid: int, block: Optional[int] = None ) -> NeuronInfoLite:
+        if uid == None: return NeuronInfoLite._null_neuron()
+        result = await self._runtime_call( 'neuronInfo_getNeuronLite', [netuid, uid], block )
+        if result in (None, []):
+            return NeuronInfoLite._null_neuron()
+        return NeuronInfoLite.from_vec_u8( result )
+
+    async def neurons_lite( self, netuid: int, block: Optional[int] = None ) -> List[NeuronInfoLite]:
+        result = await self._runtime_call( 'neuronInfo_getNeuronsLite', [netuid], block )
+        if result in (None, []):
+            return []
+        return NeuronInfoLite.list_from_vec_u8( result )
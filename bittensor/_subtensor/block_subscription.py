@@ -0,0 +1,136 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" New-head subscription shared by the block waiters of a process.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+import bittensor
+from loguru import logger
+from substrateinterface import SubstrateInterface
+
+logger = logger.opt(colors=True)
+
+
+class BlockSubscription:
+    r""" Follows the chain head with a single chain_subscribeNewHeads subscription on a background thread,
+    and wakes the threads waiting for a block. The subscription reconnects after connection errors and when
+    no head arrives for stale_after seconds, block is None until the first head and while reconnecting.
+
+        Args:
+            connect (:obj:`Callable[[], SubstrateInterface]`, `required`):
+                Creates the websocket client of the subscription, a subscription holds its connection.
+            retry_delay (:obj:`float`, `optional`):
+                Seconds to wait before reconnecting after a connection error.
+            stale_after (:obj:`float`, `optional`):
+                Seconds without a head after which the head is stale, defaults to three block times.
+    """
+    def __init__( self, connect: Callable[[], SubstrateInterface], retry_delay: float = 2., stale_after: Optional[float] = None ):
+        self.connect = connect
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after if stale_after is not None else 3 * bittensor.__blocktime__
+        self.block: Optional[int] = None
+        self.updated: Optional[float] = None  # monotonic time of the last head
+        self._substrate: Optional[SubstrateInterface] = None
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread( target = self._run, name = 'block_subscription', daemon = True )
+        self._thread.start()
+
+    def _run( self ):
+        while not self._stopped:
+            try:
+                substrate = self.connect()
+                websocket = getattr( substrate, 'websocket', None )
+                if websocket is not None:
+                    # A connection that goes silent raises instead of blocking the subscription forever.
+                    websocket.settimeout( self.stale_after )
+                self._substrate = substrate
+                try:
+                    substrate.rpc_request( 'chain_subscribeNewHeads', [], result_handler = self._on_head )
+                finally:
+                    self._substrate = None
+                    substrate.close()
+            except Exception as e:
+                logger.warning( 'Block subscription error, reconnecting: {}', e )
+                with self._condition:
+                    self.block = None
+                time.sleep( self.retry_delay )
+
+    def _on_head( self, message: Dict, update_nr: int, subscription_id: str ) -> Optional[bool]:
+        if self._stopped:
+            return True # ends the subscription
+        block = int( message['params']['result']['number'], 16 )
+        with self._condition:
+            self.updated = time.monotonic()
+            # Heads of a reorg can repeat or precede the latest head, waiters only see the chain advance.
+            if self.block is None or block > self.block:
+                self.block = block
+                self._condition.notify_all()
+        return None
+
+    def head( self ) -> Optional[int]:
+        r""" Returns the chain head, or None if no head was received or the last head is older than stale_after,
+        in which case the subscription reconnects.
+        """
+        with self._condition:
+            if self.block is None:
+                return None
+            if time.monotonic() - self.updated <= self.stale_after:
+                return self.block
+            self.block = None
+            substrate = self._substrate
+        logger.warning( 'No new head for {} seconds, reconnecting the block subscription', self.stale_after )
+        if substrate is not None:
+            try:
+                substrate.close()  # the subscription raises and reconnects
+            except Exception as e:
+                logger.debug( 'Error closing the block subscription: {}', e )
+        return None
+
+    def wait( self, block: Optional[int] = None, timeout: Optional[float] = None ) -> Optional[int]:
+        r""" Waits until the chain head reaches block and returns the head, or None if no head was received.
+            Args:
+                block (:obj:`Optional[int]`, `optional`):
+                    Block to wait for, defaults to the block after the current head.
+                timeout (:obj:`Optional[float]`, `optional`):
+                    Seconds to wait at most, returns the current head on timeout.
+        """
+        with self._condition:
+            if block is None and self.block is not None:
+                block = self.block + 1
+            self._condition.wait_for( lambda: self.block is not None and ( block is None or self.block >= block ), timeout )
+            return self.block
+
+    def stream( self ) -> Iterator[int]:
+        r""" Yields the chain head on every change, skipping the blocks passed while the consumer was busy.
+        """
+        last = None
+        while not self._stopped:
+            block = self.wait( last + 1 if last is not None else 0, timeout = 1 )
+            if block is not None and block != last:
+                last = block
+                yield block
+
+    def close( self ):
+        r""" Stops the subscription after the next head.
+        """
+        self._stopped = True
+        with self._condition:
+            self.block = None
+            self._condition.notify_all()
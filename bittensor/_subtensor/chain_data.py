@@ -16,7 +16,9 @@
 # DEALINGS IN THE SOFTWARE.
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Tuple, Dict, Optional, Any
+import struct
 import bittensor
 from bittensor import Balance
 import torch
@@ -154,12 +156,19 @@ RAOPERTAO = 1e9
 U16_MAX = 65535
 U64_MAX = 18446744073709551615
 
-def from_scale_encoding( vec_u8: List[int], type_name: ChainDataType, is_vec: bool = False, is_option: bool = False ) -> Optional[Dict]:
-    as_bytes = bytes(vec_u8)
-    as_scale_bytes = ScaleBytes(as_bytes)
+@lru_cache(maxsize=None)
+def _rpc_runtime_config() -> RuntimeConfiguration:
+    r""" Returns the runtime configuration with the custom rpc types, built once per process.
+    """
     rpc_runtime_config = RuntimeConfiguration()
     rpc_runtime_config.update_type_registry(load_type_registry_preset("legacy"))
     rpc_runtime_config.update_type_registry(custom_rpc_type_registry)
+    return rpc_runtime_config
+
+def from_scale_encoding( vec_u8: List[int], type_name: ChainDataType, is_vec: bool = False, is_option: bool = False ) -> Optional[Dict]:
+    as_bytes = bytes(vec_u8)
+    as_scale_bytes = ScaleBytes(as_bytes)
+    rpc_runtime_config = _rpc_runtime_config()
 
     type_string = type_name.name
     if type_name == ChainDataType.DelegatedInfo:
@@ -177,6 +186,116 @@ def from_scale_encoding( vec_u8: List[int], type_name: ChainDataType, is_vec: bo
 
     return obj.decode()
 
+@lru_cache(maxsize=65536)
+def _ss58_encode( account_id: bytes, ss58_format: int ) -> str:
+    # Hotkeys and coldkeys repeat across neurons, stakes and syncs.
+    return ss58_encode( account_id, ss58_format )
+
+AXON_INFO = struct.Struct('<QIQQHBBBB') # block, version, ip low and high u64, port, ip_type, protocol, placeholder1, placeholder2
+PROMETHEUS_INFO = struct.Struct('<QIQQHB') # block, version, ip low and high u64, port, ip_type
+
+class NeuronListDecoder:
+    r""" Decodes the SCALE encoded Vec<NeuronInfo> and Vec<NeuronInfoLite> runtime-API payloads directly from bytes,
+    the fixed layouts of custom_rpc_type_registry, without the generic decoder and its intermediate dicts.
+    Account ids are ss58 encoded once per process.
+
+        Args:
+            vec_u8 (:obj:`List[int]`, `required`):
+                SCALE encoded payload.
+            lite (:obj:`bool`, `optional`, defaults to False):
+                If True, decodes NeuronInfoLite, without weights and bonds.
+    """
+    def __init__( self, vec_u8: List[int], lite: bool = False ):
+        self.data = bytes( vec_u8 )
+        self.offset = 0
+        self.lite = lite
+
+    def compact( self ) -> int:
+        data, offset = self.data, self.offset
+        mode = data[offset] & 0b11
+        if mode == 0:
+            self.offset += 1
+            return data[offset] >> 2
+        if mode == 1:
+            self.offset += 2
+            return int.from_bytes( data[offset:offset + 2], 'little' ) >> 2
+        if mode == 2:
+            self.offset += 4
+            return int.from_bytes( data[offset:offset + 4], 'little' ) >> 2
+        length = ( data[offset] >> 2 ) + 4
+        self.offset += 1 + length
+        return int.from_bytes( data[offset + 1:offset + 1 + length], 'little' )
+
+    def account_id( self ) -> str:
+        self.offset += 32
+        return _ss58_encode( self.data[self.offset - 32:self.offset], bittensor.__ss58_format__ )
+
+    def boolean( self ) -> bool:
+        self.offset += 1
+        return self.data[self.offset - 1] != 0
+
+    def unpack( self, layout: struct.Struct ) -> Tuple:
+        values = layout.unpack_from( self.data, self.offset )
+        self.offset += layout.size
+        return values
+
+    def pairs( self ) -> List[List[int]]:
+        return [ [ self.compact(), self.compact() ] for _ in range( self.compact() ) ]
+
+    def axon_info( self ) -> 'AxonInfo':
+        block, version, ip_low, ip_high, port, ip_type, protocol, placeholder1, placeholder2 = self.unpack( AXON_INFO )
+        return AxonInfo( block = block, version = version, ip = bittensor.utils.networking.int_to_ip( ip_low | ip_high << 64 ), port = port,
+                         ip_type = ip_type, protocol = protocol, placeholder1 = placeholder1, placeholder2 = placeholder2 )
+
+    def prometheus_info( self ) -> 'PrometheusInfo':
+        block, version, ip_low, ip_high, port, ip_type = self.unpack( PROMETHEUS_INFO )
+        return PrometheusInfo( block = block, version = version, ip = bittensor.utils.networking.int_to_ip( ip_low | ip_high << 64 ),
+                               port = port, ip_type = ip_type )
+
+    def neuron( self ):
+        # Field order of the NeuronInfo and NeuronInfoLite type mappings.
+        hotkey = self.account_id()
+        coldkey = self.account_id()
+        uid = self.compact()
+        netuid = self.compact()
+        active = self.boolean()
+        axon_info = self.axon_info()
+        prometheus_info = self.prometheus_info()
+        stake_dict = {}
+        for _ in range( self.compact() ):
+            staker = self.account_id()
+            stake_dict[staker] = Balance.from_rao( self.compact() )
+        rank, emission, incentive, consensus, trust, validator_trust, dividends, last_update = [ self.compact() for _ in range( 8 ) ]
+        validator_permit = self.boolean()
+        if not self.lite:
+            weights = self.pairs()
+            bonds = self.pairs()
+        pruning_score = self.compact()
+
+        stake = sum( stake_dict.values() )
+        neuron = dict(
+            hotkey = hotkey, coldkey = coldkey, uid = uid, netuid = netuid, active = active,
+            stake = stake, stake_dict = stake_dict, total_stake = stake,
+            rank = rank / U16_MAX, emission = emission / RAOPERTAO, incentive = incentive / U16_MAX,
+            consensus = consensus / U16_MAX, trust = trust / U16_MAX, validator_trust = validator_trust / U16_MAX,
+            dividends = dividends / U16_MAX, last_update = last_update, validator_permit = validator_permit,
+            prometheus_info = prometheus_info, axon_info = axon_info, pruning_score = pruning_score,
+        )
+        if self.lite:
+            return NeuronInfoLite( **neuron )
+        return NeuronInfo( weights = weights, bonds = bonds, **neuron )
+
+    def decode( self ) -> List:
+        r""" Returns the decoded neurons, raises ValueError if the payload does not match the layout.
+        """
+        try:
+            neurons = [ self.neuron() for _ in range( self.compact() ) ]
+        except ( IndexError, struct.error ) as e:
+            raise ValueError( 'Truncated neuron list payload' ) from e
+        if self.offset != len( self.data ):
+            raise ValueError( 'Neuron list payload has {} trailing bytes'.format( len( self.data ) - self.offset ) )
+        return neurons
+
 # Dataclasses for chain data.
 @dataclass
 class NeuronInfo:
@@ -252,6 +371,11 @@ class NeuronInfo:
         r""" Returns a list of NeuronInfo objects from a vec_u8.
         """
         
+        try:
+            return NeuronListDecoder( vec_u8, lite = False ).decode()
+        except ValueError:
+            pass # the layout changed, fall back to the generic decoder
+
         decoded_list = from_scale_encoding(vec_u8, ChainDataType.NeuronInfo, is_vec=True)
         if decoded_list is None:
             return []
@@ -384,6 +508,11 @@ class NeuronInfoLite:
         r""" Returns a list of NeuronInfoLite objects from a vec_u8.
         """
         
+        try:
+            return NeuronListDecoder( vec_u8, lite = True ).decode()
+        except ValueError:
+            pass # the layout changed, fall back to the generic decoder
+
         decoded_list = from_scale_encoding(vec_u8, ChainDataType.NeuronInfoLite, is_vec=True)
         if decoded_list is None:
             return []
@@ -658,3 +787,23 @@ class SubnetInfo:
         r""" Returns a SubnetInfo object from a torch parameter_dict.
         """
         return cls( **dict(parameter_dict) )
+
+@dataclass(frozen=True)
+class SubnetHyperparameters:
+    r"""
+    Dataclass for the subnet hyper parameters used by validators, all read at the same block.
+    """
+    netuid: int
+    block: int
+    validator_batch_size: int
+    validator_sequence_length: int
+    validator_prune_len: int
+    validator_logits_divergence: float
+    validator_epochs_per_reset: int
+    validator_epoch_length: int
+    validator_exclude_quantile: float
+    min_allowed_weights: int
+    max_weight_limit: float
+    scaling_law_power: float
+    synergy_scaling_law_power: float
+    max_n: int
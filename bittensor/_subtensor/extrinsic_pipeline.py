@@ -0,0 +1,205 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Pipelined extrinsic submission with locally reserved nonces.
+"""
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import bittensor
+from loguru import logger
+from substrateinterface import Keypair, SubstrateInterface
+from substrateinterface.base import ExtrinsicReceipt
+from substrateinterface.exceptions import SubstrateRequestException
+
+logger = logger.opt(colors=True)
+
+# Transaction pool errors of an extrinsic signed with a nonce the chain has moved past or already holds.
+NONCE_ERRORS = ( 'Priority is too low', 'Transaction is outdated', 'Transaction is stale', 'Stale' )
+
+
+def _is_nonce_error( error: Exception ) -> bool:
+    return any( message in str( error ) for message in NONCE_ERRORS )
+
+
+class NonceManager:
+    r""" Next nonce of each account, reserved locally so that any number of extrinsics of an account can be
+    signed without a nonce query each. The nonce of an account is fetched from the chain on first use and on resync.
+
+        Args:
+            fetch (:obj:`Callable[[str], int]`, `required`):
+                Returns the next nonce of the ss58 address on the chain, including the transaction pool.
+    """
+    def __init__( self, fetch: Callable[[str], int] ):
+        self.fetch = fetch
+        self._nonces: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def reserve( self, ss58_address: str ) -> int:
+        r""" Returns the next nonce of the account, no other caller gets the same nonce until resync.
+        """
+        with self._lock:
+            if ss58_address not in self._nonces:
+                self._nonces[ss58_address] = self.fetch( ss58_address )
+            nonce = self._nonces[ss58_address]
+            self._nonces[ss58_address] = nonce + 1
+            return nonce
+
+    def resync( self, ss58_address: str ):
+        r""" Replaces the local nonce of the account with the nonce on the chain, after a rejected submission.
+        """
+        with self._lock:
+            self._nonces[ss58_address] = self.fetch( ss58_address )
+
+
+class ExtrinsicPipeline:
+    r""" Submits extrinsics without waiting for inclusion, with nonces reserved by a NonceManager.
+    Submissions return a future of the extrinsic receipt, resolved by a background thread which scans each new
+    block for the pending extrinsics, so that submissions are limited by block capacity rather than round trips.
+
+        Args:
+            subtensor (:obj:`bittensor.Subtensor`, `required`):
+                Submits on subtensor.substrate, scans blocks on subtensor.pool and follows subtensor.block_stream.
+            max_retries (:obj:`int`, `optional`):
+                Submissions of an extrinsic, re-signed with the chain nonce after each nonce error.
+            timeout_blocks (:obj:`int`, `optional`):
+                Blocks after submission at which a pending extrinsic fails with a TimeoutError.
+    """
+    def __init__( self, subtensor: 'bittensor.Subtensor', max_retries: int = 3, timeout_blocks: int = 64 ):
+        self.subtensor = subtensor
+        self.max_retries = max_retries
+        self.timeout_blocks = timeout_blocks
+        self.nonces = NonceManager( fetch = self._fetch_nonce )
+        self._pending: Dict[str, Tuple[Future, int]] = {}  # extrinsic hash -> (receipt future, submission block)
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._tracker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __len__( self ) -> int:
+        return len( self._pending )
+
+    @contextmanager
+    def _connection( self ) -> Iterator[SubstrateInterface]:
+        # Submissions are quick without waiting for inclusion, so they share one connection in turn.
+        # A pool of one holds subtensor.substrate, which is then shared with the reads of other threads.
+        with self._submit_lock:
+            if self.subtensor.pool.size == 1:
+                with self.subtensor.pool.checkout() as substrate:
+                    yield substrate
+            else:
+                with self.subtensor.substrate as substrate:
+                    yield substrate
+
+    def _fetch_nonce( self, ss58_address: str ) -> int:
+        with self._connection() as substrate:
+            return substrate.get_account_nonce( ss58_address )
+
+    def submit( self, keypair: Keypair, call_module: str, call_function: str, call_params: Dict[str, Any] ) -> Future:
+        r""" Signs the call with the next nonce of keypair and submits it without waiting for inclusion.
+            Args:
+                keypair (:obj:`Keypair`, `required`):
+                    Signing keypair.
+                call_module (:obj:`str`, `required`):
+                    Pallet of the call.
+                call_function (:obj:`str`, `required`):
+                    Function of the call.
+                call_params (:obj:`Dict[str, Any]`, `required`):
+                    Parameters of the call.
+            Returns:
+                receipt (:obj:`Future`):
+                    Resolved with the ExtrinsicReceipt, events processed, once the extrinsic is in a block.
+            Raises:
+                SubstrateRequestException: If the transaction pool rejects the extrinsic.
+        """
+        block = self.subtensor.get_current_block()
+        future = Future()
+        for attempt in range( self.max_retries ):
+            nonce = self.nonces.reserve( keypair.ss58_address )
+            extrinsic_hash = None
+            try:
+                with self._connection() as substrate:
+                    call = substrate.compose_call( call_module = call_module, call_function = call_function, call_params = call_params )
+                    extrinsic = substrate.create_signed_extrinsic( call = call, keypair = keypair, nonce = nonce )
+                    # Pending before submission, the tracker may scan the including block before submit returns.
+                    extrinsic_hash = '0x' + blake2b( extrinsic.data.data, digest_size = 32 ).hexdigest()
+                    self._add_pending( extrinsic_hash, future, block )
+                    substrate.submit_extrinsic( extrinsic, wait_for_inclusion = False, wait_for_finalization = False )
+                self.subtensor.invalidate_latest_cache()
+                return future
+            except Exception as e:
+                if extrinsic_hash is not None:
+                    with self._lock:
+                        self._pending.pop( extrinsic_hash, None )
+                # A rejected nonce leaves a gap the later extrinsics of the account would wait on.
+                self.nonces.resync( keypair.ss58_address )
+                if attempt + 1 == self.max_retries or not isinstance( e, SubstrateRequestException ) or not _is_nonce_error( e ):
+                    raise
+                logger.debug( 'Extrinsic nonce {} of {} rejected, resynced: {}', nonce, keypair.ss58_address, e )
+
+    def _add_pending( self, extrinsic_hash: str, future: Future, block: int ):
+        with self._lock:
+            self._pending[ extrinsic_hash ] = ( future, block )
+            if self._tracker is None:
+                self._tracker = threading.Thread( target = self._track, name = 'extrinsic_pipeline', daemon = True )
+                self._tracker.start()
+
+    def _track( self ):
+        last = None
+        for block in self.subtensor.block_stream():
+            if self._closed:
+                return
+            for number in range( block if last is None else last + 1, block + 1 ):
+                if len( self._pending ) > 0:
+                    try:
+                        self._scan( number )
+                    except Exception as e:
+                        logger.warning( 'Extrinsic pipeline failed to scan block {}: {}', number, e )
+            last = block
+            self._expire( block )
+
+    def _scan( self, number: int ):
+        with self.subtensor.pool.checkout() as substrate:
+            block_hash = substrate.get_block_hash( number )
+            extrinsics = substrate.rpc_request( 'chain_getBlock', [ block_hash ] )['result']['block']['extrinsics']
+            for index, data in enumerate( extrinsics ):
+                # The extrinsic hash is the blake2 256 hash of the encoded extrinsic.
+                extrinsic_hash = '0x' + blake2b( bytes.fromhex( data[2:] ), digest_size = 32 ).hexdigest()
+                with self._lock:
+                    entry = self._pending.pop( extrinsic_hash, None )
+                if entry is None:
+                    continue
+                try:
+                    receipt = ExtrinsicReceipt( substrate = substrate, extrinsic_hash = extrinsic_hash, block_hash = block_hash, extrinsic_idx = index )
+                    receipt.process_events()
+                    entry[0].set_result( receipt )
+                except Exception as e:
+                    entry[0].set_exception( e )
+
+    def _expire( self, block: int ):
+        with self._lock:
+            expired = [ extrinsic_hash for extrinsic_hash, ( _, submitted ) in self._pending.items() if block - submitted > self.timeout_blocks ]
+            entries = [ self._pending.pop( extrinsic_hash ) for extrinsic_hash in expired ]
+        for future, submitted in entries:
+            future.set_exception( TimeoutError( 'Extrinsic submitted at block {} not included by block {}'.format( submitted, block ) ) )
+
+    def close( self ):
+        r""" Stops tracking inclusion after the next block, pending futures are not resolved.
+        """
+        self._closed = True
@@ -63,6 +63,7 @@ def nominate_extrinsic(
                 )
                 extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey ) # sign with coldkey
                 response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+                subtensor.invalidate_latest_cache()
                 # We only wait here if we expect finalization.
                 if not wait_for_finalization and not wait_for_inclusion:
                     bittensor.__console__.print(":white_heavy_check_mark: [green]Sent[/green]")
@@ -105,6 +106,7 @@ def do_delegation(
         )
         extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
         response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+        subtensor.invalidate_latest_cache()
         # We only wait here if we expect finalization.
         if not wait_for_finalization and not wait_for_inclusion:
             return True
@@ -133,6 +135,7 @@ def do_undelegation(
         )
         extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
         response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+        subtensor.invalidate_latest_cache()
         # We only wait here if we expect finalization.
         if not wait_for_finalization and not wait_for_inclusion:
             return True
@@ -137,6 +137,7 @@ def register_extrinsic (
                         )
                         extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.hotkey )
                         response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion=wait_for_inclusion, wait_for_finalization=wait_for_finalization )
+                        subtensor.invalidate_latest_cache()
                         
                         # We only wait here if we expect finalization.
                         if not wait_for_finalization and not wait_for_inclusion:
@@ -247,6 +248,7 @@ def burned_register_extrinsic (
             )
             extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
             response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion=wait_for_inclusion, wait_for_finalization=wait_for_finalization )
+            subtensor.invalidate_latest_cache()
             
             # We only wait here if we expect finalization.
             if not wait_for_finalization and not wait_for_inclusion:
@@ -131,6 +131,7 @@ def serve_extrinsic (
             )
             extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.hotkey)
             response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+            subtensor.invalidate_latest_cache()
             if wait_for_inclusion or wait_for_finalization:
                 response.process_events()
                 if response.is_success:
@@ -92,6 +92,7 @@ def set_weights_extrinsic(
                 )
                 extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.hotkey )
                 response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+                subtensor.invalidate_latest_cache()
                 # We only wait here if we expect finalization.
                 if not wait_for_finalization and not wait_for_inclusion:
                     bittensor.__console__.print(":white_heavy_check_mark: [green]Sent[/green]")
@@ -22,6 +22,7 @@ from rich.prompt import Confirm
 from typing import List, Dict, Union, Optional
 from bittensor.utils.balance import Balance
 from ..errors import *
+from .utility import batch_all_extrinsic
 
 def add_stake_extrinsic(
         subtensor: 'bittensor.Subtensor', 
@@ -166,6 +167,7 @@ def add_stake_multiple_extrinsic (
         wait_for_inclusion: bool = True,
         wait_for_finalization: bool = False,
         prompt: bool = False,
+        batch: bool = False,
     ) -> bool:
     r""" Adds stake to each hotkey_ss58 in the list, using each amount, from a common coldkey.
     Args:
@@ -183,6 +185,9 @@ def add_stake_multiple_extrinsic (
             or returns false if the extrinsic fails to be finalized within the timeout.
         prompt (bool):
             If true, the call waits for confirmation from the user before proceeding.
+        batch (bool):
+            If true, all stakes are added in a single Utility.batch_all extrinsic, which stakes to every hotkey or to none.
+            Falls back to one extrinsic per hotkey if the batch exceeds the weight limit of an extrinsic.
     Returns:
         success (bool):
             flag is true if extrinsic was finalized or included in the block.
@@ -238,6 +243,22 @@ def add_stake_multiple_extrinsic (
         ## Reduce the amount to stake to each wallet to keep the balance above 1000 rao.
         percent_reduction = 1 - (1000 / total_staking_rao)
         amounts = [Balance.from_tao(amount.tao * percent_reduction) for amount in amounts]
+
+    if batch:
+        batch_response = __do_add_stake_batch(
+            subtensor = subtensor,
+            wallet = wallet,
+            hotkey_ss58s = hotkey_ss58s,
+            amounts = amounts,
+            old_stakes = old_stakes,
+            old_balance = old_balance,
+            wait_for_inclusion = wait_for_inclusion,
+            wait_for_finalization = wait_for_finalization,
+            prompt = prompt,
+        )
+        if batch_response is not None:
+            return batch_response
+        bittensor.__console__.print(":warning: [yellow]Batch exceeds the extrinsic weight limit[/yellow], staking to each hotkey in turn.")
     
     successful_stakes = 0
     for hotkey_ss58, amount, old_stake in zip(hotkey_ss58s, amounts, old_stakes):
@@ -316,6 +337,120 @@ def add_stake_multiple_extrinsic (
 
     return False
 
+def __do_add_stake_batch(
+        subtensor: 'bittensor.Subtensor',
+        wallet: 'bittensor.wallet',
+        hotkey_ss58s: List[str],
+        amounts: List[Optional['bittensor.Balance']],
+        old_stakes: List['bittensor.Balance'],
+        old_balance: 'bittensor.Balance',
+        wait_for_inclusion: bool = True,
+        wait_for_finalization: bool = False,
+        prompt: bool = False,
+    ) -> Optional[bool]:
+    r"""
+    Adds the stakes in a single Utility.batch_all extrinsic. The balance is checked once for all stakes
+    before submission, and the balance and stakes are read once at the block after inclusion.
+    Args:
+        wallet (bittensor.wallet):
+            Bittensor wallet object for the coldkey.
+        hotkey_ss58s (List[str]):
+            List of hotkeys to stake to.
+        amounts (List[Optional[bittensor.Balance]]):
+            List of amounts to stake, None stakes the remaining balance to the hotkey.
+        old_stakes (List[bittensor.Balance]):
+            Stake of the coldkey on each hotkey before staking.
+        old_balance (bittensor.Balance):
+            Balance of the coldkey available to stake.
+        wait_for_inclusion (bool):
+            If set, waits for the extrinsic to enter a block before returning true, 
+            or returns false if the extrinsic fails to enter the block within the timeout.   
+        wait_for_finalization (bool):
+            If set, waits for the extrinsic to be finalized on the chain before returning true,
+            or returns false if the extrinsic fails to be finalized within the timeout.
+        prompt (bool):
+            If true, the call waits for confirmation from the user before proceeding.
+    Returns:
+        success (Optional[bool]):
+            flag is true if extrinsic was finalized or included in the block.
+            If we did not wait for finalization / inclusion, the response is true.
+            None if the batch exceeds the weight limit of an extrinsic and was not submitted.
+    """
+    remaining_balance = old_balance
+    stakes = []
+    for hotkey_ss58, amount, old_stake in zip(hotkey_ss58s, amounts, old_stakes):
+        if amount == None:
+            # Stake it all.
+            staking_balance = bittensor.Balance.from_tao( remaining_balance.tao )
+        else:
+            staking_balance = amount
+
+        # Check enough to stake
+        if staking_balance > remaining_balance:
+            bittensor.__console__.print(":cross_mark: [red]Not enough balance[/red]: [green]{}[/green] to stake: [blue]{}[/blue] from coldkey: [white]{}[/white]".format(remaining_balance, staking_balance, wallet.name))
+            continue
+
+        # Verify that the hotkey is a delegate if we are delegating.
+        hotkey_owner = subtensor.get_hotkey_owner( hotkey_ss58 )
+        if wallet.coldkeypub.ss58_address != hotkey_owner and not subtensor.is_hotkey_delegate( hotkey_ss58 = hotkey_ss58 ):
+            bittensor.__console__.print(":cross_mark: [red]Stake Error: Hotkey: {} is not a delegate.[/red]".format(hotkey_ss58))
+            continue
+
+        stakes.append( (hotkey_ss58, staking_balance, old_stake) )
+        remaining_balance -= staking_balance
+        if amount == None:
+            # If staked all, no need to continue
+            break
+
+    if len(stakes) == 0:
+        return False
+
+    # Ask before moving on.
+    if prompt:
+        if not Confirm.ask("Do you want to stake:\n[bold white]{}[/bold white ]?".format( "\n".join( "  amount: {}\n  hotkey: {}".format( staking_balance, hotkey_ss58 ) for hotkey_ss58, staking_balance, _ in stakes ) ) ):
+            return False
+
+    try:
+        with bittensor.__console__.status(":satellite: Staking to {} hotkeys on: [bold white]{}[/bold white] ...".format(len(stakes), subtensor.network)):
+            staking_response: Optional[bool] = batch_all_extrinsic(
+                subtensor = subtensor,
+                wallet = wallet,
+                calls = [
+                    {
+                        'call_module': 'SubtensorModule',
+                        'call_function': 'add_stake',
+                        'call_params': {
+                            'hotkey': hotkey_ss58,
+                            'amount_staked': staking_balance.rao
+                        }
+                    } for hotkey_ss58, staking_balance, _ in stakes
+                ],
+                wait_for_inclusion = wait_for_inclusion,
+                wait_for_finalization = wait_for_finalization,
+                error = StakeError,
+            )
+    except StakeError as e:
+        bittensor.__console__.print(":cross_mark: [red]Stake Error: {}[/red]".format(e))
+        return False
+
+    if staking_response is None:
+        return None
+
+    # We only wait here if we expect finalization.
+    if not wait_for_finalization and not wait_for_inclusion:
+        bittensor.__console__.print(":white_heavy_check_mark: [green]Sent[/green]")
+        return True
+
+    bittensor.__console__.print(":white_heavy_check_mark: [green]Finalized[/green]")
+    with bittensor.__console__.status(":satellite: Checking Balance on: [white]{}[/white] ...".format(subtensor.network)):
+        block = subtensor.get_current_block()
+        new_balance = subtensor.get_balance( wallet.coldkeypub.ss58_address, block = block )
+        for hotkey_ss58, _, old_stake in stakes:
+            new_stake = subtensor.get_stake_for_coldkey_and_hotkey( coldkey_ss58 = wallet.coldkeypub.ss58_address, hotkey_ss58 = hotkey_ss58, block = block )
+            bittensor.__console__.print("Stake ({}): [blue]{}[/blue] :arrow_right: [green]{}[/green]".format( hotkey_ss58, old_stake, new_stake ))
+    bittensor.__console__.print("Balance: [blue]{}[/blue] :arrow_right: [green]{}[/green]".format( old_balance, new_balance ))
+    return True
+
 def __do_add_stake_single(
         subtensor: 'bittensor.Subtensor', 
         wallet: 'bittensor.wallet',
@@ -377,6 +512,7 @@ def __do_add_stake_single(
         )
         extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
         response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+        subtensor.invalidate_latest_cache()
         # We only wait here if we expect finalization.
         if not wait_for_finalization and not wait_for_inclusion:
             return True
@@ -22,6 +22,7 @@ from rich.prompt import Confirm
 from typing import List, Dict, Union, Optional
 from bittensor.utils.balance import Balance
 from ..errors import * 
+from .utility import batch_all_extrinsic
 
 def __do_remove_stake_single(
     subtensor: 'bittensor.Subtensor',
@@ -73,6 +74,7 @@ def __do_remove_stake_single(
         )
         extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
         response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+        subtensor.invalidate_latest_cache()
         # We only wait here if we expect finalization.
         if not wait_for_finalization and not wait_for_inclusion:
             return True
@@ -83,6 +85,105 @@ def __do_remove_stake_single(
         else:
             raise StakeError(response.error_message)
 
+def __do_remove_stake_batch(
+    subtensor: 'bittensor.Subtensor',
+    wallet: 'bittensor.wallet',
+    hotkey_ss58s: List[str],
+    amounts: List[Optional['bittensor.Balance']],
+    old_stakes: List['bittensor.Balance'],
+    old_balance: 'bittensor.Balance',
+    wait_for_inclusion: bool = True,
+    wait_for_finalization: bool = False,
+    prompt: bool = False,
+) -> Optional[bool]:
+    r"""
+    Removes the stakes in a single Utility.batch_all extrinsic. The stakes are checked once before submission,
+    and the balance and stakes are read once at the block after inclusion.
+    Args:
+        wallet (bittensor.wallet):
+            The wallet with the coldkey to unstake to.
+        hotkey_ss58s (List[str]):
+            List of hotkeys to unstake from.
+        amounts (List[Optional[bittensor.Balance]]):
+            List of amounts to unstake, None unstakes all from the hotkey.
+        old_stakes (List[bittensor.Balance]):
+            Stake of the coldkey on each hotkey before unstaking.
+        old_balance (bittensor.Balance):
+            Balance of the coldkey before unstaking.
+        wait_for_inclusion (bool):
+            If set, waits for the extrinsic to enter a block before returning true, 
+            or returns false if the extrinsic fails to enter the block within the timeout.   
+        wait_for_finalization (bool):
+            If set, waits for the extrinsic to be finalized on the chain before returning true,
+            or returns false if the extrinsic fails to be finalized within the timeout.
+        prompt (bool):
+            If true, the call waits for confirmation from the user before proceeding.
+    Returns:
+        success (Optional[bool]):
+            flag is true if extrinsic was finalized or included in the block.
+            If we did not wait for finalization / inclusion, the response is true.
+            None if the batch exceeds the weight limit of an extrinsic and was not submitted.
+    """
+    unstakes = []
+    for hotkey_ss58, amount, old_stake in zip(hotkey_ss58s, amounts, old_stakes):
+        # Unstake it all if no amount is given.
+        unstaking_balance = old_stake if amount == None else amount
+
+        # Check enough to unstake.
+        if unstaking_balance > old_stake:
+            bittensor.__console__.print(":cross_mark: [red]Not enough stake[/red]: [green]{}[/green] to unstake: [blue]{}[/blue] from hotkey: [white]{}[/white]".format(old_stake, unstaking_balance, hotkey_ss58))
+            continue
+        unstakes.append( (hotkey_ss58, unstaking_balance, old_stake) )
+
+    if len(unstakes) == 0:
+        return False
+
+    # Ask before moving on.
+    if prompt:
+        if not Confirm.ask("Do you want to unstake:\n[bold white]{}[/bold white ]?".format( "\n".join( "  amount: {}\n  hotkey: {}".format( unstaking_balance, hotkey_ss58 ) for hotkey_ss58, unstaking_balance, _ in unstakes ) ) ):
+            return False
+
+    try:
+        with bittensor.__console__.status(":satellite: Unstaking from {} hotkeys on: [white]{}[/white] ...".format(len(unstakes), subtensor.network)):
+            staking_response: Optional[bool] = batch_all_extrinsic(
+                subtensor = subtensor,
+                wallet = wallet,
+                calls = [
+                    {
+                        'call_module': 'SubtensorModule',
+                        'call_function': 'remove_stake',
+                        'call_params': {
+                            'hotkey': hotkey_ss58,
+                            'amount_unstaked': unstaking_balance.rao
+                        }
+                    } for hotkey_ss58, unstaking_balance, _ in unstakes
+                ],
+                wait_for_inclusion = wait_for_inclusion,
+                wait_for_finalization = wait_for_finalization,
+                error = StakeError,
+            )
+    except StakeError as e:
+        bittensor.__console__.print(":cross_mark: [red]Stake Error: {}[/red]".format(e))
+        return False
+
+    if staking_response is None:
+        return None
+
+    # We only wait here if we expect finalization.
+    if not wait_for_finalization and not wait_for_inclusion:
+        bittensor.__console__.print(":white_heavy_check_mark: [green]Sent[/green]")
+        return True
+
+    bittensor.__console__.print(":white_heavy_check_mark: [green]Finalized[/green]")
+    with bittensor.__console__.status(":satellite: Checking Balance on: [white]{}[/white] ...".format(subtensor.network)):
+        block = subtensor.get_current_block()
+        new_balance = subtensor.get_balance( wallet.coldkeypub.ss58_address, block = block )
+        for hotkey_ss58, _, old_stake in unstakes:
+            new_stake = subtensor.get_stake_for_coldkey_and_hotkey( coldkey_ss58 = wallet.coldkeypub.ss58_address, hotkey_ss58 = hotkey_ss58, block = block )
+            bittensor.__console__.print("Stake ({}): [blue]{}[/blue] :arrow_right: [green]{}[/green]".format( hotkey_ss58, old_stake, new_stake ))
+    bittensor.__console__.print("Balance: [blue]{}[/blue] :arrow_right: [green]{}[/green]".format( old_balance, new_balance ))
+    return True
+
 def unstake_extrinsic (
         subtensor: 'bittensor.Subtensor',
         wallet: 'bittensor.wallet',
@@ -188,6 +289,7 @@ def unstake_multiple_extrinsic (
         wait_for_inclusion: bool = True, 
         wait_for_finalization: bool = False,
         prompt: bool = False,
+        batch: bool = False,
     ) -> bool:
     r""" Removes stake from each hotkey_ss58 in the list, using each amount, to a common coldkey.
     Args:
@@ -205,6 +307,9 @@ def unstake_multiple_extrinsic (
             or returns false if the extrinsic fails to be finalized within the timeout.
         prompt (bool):
             If true, the call waits for confirmation from the user before proceeding.
+        batch (bool):
+            If true, all stakes are removed in a single Utility.batch_all extrinsic, which unstakes from every hotkey or from none.
+            Falls back to one extrinsic per hotkey if the batch exceeds the weight limit of an extrinsic.
     Returns:
         success (bool):
             flag is true if extrinsic was finalized or included in the block.
@@ -244,6 +349,22 @@ def unstake_multiple_extrinsic (
             old_stake = subtensor.get_stake_for_coldkey_and_hotkey( coldkey_ss58 = wallet.coldkeypub.ss58_address, hotkey_ss58 = hotkey_ss58 ) # Get stake on hotkey.
             old_stakes.append(old_stake) # None if not registered.
 
+    if batch:
+        batch_response = __do_remove_stake_batch(
+            subtensor = subtensor,
+            wallet = wallet,
+            hotkey_ss58s = hotkey_ss58s,
+            amounts = amounts,
+            old_stakes = old_stakes,
+            old_balance = old_balance,
+            wait_for_inclusion = wait_for_inclusion,
+            wait_for_finalization = wait_for_finalization,
+            prompt = prompt,
+        )
+        if batch_response is not None:
+            return batch_response
+        bittensor.__console__.print(":warning: [yellow]Batch exceeds the extrinsic weight limit[/yellow], unstaking from each hotkey in turn.")
+
     successful_unstakes = 0
     for hotkey_ss58, amount, old_stake in zip(hotkey_ss58s, amounts, old_stakes):
         # Covert to bittensor.Balance
@@ -0,0 +1,89 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+
+import bittensor
+
+from typing import Any, Dict, List, Optional, Union
+from ..errors import *
+
+def _ref_time( weight: Union[int, Dict[str, int], None] ) -> Optional[int]:
+    # Runtimes with proof size weights report a weight as {'ref_time', 'proof_size'}.
+    if isinstance( weight, dict ):
+        return weight.get( 'ref_time' )
+    return weight
+
+def batch_all_extrinsic(
+        subtensor: 'bittensor.Subtensor',
+        wallet: 'bittensor.wallet',
+        calls: List[Dict[str, Any]],
+        wait_for_inclusion: bool = True,
+        wait_for_finalization: bool = False,
+        error: type = ChainTransactionError,
+    ) -> Optional[bool]:
+    r""" Submits the calls as a single Utility.batch_all extrinsic signed by the coldkey,
+    the calls are applied in order and all of them are reverted if any fails.
+    Args:
+        wallet (bittensor.wallet):
+            Bittensor wallet object for the coldkey.
+        calls (List[Dict[str, Any]]):
+            The call_module, call_function and call_params of each call, as passed to compose_call.
+        wait_for_inclusion (bool):
+            If set, waits for the extrinsic to enter a block before returning true, 
+            or returns false if the extrinsic fails to enter the block within the timeout.   
+        wait_for_finalization (bool):
+            If set, waits for the extrinsic to be finalized on the chain before returning true,
+            or returns false if the extrinsic fails to be finalized within the timeout.
+        error (type):
+            Error raised when the extrinsic fails.
+    Returns:
+        success (Optional[bool]):
+            flag is true if extrinsic was finalized or included in the block.
+            If we did not wait for finalization / inclusion, the response is true.
+            None if the batch exceeds the weight limit of an extrinsic, the batch is then not submitted.
+    Raises:
+        error:
+            If the extrinsic fails to be finalized or included in the block.
+    """
+    # Decrypt keys,
+    wallet.coldkey
+
+    with subtensor.substrate as substrate:
+        call = substrate.compose_call(
+            call_module = 'Utility',
+            call_function = 'batch_all',
+            call_params = {
+                'calls': [ substrate.compose_call( **batched_call ) for batched_call in calls ]
+            }
+        )
+
+        weight = _ref_time( substrate.get_payment_info( call = call, keypair = wallet.coldkey )['weight'] )
+        max_extrinsic = _ref_time( substrate.get_constant( 'System', 'BlockWeights' ).value['per_class']['normal']['max_extrinsic'] )
+        if max_extrinsic is not None and weight > max_extrinsic:
+            return None
+
+        extrinsic = substrate.create_signed_extrinsic( call = call, keypair = wallet.coldkey )
+        response = substrate.submit_extrinsic( extrinsic, wait_for_inclusion = wait_for_inclusion, wait_for_finalization = wait_for_finalization )
+        subtensor.invalidate_latest_cache()
+        # We only wait here if we expect finalization.
+        if not wait_for_finalization and not wait_for_inclusion:
+            return True
+
+        response.process_events()
+        if response.is_success:
+            return True
+        else:
+            raise error(response.error_message)
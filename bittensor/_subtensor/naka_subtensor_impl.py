@@ -1548,6 +1548,52 @@ class Subtensor:
             return Balance(1000)
         return Balance( result.value['data']['free'] )
 
+    def get_subnet_hyperparameters( self, netuid: int = None, block: Optional[int] = None ) -> 'bittensor.SubnetHyperparameters':
+        r""" Returns the validator hyper parameters, read at a single block in one batched storage query.
+        Args:
+            netuid (int, default=None):
+                Unused, the chain has a single network.
+            block (int, default=None):
+                Block to read the hyper parameters at, the chain head if None.
+        Returns:
+            hyperparameters (bittensor.SubnetHyperparameters):
+                Validator hyper parameters.
+        """
+        U32_MAX = 4294967295
+        U64MAX = 18446744073709551615
+        # field -> (storage function, value normalization)
+        hyperparameters = {
+            'validator_batch_size': ('ValidatorBatchSize', int),
+            'validator_sequence_length': ('ValidatorSequenceLength', int),
+            'validator_prune_len': ('ValidatorPruneLen', int),
+            'validator_logits_divergence': ('ValidatorLogitsDivergence', lambda value: value / U64MAX),
+            'validator_epochs_per_reset': ('ValidatorEpochsPerReset', int),
+            'validator_epoch_length': ('ValidatorEpochLen', int),
+            'validator_exclude_quantile': ('ValidatorExcludeQuantile', lambda value: value / 100),
+            'min_allowed_weights': ('MinAllowedWeights', int),
+            'max_weight_limit': ('MaxWeightLimit', lambda value: value / U32_MAX),
+            'scaling_law_power': ('ScalingLawPower', lambda value: value / 100),
+            'synergy_scaling_law_power': ('SynergyScalingLawPower', lambda value: value / 100),
+            'max_n': ('MaxAllowedUids', int),
+        }
+
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.substrate as substrate:
+                block_hash = substrate.get_chain_head() if block == None else substrate.get_block_hash(block)
+                block_number = substrate.get_block_number(block_hash) if block == None else block
+                storage_keys = [
+                    substrate.create_storage_key( 'SubtensorModule', name ) for name, _ in hyperparameters.values()
+                ]
+                return block_number, substrate.query_multi( storage_keys, block_hash = block_hash )
+
+        block_number, results = make_substrate_call_with_retry()
+        return bittensor.SubnetHyperparameters(
+            netuid = netuid,
+            block = block_number,
+            **{ field: normalize( value.value ) for (field, (_, normalize)), (_, value) in zip( hyperparameters.items(), results ) }
+        )
+
     def get_current_block(self) -> int:
         r""" Returns the current block number on the chain.
         Returns:
@@ -0,0 +1,124 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Block-aware response cache for Subtensor read queries.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Union
+
+import bittensor
+
+
+class QueryCache:
+    r""" Least recently used cache of query responses keyed by (method, params, block).
+    Responses at an explicit block never expire, the chain state of a block does not change.
+    Responses at the latest block are dropped when the chain head advances, see advance, and when the chain
+    state is changed by an extrinsic, see invalidate_latest. Without head updates they expire after one block time.
+
+        Args:
+            max_size (:obj:`int`, `optional`):
+                Maximum number of cached responses.
+            ttl (:obj:`float`, `optional`):
+                Seconds after which responses at the latest block expire, defaults to one block time.
+    """
+    def __init__( self, max_size: int = 4096, ttl: Optional[float] = None ):
+        self.max_size = max_size
+        self.ttl = ttl if ttl is not None else bittensor.__blocktime__
+        self.hits = 0
+        self.misses = 0
+        self.head: Optional[int] = None  # chain head of the responses at the latest block, if known
+        self._entries = OrderedDict()  # key -> (expiry time or None, response)
+        self._latest = set()  # keys of the responses at the latest block
+        self._lock = threading.Lock()
+
+    def __len__( self ) -> int:
+        return len( self._entries )
+
+    def __str__( self ) -> str:
+        return 'QueryCache(size={}, hits={}, misses={})'.format( len( self ), self.hits, self.misses )
+
+    def __repr__( self ) -> str:
+        return self.__str__()
+
+    @staticmethod
+    def key( method: str, params: Any, block: Optional[Union[int, str]] ) -> Hashable:
+        # params hold lists, e.g. encoded account ids, so they are keyed by their repr.
+        return ( method, repr( params ), block )
+
+    def get( self, method: str, params: Any, block: Optional[Union[int, str]], fetch: Callable[[], Any] ) -> Any:
+        r""" Returns the cached response of the query, or else the response of fetch, which is then cached.
+            Args:
+                method (:obj:`str`, `required`):
+                    Name of the queried storage function or runtime method.
+                params (:obj:`Any`, `required`):
+                    Parameters of the query.
+                block (:obj:`Optional[Union[int, str]]`, `required`):
+                    Block number or hash of the query, None for the latest block.
+                fetch (:obj:`Callable[[], Any]`, `required`):
+                    Queries the chain on a cache miss.
+        """
+        key = QueryCache.key( method, params, block )
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get( key )
+            if entry is not None and ( entry[0] is None or entry[0] > now ):
+                self._entries.move_to_end( key )
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Fetched without the lock, concurrent misses of the same key both query the chain.
+        response = fetch()
+        with self._lock:
+            self._entries[key] = ( None if block is not None else now + self.ttl, response )
+            self._entries.move_to_end( key )
+            if block is None:
+                self._latest.add( key )
+            while len( self._entries ) > self.max_size:
+                self._latest.discard( self._entries.popitem( last = False )[0] )
+        return response
+
+    def advance( self, head: int ):
+        r""" Drops the responses at the latest block if the chain head advanced past the head they were read at.
+            Args:
+                head (:obj:`int`, `required`):
+                    Current chain head.
+        """
+        with self._lock:
+            if self.head is not None and head > self.head:
+                self._drop_latest()
+            if self.head is None or head > self.head:
+                self.head = head
+
+    def invalidate_latest( self ):
+        r""" Drops the responses at the latest block, e.g. after an extrinsic changed the chain state.
+        """
+        with self._lock:
+            self._drop_latest()
+
+    def _drop_latest( self ):
+        for key in self._latest:
+            self._entries.pop( key, None )
+        self._latest.clear()
+
+    def clear( self ):
+        r""" Removes all cached responses, the hit and miss counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
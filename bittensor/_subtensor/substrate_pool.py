@@ -0,0 +1,80 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Pool of websocket clients for concurrent read queries.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from substrateinterface import SubstrateInterface
+
+
+class SubstratePool:
+    r""" Pool of up to size websocket clients, each used by one thread at a time.
+    Checkouts take the idle connections round robin, a new connection is created only when all are busy,
+    and once the pool is full a checkout waits for the next connection in turn.
+
+        Args:
+            connect (:obj:`Callable[[], SubstrateInterface]`, `required`):
+                Creates a websocket client to the chain endpoint.
+            size (:obj:`int`, `required`):
+                Maximum number of connections.
+            substrate (:obj:`Optional[SubstrateInterface]`, `optional`):
+                Existing connection to include in the pool.
+    """
+    def __init__( self, connect: Callable[[], SubstrateInterface], size: int, substrate: Optional[SubstrateInterface] = None ):
+        if size < 1:
+            raise ValueError( 'Substrate pool size must be at least 1, got {}'.format( size ) )
+        self.connect = connect
+        self.size = size
+        self._connections: List[SubstrateInterface] = [ substrate ] if substrate is not None else []
+        self._busy: List[threading.Lock] = [ threading.Lock() for _ in self._connections ]
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def __len__( self ) -> int:
+        return len( self._connections )
+
+    def _acquire( self ) -> int:
+        with self._lock:
+            n = len( self._connections )
+            for offset in range( n ):
+                index = ( self._cursor + offset ) % n
+                if self._busy[index].acquire( blocking = False ):
+                    self._cursor = index + 1
+                    return index
+            if n < self.size:
+                self._connections.append( self.connect() )
+                self._busy.append( threading.Lock() )
+                self._busy[n].acquire()
+                self._cursor = n + 1
+                return n
+            index = self._cursor % n
+            self._cursor = index + 1
+        self._busy[index].acquire()
+        return index
+
+    @contextmanager
+    def checkout( self ) -> Iterator[SubstrateInterface]:
+        r""" Yields a connection of the pool, for the calling thread only until the context exits.
+        """
+        index = self._acquire()
+        try:
+            with self._connections[index] as substrate:
+                yield substrate
+        finally:
+            self._busy[index].release()
@@ -20,14 +20,20 @@
 import torch
 import bittensor
 import scalecodec
+import dataclasses
+from concurrent.futures import Future, ThreadPoolExecutor
 from retry import retry
-from typing import List, Dict, Union, Optional, Tuple
+from typing import Any, Iterator, List, Dict, Union, Optional, Tuple
 from substrateinterface import SubstrateInterface
 from bittensor.utils.balance import Balance
 from bittensor.utils import U16_NORMALIZED_FLOAT, U64_MAX, RAOPERTAO, U16_MAX
 
 # Local imports.
-from .chain_data import NeuronInfo, AxonInfo, DelegateInfo, PrometheusInfo, SubnetInfo, NeuronInfoLite
+from .chain_data import NeuronInfo, AxonInfo, DelegateInfo, PrometheusInfo, SubnetInfo, NeuronInfoLite, SubnetHyperparameters
+from .query_cache import QueryCache
+from .block_subscription import BlockSubscription
+from .extrinsic_pipeline import ExtrinsicPipeline
+from .substrate_pool import SubstratePool
 from .errors import *
 from .extrinsics.staking import add_stake_extrinsic, add_stake_multiple_extrinsic
 from .extrinsics.unstaking import unstake_extrinsic, unstake_multiple_extrinsic
@@ -42,6 +48,23 @@ from .extrinsics.delegation import delegate_extrinsic, nominate_extrinsic,undele
 from loguru import logger
 logger = logger.opt(colors=True)
 
+class QueryMapRecords:
+    r""" Records of a map storage query, read in full, with the records and iteration of a substrate QueryMapResult.
+    Records are an immutable tuple and every iteration has its own cursor, so that a response in the query cache
+    can be shared by concurrent callers.
+    """
+    def __init__( self, records: List[Tuple[object, object]] ):
+        self.records = tuple( records )
+
+    def __iter__( self ) -> Iterator[Tuple[object, object]]:
+        return iter( self.records )
+
+    def __len__( self ) -> int:
+        return len( self.records )
+
+# Fraction of the subnet above which an incremental sync downloads all neurons in one request instead.
+INCREMENTAL_SYNC_MAX_REFETCH = 0.25
+
 class Subtensor:
     """
     Handles interactions with the subtensor chain.
@@ -51,6 +74,8 @@ class Subtensor:
         substrate: 'SubstrateInterface',
         network: str,
         chain_endpoint: str,
+        cache: Optional[QueryCache] = None,
+        pool_size: int = 1,
     ):
         r""" Initializes a subtensor chain interface.
             Args:
@@ -65,10 +90,22 @@ class Subtensor:
                     an entry point node from that network.
                 chain_endpoint (default=None, type=str)
                     The subtensor endpoint flag. If set, overrides the network argument.
+                cache (:obj:`QueryCache`, `optional`):
+                    Cache of read query responses, queries are not cached if None.
+                pool_size (:obj:`int`, `optional`):
+                    Number of connections for concurrent read queries. With more than one, reads use a pool of
+                    their own connections and substrate is dedicated to extrinsics, else reads share substrate.
         """
         self.network = network
         self.chain_endpoint = chain_endpoint
         self.substrate = substrate
+        self.cache = cache
+        self.pool = SubstratePool( connect = self._connect, size = pool_size, substrate = substrate if pool_size == 1 else None )
+        # Second connection for sub-queries run concurrently with queries on a pool of one, one thread at a time.
+        self._subquery_pool = SubstratePool( connect = self._connect, size = 1 )
+        self._block_subscription = None
+        # Created here, so that concurrent first submissions share one pipeline and its nonces.
+        self._extrinsic_pipeline = ExtrinsicPipeline( subtensor = self )
 
     def __str__(self) -> str:
         if self.network == self.chain_endpoint:
@@ -310,9 +347,10 @@ class Subtensor:
         wait_for_inclusion: bool = True,
         wait_for_finalization: bool = False,
         prompt: bool = False,
+        batch: bool = False,
     ) -> bool:
         """ Adds stake to each hotkey_ss58 in the list, using each amount, from a common coldkey."""
-        return add_stake_multiple_extrinsic( self, wallet, hotkey_ss58s, amounts, wait_for_inclusion, wait_for_finalization, prompt)
+        return add_stake_multiple_extrinsic( self, wallet, hotkey_ss58s, amounts, wait_for_inclusion, wait_for_finalization, prompt, batch )
 
     ###################
     #### Unstaking ####
@@ -325,9 +363,10 @@ class Subtensor:
         wait_for_inclusion: bool = True, 
         wait_for_finalization: bool = False,
         prompt: bool = False,
+        batch: bool = False,
     ) -> bool:
         """ Removes stake from each hotkey_ss58 in the list, using each amount, to a common coldkey. """
-        return unstake_multiple_extrinsic( self, wallet, hotkey_ss58s, amounts, wait_for_inclusion, wait_for_finalization, prompt)
+        return unstake_multiple_extrinsic( self, wallet, hotkey_ss58s, amounts, wait_for_inclusion, wait_for_finalization, prompt, batch )
 
    
 
@@ -344,6 +383,35 @@ class Subtensor:
         return unstake_extrinsic( self, wallet, hotkey_ss58, amount, wait_for_inclusion, wait_for_finalization, prompt )
 
 
+    ##############################
+    #### Pipelined Extrinsics ####
+    ##############################
+    def submit_pipelined(
+        self,
+        keypair: 'bittensor.Keypair',
+        call_module: str,
+        call_function: str,
+        call_params: Dict[str, Any],
+    ) -> Future:
+        r""" Submits the call signed by keypair without waiting for inclusion, with a locally reserved nonce,
+        so that many independent extrinsics of an account go out within a block. The nonce is resynced from the
+        chain and the extrinsic re-signed when the transaction pool rejects its nonce.
+        Args:
+            keypair (bittensor.Keypair):
+                Signing keypair, e.g. wallet.hotkey or wallet.coldkey.
+            call_module (str):
+                Pallet of the call, e.g. 'SubtensorModule'.
+            call_function (str):
+                Function of the call, e.g. 'set_weights'.
+            call_params (Dict[str, Any]):
+                Parameters of the call.
+        Returns:
+            receipt (Future):
+                Resolved with the ExtrinsicReceipt, events processed, once the extrinsic is included in a block.
+                Fails with a TimeoutError if it is not included within 64 blocks.
+        """
+        return self._extrinsic_pipeline.submit( keypair, call_module, call_function, call_params )
+
     ########################
     #### Standard Calls ####
     ########################
@@ -352,28 +420,99 @@ class Subtensor:
     def query_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [] ) -> Optional[object]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 return substrate.query(
                     module='SubtensorModule',
                     storage_function = name,
                     params = params,
                     block_hash = None if block == None else substrate.get_block_hash(block)
                 )
-        return make_substrate_call_with_retry()
+        return self._cached( name, params, block, make_substrate_call_with_retry )
 
     """ Queries subtensor map storage with params and block. """
-    def query_map_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [] ) -> Optional[object]:
+    def query_map_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [] ) -> QueryMapRecords:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query_map(
+            with self.pool.checkout() as substrate:
+                result = substrate.query_map(
                     module='SubtensorModule',
                     storage_function = name,
                     params = params,
                     block_hash = None if block == None else substrate.get_block_hash(block)
                 )
-        return make_substrate_call_with_retry()
-      
+                # The result reads its pages lazily on substrate, all pages are read before the connection is returned.
+                return QueryMapRecords( list( result ) )
+        return self._cached( 'query_map:' + name, params, block, make_substrate_call_with_retry )
+
+    def iter_query_map( self, module: str, name: str, block: Optional[int] = None, params: Optional[List[object]] = [], page_size: int = 100, start_key: Optional[str] = None ) -> Iterator[Tuple[object, object]]:
+        r""" Yields the (key, value) records of a map storage function page by page, as the pages arrive.
+        Only one page of records is held at a time, each page is read on a connection of the pool that is
+        returned before the page is yielded. All pages are read at the same block, the chain head at the first
+        page if block is None. Responses are not cached.
+            Args:
+                module (:obj:`str`, `required`):
+                    Pallet of the storage function, e.g. 'System'.
+                name (:obj:`str`, `required`):
+                    Name of the map storage function, e.g. 'Account'.
+                block (:obj:`Optional[int]`, `optional`):
+                    Block of the query, defaults to the chain head.
+                params (:obj:`Optional[List[object]]`, `optional`):
+                    Leading keys of a double map, only the records under this key prefix are read.
+                page_size (:obj:`int`, `optional`):
+                    Number of records per page.
+                start_key (:obj:`Optional[str]`, `optional`):
+                    Storage key to resume after, e.g. the last key of an interrupted iteration.
+        """
+        if page_size < 1:
+            raise ValueError( 'Page size must be at least 1, got {}'.format( page_size ) )
+
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry( block_hash: Optional[str], start_key: Optional[str] ):
+            with self.pool.checkout() as substrate:
+                if block_hash == None:
+                    block_hash = substrate.get_chain_head() if block == None else substrate.get_block_hash( block )
+                return block_hash, substrate.query_map(
+                    module = module,
+                    storage_function = name,
+                    params = params,
+                    block_hash = block_hash,
+                    max_results = page_size,
+                    start_key = start_key,
+                    page_size = page_size
+                )
+
+        block_hash = None
+        while True:
+            block_hash, page = make_substrate_call_with_retry( block_hash, start_key )
+            yield from page.records
+            if len( page.records ) < page_size:
+                return
+            start_key = page.last_key
+
+    def iter_query_map_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [], page_size: int = 100 ) -> Iterator[Tuple[object, object]]:
+        r""" Yields the records of a subtensor map storage function page by page, see iter_query_map.
+        """
+        return self.iter_query_map( 'SubtensorModule', name, block, params, page_size )
+
+    def _cached( self, method: str, params: List[object], block: Optional[Union[int, str]], fetch ) -> object:
+        r""" Returns the response of fetch for the query, through self.cache if caching is enabled.
+        Responses at the latest block are dropped when the subscribed chain head advances.
+        """
+        if self.cache is None:
+            return fetch()
+        if block is None and self._block_subscription is not None:
+            head = self._block_subscription.head()
+            if head is not None:
+                self.cache.advance( head )
+        return self.cache.get( method, params, block, fetch )
+
+    def invalidate_latest_cache( self ):
+        r""" Drops the cached responses at the latest block, called after submitting an extrinsic so that
+        later reads see the state it changed.
+        """
+        if self.cache is not None:
+            self.cache.invalidate_latest()
+
     #####################################
     #### Hyper parameter calls. ####
     #####################################
@@ -483,6 +622,45 @@ class Subtensor:
         if not self.subnet_exists( netuid ): return None
         return self.query_subtensor('Tempo', block, [netuid] ).value
 
+    """ Returns the validator hyper parameters of a subnet, read at a single block in one batched storage query """
+    def get_subnet_hyperparameters( self, netuid: int, block: Optional[int] = None ) -> Optional[SubnetHyperparameters]:
+        # field -> (storage function, value normalization)
+        hyperparameters = {
+            'validator_batch_size': ('ValidatorBatchSize', int),
+            'validator_sequence_length': ('ValidatorSequenceLength', int),
+            'validator_prune_len': ('ValidatorPruneLen', int),
+            'validator_logits_divergence': ('ValidatorLogitsDivergence', U16_NORMALIZED_FLOAT),
+            'validator_epochs_per_reset': ('ValidatorEpochsPerReset', int),
+            'validator_epoch_length': ('ValidatorEpochLen', int),
+            'validator_exclude_quantile': ('ValidatorExcludeQuantile', U16_NORMALIZED_FLOAT),
+            'min_allowed_weights': ('MinAllowedWeights', int),
+            'max_weight_limit': ('MaxWeightsLimit', U16_NORMALIZED_FLOAT),
+            'scaling_law_power': ('ScalingLawPower', lambda value: value / 100.),
+            'synergy_scaling_law_power': ('SynergyScalingLawPower', lambda value: value / 100.),
+            'max_n': ('MaxAllowedUids', int),
+        }
+        storage_functions = ['NetworksAdded'] + [name for name, _ in hyperparameters.values()]
+
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.pool.checkout() as substrate:
+                # Pin the block, so that all values are read from the same chain state.
+                block_hash = substrate.get_chain_head() if block == None else substrate.get_block_hash(block)
+                block_number = substrate.get_block_number(block_hash) if block == None else block
+                storage_keys = [
+                    substrate.create_storage_key( 'SubtensorModule', name, [netuid] ) for name in storage_functions
+                ]
+                return block_number, substrate.query_multi( storage_keys, block_hash = block_hash )
+
+        block_number, results = make_substrate_call_with_retry()
+        values = [ value.value for _, value in results ]
+        if not values[0]: return None  # subnet does not exist
+        return SubnetHyperparameters(
+            netuid = netuid,
+            block = block_number,
+            **{ field: normalize( value ) for (field, (_, normalize)), value in zip( hyperparameters.items(), values[1:] ) }
+        )
+
     ##########################
     #### Account fucntions ###
     ##########################
@@ -503,6 +681,11 @@ class Subtensor:
     def get_stake( self, hotkey_ss58: str, block: Optional[int] = None ) -> List[Tuple[str,'bittensor.Balance']]:
         return [ (r[0].value, bittensor.Balance.from_rao( r[1].value ))  for r in self.query_map_subtensor( 'Stake', block, [hotkey_ss58] ) ]
 
+    """ Yields the stake tuples (coldkey, balance) of a hotkey page by page, see iter_query_map. """
+    def iter_stake( self, hotkey_ss58: str, block: Optional[int] = None, page_size: int = 100 ) -> Iterator[Tuple[str,'bittensor.Balance']]:
+        for r in self.iter_query_map_subtensor( 'Stake', block, [hotkey_ss58], page_size ):
+            yield r[0].value, bittensor.Balance.from_rao( r[1].value )
+
     """ Returns true if the hotkey is known by the chain and there are accounts. """
     def does_hotkey_exist( self, hotkey_ss58: str, block: Optional[int] = None ) -> bool:
         return (self.query_subtensor( 'Owner', block, [hotkey_ss58 ] ).value != "5C4hrfjw9DjXZTzV3MwzrrAr9P1MJhSrvWGWqi1eSuyUpnhM")
@@ -617,7 +800,7 @@ class Subtensor:
     def get_all_subnets_info( self, block: Optional[int] = None ) -> List[SubnetInfo]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = []
                 if block_hash:
@@ -627,7 +810,7 @@ class Subtensor:
                     params=params
                 )
         
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'subnetInfo_getSubnetsInfo', [], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -638,7 +821,7 @@ class Subtensor:
     def get_subnet_info( self, netuid: int, block: Optional[int] = None ) -> Optional[SubnetInfo]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [netuid]
                 if block_hash:
@@ -648,7 +831,7 @@ class Subtensor:
                     params=params
                 )
         
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'subnetInfo_getSubnetInfo', [netuid], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -675,7 +858,7 @@ class Subtensor:
     def get_delegate_by_hotkey( self, hotkey_ss58: str, block: Optional[int] = None ) -> Optional[DelegateInfo]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry(encoded_hotkey: List[int]):
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [encoded_hotkey]
                 if block_hash:
@@ -687,7 +870,7 @@ class Subtensor:
 
         hotkey_bytes: bytes = bittensor.utils.ss58_address_to_bytes( hotkey_ss58 )
         encoded_hotkey: List[int] = [ int( byte ) for byte in hotkey_bytes ]
-        json_body = make_substrate_call_with_retry(encoded_hotkey)
+        json_body = self._cached( 'delegateInfo_getDelegate', [encoded_hotkey], block, lambda: make_substrate_call_with_retry(encoded_hotkey) )
         result = json_body['result']
 
         if result in (None, []):
@@ -698,7 +881,7 @@ class Subtensor:
     def get_delegates( self, block: Optional[int] = None ) -> List[DelegateInfo]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = []
                 if block_hash:
@@ -707,7 +890,7 @@ class Subtensor:
                     method="delegateInfo_getDelegates", # custom rpc method
                     params=params
                 )
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'delegateInfo_getDelegates', [], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -720,7 +903,7 @@ class Subtensor:
         """
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry(encoded_coldkey: List[int]):
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [encoded_coldkey]
                 if block_hash:
@@ -732,7 +915,7 @@ class Subtensor:
 
         coldkey_bytes: bytes = bittensor.utils.ss58_address_to_bytes( coldkey_ss58 )
         encoded_coldkey: List[int] = [ int( byte ) for byte in coldkey_bytes ]
-        json_body = make_substrate_call_with_retry(encoded_coldkey)
+        json_body = self._cached( 'delegateInfo_getDelegated', [encoded_coldkey], block, lambda: make_substrate_call_with_retry(encoded_coldkey) )
         result = json_body['result']
 
         if result in (None, []):
@@ -798,7 +981,7 @@ class Subtensor:
         if uid == None: return NeuronInfo._null_neuron()
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [netuid, uid]
                 if block_hash:
@@ -807,7 +990,7 @@ class Subtensor:
                     method="neuronInfo_getNeuron", # custom rpc method
                     params=params
                 )
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'neuronInfo_getNeuron', [netuid, uid], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -828,7 +1011,7 @@ class Subtensor:
         """
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [netuid]
                 if block_hash:
@@ -838,7 +1021,7 @@ class Subtensor:
                     params=params
                 )
         
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'neuronInfo_getNeurons', [netuid], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -862,7 +1045,7 @@ class Subtensor:
         if uid == None: return NeuronInfoLite._null_neuron()
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [netuid, uid]
                 if block_hash:
@@ -871,7 +1054,7 @@ class Subtensor:
                     method="neuronInfo_getNeuronLite", # custom rpc method
                     params=params
                 )
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'neuronInfo_getNeuronLite', [netuid, uid], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -892,7 +1075,7 @@ class Subtensor:
         """
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 block_hash = None if block == None else substrate.get_block_hash( block )
                 params = [netuid]
                 if block_hash:
@@ -902,7 +1085,7 @@ class Subtensor:
                     params=params
                 )
         
-        json_body = make_substrate_call_with_retry()
+        json_body = self._cached( 'neuronInfo_getNeuronsLite', [netuid], block, make_substrate_call_with_retry )
         result = json_body['result']
 
         if result in (None, []):
@@ -910,7 +1093,7 @@ class Subtensor:
         
         return NeuronInfoLite.list_from_vec_u8( result )
 
-    def metagraph( self, netuid: int, block: Optional[int] = None ) -> 'bittensor.Metagraph':
+    def metagraph( self, netuid: int, block: Optional[int] = None, previous: Optional['bittensor.Metagraph'] = None, lite: bool = False ) -> 'bittensor.Metagraph':
         r""" Returns the metagraph for the subnet.
         Args:
             netuid ( int ):
@@ -918,32 +1101,158 @@ class Subtensor:
             block (Optional[int]):
                 The block to create the metagraph for.
                 Defaults to latest.
+            previous (Optional[bittensor.Metagraph]):
+                Metagraph of a previous sync of the subnet, to sync incrementally from.
+                Only the neurons whose weights or bonds may have changed are downloaded in full.
+            lite (bool):
+                If True, downloads the neurons without weights and bonds, see bittensor.metagraph.from_neurons_lite.
         Returns:
             metagraph ( `bittensor.Metagraph` ):
                 The metagraph for the subnet at the block.
         """
+        incremental = not lite and previous is not None and previous.netuid == netuid and previous.neurons is not None \
+                      and previous.info is not None and not previous.lite
+        # Pin the block once, so that the neurons, the subnet info and the recorded block are from the same chain state.
+        block, block_hash = self._pin_block( block )
+
         status: Optional['rich.console.Status'] = None
         if bittensor.__use_console__:
             status = bittensor.__console__.status("Synchronizing Metagraph...", spinner="earth")
             status.start()
-        
-        # Get neurons.
-        neurons = self.neurons( netuid = netuid, block = block )
-        # Get subnet info.
-        subnet_info: Optional[bittensor.SubnetInfo] = self.get_subnet_info( netuid = netuid, block = block )
+
+        def get_neurons() -> List[NeuronInfoLite]:
+            if incremental:
+                return self.neurons_incremental( netuid = netuid, previous = previous, block = block, block_hash = block_hash )
+            method = 'neuronInfo_getNeuronsLite' if lite else 'neuronInfo_getNeurons'
+            result = self._runtime_call( method, [netuid], block_hash )
+            if result in (None, []):
+                return []
+            return NeuronInfoLite.list_from_vec_u8( result ) if lite else NeuronInfo.list_from_vec_u8( result )
+
+        def get_subnet_info() -> Optional[SubnetInfo]:
+            # On a second connection, concurrently with the neurons. A pool of one connection serves one request at a time.
+            pool = self._subquery_pool if self.pool.size == 1 else None
+            result = self._runtime_call( 'subnetInfo_getSubnetInfo', [netuid], block_hash, pool = pool )
+            if result in (None, []):
+                return None
+            return SubnetInfo.from_vec_u8( result )
+
+        with ThreadPoolExecutor( max_workers = 1 ) as executor:
+            subnet_info_future = executor.submit( get_subnet_info )
+            try:
+                neurons = get_neurons()
+                subnet_info: Optional[bittensor.SubnetInfo] = subnet_info_future.result()
+            finally:
+                status.stop() if status else ...
         if subnet_info == None:
-            status.stop() if status else ...
             raise ValueError('Could not find subnet info for netuid: {}'.format(netuid))
 
-        status.stop() if status else ...
-
         # Create metagraph.
-        block_number = self.block
-
-        metagraph = bittensor.metagraph.from_neurons( network = self.network, netuid = netuid, info = subnet_info, neurons = neurons, block = block_number )
+        from_neurons = bittensor.metagraph.from_neurons_lite if lite else bittensor.metagraph.from_neurons
+        metagraph = from_neurons( network = self.network, netuid = netuid, info = subnet_info, neurons = neurons, block = block )
         print("Metagraph subtensor: ", self.network)
         return metagraph
 
+    def _pin_block( self, block: Optional[int] = None ) -> Tuple[int, str]:
+        r""" Returns the number and hash of block, or of the chain head if block is None.
+        """
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.pool.checkout() as substrate:
+                block_hash = substrate.get_chain_head() if block == None else substrate.get_block_hash( block )
+                block_number = substrate.get_block_number( block_hash ) if block == None else block
+                return block_number, block_hash
+        return make_substrate_call_with_retry()
+
+    def _runtime_call( self, method: str, params: list, block_hash: str, pool: Optional[SubstratePool] = None ) -> Optional[List[int]]:
+        r""" Returns the result of the custom rpc method at block_hash, on a connection of pool or else of self.pool.
+        """
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with ( pool or self.pool ).checkout() as connection:
+                return connection.rpc_request(
+                    method = method,
+                    params = [block_hash] + params
+                )
+        # Keyed by the block hash, the response at a block hash never expires.
+        return self._cached( method, params, block_hash, make_substrate_call_with_retry )['result']
+
+    def _connect( self ) -> 'SubstrateInterface':
+        r""" Returns a new websocket client to the chain endpoint of self.substrate.
+        """
+        return SubstrateInterface(
+            ss58_format = self.substrate.ss58_format,
+            url = self.substrate.url,
+        )
+
+    def neurons_incremental( self, netuid: int, previous: 'bittensor.Metagraph', block: int, block_hash: Optional[str] = None ) -> List[NeuronInfo]:
+        r""" Returns the neurons of the subnet at block, downloading only the neurons whose weights or bonds may have
+        changed since the previous metagraph in full, and the other neurons without weights and bonds.
+        Weights are refetched for new uids, changed hotkeys and changed last_update blocks, bonds for neurons
+        with bonds or a validator permit when an epoch has run since the previous metagraph.
+        The refetched neurons are downloaded concurrently on the pool, or all neurons in one request when more than
+        INCREMENTAL_SYNC_MAX_REFETCH of the subnet is refetched.
+        Args:
+            netuid ( int ):
+                The netuid of the subnet to pull neurons from.
+            previous ( bittensor.Metagraph ):
+                Metagraph of a previous sync of the subnet, with its neurons.
+            block ( int ):
+                block to sync to.
+            block_hash ( Optional[str] ):
+                Hash of block, queried if None.
+        Returns:
+            neurons (List[NeuronInfo]):
+                List of neuron metadata objects.
+        """
+        previous_neurons = previous.neurons
+        previous_block = previous.block.item()
+        tempo = previous.info.tempo
+        epoch_run = block - previous_block > tempo or \
+                    any( ( b + netuid + 1 ) % ( tempo + 1 ) == 0 for b in range( previous_block + 1, block + 1 ) )
+
+        lite_fields = [ field.name for field in dataclasses.fields( NeuronInfoLite ) ]
+        def from_lite( lite: NeuronInfoLite, old: Optional[NeuronInfo] ) -> NeuronInfo:
+            return NeuronInfo( **{ name: getattr( lite, name ) for name in lite_fields },
+                               weights = old.weights if old is not None else [], bonds = old.bonds if old is not None else [] )
+
+        neurons = []
+        refetch = []
+        for lite in self.neurons_lite( netuid = netuid, block = block ):
+            old = previous_neurons[ lite.uid ] if lite.uid < len( previous_neurons ) else None
+            if old is None or old.is_null or old.hotkey != lite.hotkey or old.last_update != lite.last_update or \
+                    ( epoch_run and ( lite.validator_permit or len( old.bonds ) > 0 ) ):
+                refetch.append( lite )
+            else:
+                neurons.append( from_lite( lite, old ) )
+
+        if len( refetch ) > INCREMENTAL_SYNC_MAX_REFETCH * ( len( neurons ) + len( refetch ) ):
+            logger.debug( 'Refetching {} of {} neurons, syncing all neurons', len( refetch ), len( neurons ) + len( refetch ) )
+            return self.neurons( netuid = netuid, block = block )
+
+        fetched = self._neurons_for_uids( netuid, [ lite.uid for lite in refetch ], block, block_hash )
+        for lite, neuron in zip( refetch, fetched ):
+            neurons.append( neuron if not neuron.is_null else from_lite( lite, None ) )
+
+        logger.debug( 'Synced {} neurons incrementally, refetched {}', len( neurons ), len( refetch ) )
+        return neurons
+
+    def _neurons_for_uids( self, netuid: int, uids: List[int], block: int, block_hash: Optional[str] = None ) -> List[NeuronInfo]:
+        r""" Returns the neurons of uids at block, downloaded concurrently on the connections of the pool.
+        """
+        if len( uids ) == 0:
+            return []
+        if block_hash == None:
+            block_hash = self._pin_block( block )[1]
+
+        def neuron_for_uid( uid: int ) -> NeuronInfo:
+            result = self._runtime_call( 'neuronInfo_getNeuron', [netuid, uid], block_hash )
+            if result in (None, []):
+                return NeuronInfo._null_neuron()
+            return NeuronInfo.from_vec_u8( result )
+
+        with ThreadPoolExecutor( max_workers = min( self.pool.size, len( uids ) ) ) as executor:
+            return list( executor.map( neuron_for_uid, uids ) )
 
     ################
     #### Legacy ####
@@ -961,7 +1270,7 @@ class Subtensor:
         try:
             @retry(delay=2, tries=3, backoff=2, max_delay=4)
             def make_substrate_call_with_retry():
-                with self.substrate as substrate:
+                with self.pool.checkout() as substrate:
                     return substrate.query(
                         module='System',
                         storage_function='Account',
@@ -976,31 +1285,56 @@ class Subtensor:
 
     def get_current_block(self) -> int:
         r""" Returns the current block number on the chain.
+        Served by the new-head subscription without a query once it is started, see wait_for_block,
+        and queried while the subscription has no head or its last head is stale.
         Returns:
             block_number (int):
                 Current chain blocknumber.
         """        
+        if self._block_subscription is not None:
+            head = self._block_subscription.head()
+            if head is not None:
+                return head
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
         def make_substrate_call_with_retry():
-            with self.substrate as substrate:
+            with self.pool.checkout() as substrate:
                 return substrate.get_block_number(None)
         return make_substrate_call_with_retry()
 
+    def _subscription( self ) -> BlockSubscription:
+        if self._block_subscription is None:
+            self._block_subscription = BlockSubscription( connect = self._connect )
+        return self._block_subscription
+
+    def wait_for_block( self, block: Optional[int] = None, timeout: Optional[float] = None ) -> int:
+        r""" Waits until the chain reaches block, through a new-head subscription shared by all waiters of this
+        subtensor and started on first use. wait_for_block( timeout = 0 ) returns the current block without waiting.
+        Args:
+            block (Optional[int]):
+                Block to wait for, defaults to the next block.
+            timeout (Optional[float]):
+                Seconds to wait at most, returns the current block on timeout.
+        Returns:
+            block_number (int):
+                Current chain blocknumber.
+        """
+        head = self._subscription().wait( block, timeout )
+        return head if head is not None else self.get_current_block()
+
+    def block_stream( self ) -> Iterator[int]:
+        r""" Yields the current block number each time the chain advances, through the new-head subscription.
+        Blocks passed while the consumer is busy are skipped.
+        """
+        return self._subscription().stream()
+
     def get_balances(self, block: int = None) -> Dict[str, Balance]:
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query_map(
-                    module='System',
-                    storage_function='Account',
-                    block_hash = None if block == None else substrate.get_block_hash( block )
-                )
-        result = make_substrate_call_with_retry()
-        return_dict = {}
-        for r in result:
-            bal = bittensor.Balance( int( r[1]['data']['free'].value ) )
-            return_dict[r[0].value] = bal
-        return return_dict
+        return dict( self.iter_balances( block ) )
+
+    def iter_balances( self, block: Optional[int] = None, page_size: int = 100 ) -> Iterator[Tuple[str, Balance]]:
+        r""" Yields the (ss58 address, free balance) of every account on chain page by page, see iter_query_map.
+        """
+        for r in self.iter_query_map( 'System', 'Account', block, page_size = page_size ):
+            yield r[0].value, bittensor.Balance( int( r[1]['data']['free'].value ) )
 
     @staticmethod
     def _null_neuron() -> NeuronInfo:
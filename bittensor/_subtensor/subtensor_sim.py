@@ -0,0 +1,779 @@
+# The MIT License (MIT)
+# Copyright © 2023 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" In-process deterministic chain simulator, served by bittensor.subtensor( network = 'sim' ).
+"""
+import copy
+import threading
+import time
+from concurrent.futures import Future
+from hashlib import blake2b
+from random import Random
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import bittensor
+from bittensor.utils import RAOPERTAO, U16_MAX, U16_NORMALIZED_FLOAT
+from bittensor.utils.balance import Balance
+from scalecodec.utils.ss58 import ss58_encode
+
+from . import subtensor_impl
+from .chain_data import AxonInfo, DelegateInfo, NeuronInfo, NeuronInfoLite, PrometheusInfo, SubnetHyperparameters, SubnetInfo
+
+# Owner of hotkeys unknown to the chain.
+NULL_ACCOUNT = '5C4hrfjw9DjXZTzV3MwzrrAr9P1MJhSrvWGWqi1eSuyUpnhM'
+
+# Reference time weight of a call and the weight limit of a normal extrinsic.
+CALL_WEIGHT = 200_000_000
+MAX_EXTRINSIC_WEIGHT = 350_000_000_000
+
+DEFAULT_HYPERPARAMETERS = {
+    'Rho': 10,
+    'Kappa': 32767,
+    'Difficulty': 1,
+    'Burn': int( RAOPERTAO ),
+    'ImmunityPeriod': 4096,
+    'ValidatorBatchSize': 32,
+    'ValidatorSequenceLength': 256,
+    'ValidatorPruneLen': 1,
+    'ValidatorLogitsDivergence': 1310,
+    'ValidatorEpochsPerReset': 60,
+    'ValidatorEpochLen': 100,
+    'ValidatorExcludeQuantile': 6553,
+    'MaxAllowedValidators': 128,
+    'MinAllowedWeights': 1,
+    'MaxWeightsLimit': U16_MAX,
+    'ScalingLawPower': 50,
+    'SynergyScalingLawPower': 50,
+    'Tempo': 99,
+    'NetworkModality': 0,
+    'EmissionValues': 0,
+}
+
+
+class SimulationError(Exception):
+    r""" Error of a simulated extrinsic, named like the pallet error of the chain.
+    """
+    pass
+
+
+class _SimSubnet:
+    r""" Columns of the neurons of a subnet, seeded deterministically.
+    """
+    def __init__( self, chain: 'SimulatedChain', netuid: int, n: int, max_n: int, n_weights: int, rng: Random ):
+        self.netuid = netuid
+        self.max_n = max( n, max_n )
+        self.hyperparameters = dict( DEFAULT_HYPERPARAMETERS, MaxAllowedUids = self.max_n )
+        self.hotkeys: List[str] = []
+        self.coldkeys: List[str] = []
+        self.uids: Dict[str, int] = {}
+        self.active: List[int] = []
+        self.rank: List[int] = []
+        self.trust: List[int] = []
+        self.consensus: List[int] = []
+        self.validator_trust: List[int] = []
+        self.incentive: List[int] = []
+        self.dividends: List[int] = []
+        self.emission: List[int] = []
+        self.last_update: List[int] = []
+        self.registered_at: List[int] = []
+        self.validator_permit: List[bool] = []
+        self.weights: List[List[Tuple[int, int]]] = []
+        self.bonds: List[List[Tuple[int, int]]] = []
+        self.axons: List[AxonInfo] = []
+        self.prometheus: List[PrometheusInfo] = []
+        for _ in range( n ):
+            hotkey, coldkey = chain.new_account( rng ), chain.new_account( rng )
+            chain.stake.setdefault( hotkey, {} )[coldkey] = rng.randrange( 0, 1000 * int( RAOPERTAO ) )
+            chain.owner[hotkey] = coldkey
+            self.append( hotkey, coldkey, block = 0 )
+            for column in ( self.rank, self.trust, self.consensus, self.validator_trust, self.incentive, self.dividends ):
+                column[-1] = rng.randrange( U16_MAX + 1 )
+            self.emission[-1] = rng.randrange( int( RAOPERTAO ) )
+
+        # The neurons with the most stake validate and set weights.
+        stakes = [ chain.total_stake( hotkey ) for hotkey in self.hotkeys ]
+        validators = sorted( range( n ), key = lambda uid: stakes[uid], reverse = True )[:self.hyperparameters['MaxAllowedValidators']]
+        for uid in validators:
+            self.validator_permit[uid] = True
+            dests = sorted( rng.sample( range( n ), min( n, n_weights ) ) )
+            self.weights[uid] = [ ( dest, rng.randrange( 1, U16_MAX + 1 ) ) for dest in dests ]
+            self.bonds[uid] = [ ( dest, rng.randrange( U16_MAX + 1 ) ) for dest in dests ]
+
+    def __len__( self ) -> int:
+        return len( self.hotkeys )
+
+    def append( self, hotkey: str, coldkey: str, block: int ):
+        self.uids[hotkey] = len( self.hotkeys )
+        self.hotkeys.append( hotkey )
+        self.coldkeys.append( coldkey )
+        for column in ( self.rank, self.trust, self.consensus, self.validator_trust, self.incentive, self.dividends, self.emission ):
+            column.append( 0 )
+        self.active.append( 1 )
+        self.last_update.append( block )
+        self.registered_at.append( block )
+        self.validator_permit.append( False )
+        self.weights.append( [] )
+        self.bonds.append( [] )
+        self.axons.append( AxonInfo( block = 0, version = 0, ip = '0.0.0.0', port = 0, ip_type = 4, protocol = 0, placeholder1 = 0, placeholder2 = 0 ) )
+        self.prometheus.append( PrometheusInfo( block = 0, version = 0, ip = '0.0.0.0', port = 0, ip_type = 4 ) )
+
+    def replace( self, uid: int, hotkey: str, coldkey: str, block: int ):
+        del self.uids[ self.hotkeys[uid] ]
+        self.uids[hotkey] = uid
+        self.hotkeys[uid] = hotkey
+        self.coldkeys[uid] = coldkey
+        for column in ( self.rank, self.trust, self.consensus, self.validator_trust, self.incentive, self.dividends, self.emission ):
+            column[uid] = 0
+        self.last_update[uid] = block
+        self.registered_at[uid] = block
+        self.validator_permit[uid] = False
+        self.weights[uid] = []
+        self.bonds[uid] = []
+        self.axons[uid] = AxonInfo( block = 0, version = 0, ip = '0.0.0.0', port = 0, ip_type = 4, protocol = 0, placeholder1 = 0, placeholder2 = 0 )
+        self.prometheus[uid] = PrometheusInfo( block = 0, version = 0, ip = '0.0.0.0', port = 0, ip_type = 4 )
+
+
+class SimulatedChain:
+    r""" In-memory state of a simulated subtensor chain, generated from a seed, so that the same arguments
+    always produce the same accounts, stakes, weights and neuron values. Extrinsics apply to the state at once,
+    the state is not versioned and queries at past blocks see the current state. Epochs are not run,
+    the consensus values of the neurons keep their seeded values.
+
+        Args:
+            n_subnets (:obj:`int`, `optional`):
+                Number of subnets, with netuids 1 to n_subnets.
+            n_neurons (:obj:`int`, `optional`):
+                Number of registered neurons on each subnet.
+            max_n (:obj:`int`, `optional`):
+                Maximum number of neurons on each subnet, defaults to n_neurons.
+            n_weights (:obj:`int`, `optional`):
+                Number of weights and bonds of each validator.
+            seed (:obj:`int`, `optional`):
+                Seed of the generated state.
+            block_time (:obj:`float`, `optional`):
+                Seconds between simulated blocks. If None, blocks are produced only by produce_blocks and by waiting
+                for a block, which then returns at once.
+            latency (:obj:`float`, `optional`):
+                Seconds added to every query and extrinsic, to simulate the round trip to a chain endpoint.
+            endowment (:obj:`float`, `optional`):
+                Balance in tao of accounts unknown to the chain, e.g. the coldkeys of local wallets.
+    """
+    def __init__(
+            self,
+            n_subnets: int = 1,
+            n_neurons: int = 1024,
+            max_n: Optional[int] = None,
+            seed: int = 0,
+            block_time: Optional[float] = None,
+            latency: float = 0.,
+            n_weights: int = 64,
+            endowment: float = 1000.,
+        ):
+        self.seed = seed
+        self.block_time = block_time
+        self.latency = latency
+        self.endowment = Balance.from_tao( endowment ).rao
+        self.lock = threading.RLock()
+        self.condition = threading.Condition( self.lock )
+        self.balances: Dict[str, int] = {}
+        self.stake: Dict[str, Dict[str, int]] = {}  # hotkey -> coldkey -> rao
+        self.owner: Dict[str, str] = {}
+        self.delegates: Dict[str, int] = {}  # hotkey -> take as u16
+        self.nonces: Dict[str, int] = {}
+        self._produced = 0
+        self._started = time.monotonic()
+        self.n_neurons = n_neurons
+        self.max_n = max_n or n_neurons
+        self.n_weights = n_weights
+        self.netuids = range( 1, n_subnets + 1 )
+        self._subnets: Dict[int, _SimSubnet] = {}
+
+    @staticmethod
+    def new_account( rng: Random ) -> str:
+        return ss58_encode( rng.getrandbits( 256 ).to_bytes( 32, 'little' ), bittensor.__ss58_format__ )
+
+    @property
+    def block( self ) -> int:
+        r""" Current block, produced over time with a block_time, else by produce_blocks.
+        """
+        if self.block_time:
+            return int( ( time.monotonic() - self._started ) / self.block_time ) + self._produced
+        return self._produced
+
+    def produce_blocks( self, n: int = 1 ) -> int:
+        r""" Produces n blocks at once and returns the current block.
+        """
+        with self.condition:
+            self._produced += n
+            self.condition.notify_all()
+            return self.block
+
+    def wait( self, block: int, timeout: Optional[float] = None ) -> int:
+        r""" Waits until block is produced, produces it at once without a block_time.
+        """
+        if not self.block_time:
+            return self.produce_blocks( max( 0, block - self.block ) )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.block < block:
+            remaining = ( block - self.block ) * self.block_time
+            if deadline is not None:
+                remaining = min( remaining, deadline - time.monotonic() )
+                if remaining <= 0:
+                    break
+            with self.condition:
+                self.condition.wait( remaining )
+        return self.block
+
+    def block_hash( self, block: int ) -> str:
+        return '0x' + blake2b( '{}:{}'.format( self.seed, block ).encode(), digest_size = 32 ).hexdigest()
+
+    def delay( self ):
+        if self.latency > 0:
+            time.sleep( self.latency )
+
+    def subnet( self, netuid: int ) -> _SimSubnet:
+        r""" Returns the subnet, generated on first access from its own seed, so that the state of a subnet
+        does not depend on the order of access.
+        """
+        if netuid not in self.netuids:
+            raise SimulationError( 'NetworkDoesNotExist' )
+        with self.lock:
+            if netuid not in self._subnets:
+                self._subnets[netuid] = _SimSubnet( self, netuid, self.n_neurons, self.max_n, self.n_weights, Random( self.seed * 1_000_003 + netuid ) )
+            return self._subnets[netuid]
+
+    def _all_subnets( self ) -> Iterator[Tuple[int, _SimSubnet]]:
+        return ( ( netuid, self.subnet( netuid ) ) for netuid in self.netuids )
+
+    def balance( self, ss58_address: str ) -> int:
+        return self.balances.get( ss58_address, self.endowment )
+
+    def total_stake( self, hotkey: str ) -> int:
+        return sum( self.stake.get( hotkey, {} ).values() )
+
+    ####################
+    #### Extrinsics ####
+    ####################
+
+    def apply( self, signer: str, call: Dict[str, Any] ):
+        r""" Applies the call signed by signer to the state, raises SimulationError if the chain would reject it.
+        """
+        with self.lock:
+            self.nonces[signer] = self.nonces.get( signer, 0 ) + 1
+            if call['call_module'] == 'Utility' and call['call_function'] in ( 'batch', 'batch_all' ):
+                # Calls of a batch_all are reverted together, only the account state is restored.
+                snapshot = ( dict( self.balances ), copy.deepcopy( self.stake ), dict( self.owner ), dict( self.delegates ) )
+                try:
+                    for batched_call in call['call_params']['calls']:
+                        self._apply_call( signer, batched_call )
+                except SimulationError:
+                    self.balances, self.stake, self.owner, self.delegates = snapshot
+                    raise
+            else:
+                self._apply_call( signer, call )
+
+    def _apply_call( self, signer: str, call: Dict[str, Any] ):
+        name = '{}.{}'.format( call['call_module'], call['call_function'] )
+        params = call['call_params']
+        block = self.block
+        if name == 'Balances.transfer':
+            self._debit( signer, params['value'] )
+            self.balances[ params['dest'] ] = self.balance( params['dest'] ) + params['value']
+
+        elif name == 'SubtensorModule.add_stake':
+            self._check_stake_permission( signer, params['hotkey'] )
+            self._debit( signer, params['amount_staked'] )
+            stakes = self.stake.setdefault( params['hotkey'], {} )
+            stakes[signer] = stakes.get( signer, 0 ) + params['amount_staked']
+
+        elif name == 'SubtensorModule.remove_stake':
+            stakes = self.stake.get( params['hotkey'], {} )
+            if stakes.get( signer, 0 ) < params['amount_unstaked']:
+                raise SimulationError( 'NotEnoughStaketoWithdraw' )
+            stakes[signer] -= params['amount_unstaked']
+            self.balances[signer] = self.balance( signer ) + params['amount_unstaked']
+
+        elif name == 'SubtensorModule.become_delegate':
+            if self.owner.get( params['hotkey'] ) != signer:
+                raise SimulationError( 'NonAssociatedColdKey' )
+            if params['hotkey'] in self.delegates:
+                raise SimulationError( 'AlreadyDelegate' )
+            self.delegates[ params['hotkey'] ] = 11796  # 18% take
+
+        elif name in ( 'SubtensorModule.register', 'SubtensorModule.burned_register' ):
+            subnet = self.subnet( params['netuid'] )
+            hotkey = params['hotkey']
+            coldkey = params['coldkey'] if name == 'SubtensorModule.register' else signer
+            if hotkey in subnet.uids:
+                raise SimulationError( 'AlreadyRegistered' )
+            if self.owner.get( hotkey, coldkey ) != coldkey:
+                raise SimulationError( 'NonAssociatedColdKey' )
+            if name == 'SubtensorModule.burned_register':
+                self._debit( signer, subnet.hyperparameters['Burn'] )
+            self.owner[hotkey] = coldkey
+            if len( subnet ) < subnet.max_n:
+                subnet.append( hotkey, coldkey, block )
+            else:
+                # Replaces the neuron with the least emission out of its immunity period.
+                immunity = subnet.hyperparameters['ImmunityPeriod']
+                prunable = [ uid for uid in range( len( subnet ) ) if block - subnet.registered_at[uid] > immunity ]
+                if len( prunable ) == 0:
+                    raise SimulationError( 'NoNeuronIdAvailable' )
+                subnet.replace( min( prunable, key = lambda uid: subnet.emission[uid] ), hotkey, coldkey, block )
+
+        elif name == 'SubtensorModule.set_weights':
+            subnet = self.subnet( params['netuid'] )
+            uid = subnet.uids.get( signer )
+            if uid is None:
+                raise SimulationError( 'NotRegistered' )
+            if len( params['dests'] ) != len( params['weights'] ):
+                raise SimulationError( 'WeightVecNotEqualSize' )
+            if any( dest >= len( subnet ) for dest in params['dests'] ):
+                raise SimulationError( 'InvalidUid' )
+            if len( params['dests'] ) < min( subnet.hyperparameters['MinAllowedWeights'], len( subnet ) ):
+                raise SimulationError( 'NotSettingEnoughWeights' )
+            subnet.weights[uid] = [ ( int( dest ), int( weight ) ) for dest, weight in zip( params['dests'], params['weights'] ) if weight > 0 ]
+            subnet.last_update[uid] = block
+
+        elif name in ( 'SubtensorModule.serve_axon', 'SubtensorModule.serve_prometheus' ):
+            subnet = self.subnet( params['netuid'] )
+            uid = subnet.uids.get( signer )
+            if uid is None:
+                raise SimulationError( 'NotRegistered' )
+            ip = bittensor.utils.networking.int_to_ip( int( params['ip'] ) )
+            if name == 'SubtensorModule.serve_axon':
+                subnet.axons[uid] = AxonInfo( block = block, version = params['version'], ip = ip, port = params['port'], ip_type = params['ip_type'],
+                                              protocol = params.get( 'protocol', 0 ), placeholder1 = params.get( 'placeholder1', 0 ), placeholder2 = params.get( 'placeholder2', 0 ) )
+            else:
+                subnet.prometheus[uid] = PrometheusInfo( block = block, version = params['version'], ip = ip, port = params['port'], ip_type = params['ip_type'] )
+
+        else:
+            raise SimulationError( 'Call {} is not simulated'.format( name ) )
+
+    def _debit( self, ss58_address: str, amount: int ):
+        if self.balance( ss58_address ) < amount:
+            raise SimulationError( 'NotEnoughBalance' )
+        self.balances[ss58_address] = self.balance( ss58_address ) - amount
+
+    def _check_stake_permission( self, coldkey: str, hotkey: str ):
+        owner = self.owner.get( hotkey )
+        if owner is None:
+            raise SimulationError( 'NotRegistered' )
+        if owner != coldkey and hotkey not in self.delegates:
+            raise SimulationError( 'NonAssociatedColdKey' )
+
+    #################
+    #### Storage ####
+    #################
+
+    def storage( self, name: str, params: List[Any] ) -> Any:
+        r""" Returns the value of the SubtensorModule storage function at params.
+        """
+        with self.lock:
+            if name == 'NetworksAdded':
+                return params[0] in self.netuids
+            if name == 'TotalNetworks':
+                return len( self.netuids )
+            if name in DEFAULT_HYPERPARAMETERS or name == 'MaxAllowedUids':
+                return self.subnet( params[0] ).hyperparameters[name] if params[0] in self.netuids else 0
+            if name == 'SubnetworkN':
+                return len( self.subnet( params[0] ) )
+            if name == 'Uids':
+                return self.subnet( params[0] ).uids.get( params[1] ) if params[0] in self.netuids else None
+            if name == 'ValidatorPermit':
+                return self.subnet( params[0] ).validator_permit[ params[1] ]
+            if name == 'Stake':
+                return self.stake.get( params[0], {} ).get( params[1], 0 )
+            if name == 'TotalHotkeyStake':
+                return self.total_stake( params[0] )
+            if name == 'TotalColdkeyStake':
+                return sum( stakes.get( params[0], 0 ) for stakes in self.stake.values() )
+            if name == 'TotalStake':
+                return sum( sum( stakes.values() ) for stakes in self.stake.values() )
+            if name == 'Owner':
+                return self.owner.get( params[0], NULL_ACCOUNT )
+            if name == 'Delegates':
+                return self.delegates.get( params[0], 0 )
+            raise ValueError( 'Storage function {} is not simulated'.format( name ) )
+
+    def storage_map( self, name: str, params: List[Any] ) -> List[Tuple[Any, Any]]:
+        r""" Returns the (key, value) records of the SubtensorModule map storage function at params.
+        """
+        with self.lock:
+            if name == 'NetworksAdded':
+                return [ ( netuid, True ) for netuid in self.netuids ]
+            if name == 'IsNetworkMember':
+                return [ ( netuid, True ) for netuid, subnet in self._all_subnets() if params[0] in subnet.uids ]
+            if name == 'Stake':
+                return list( self.stake.get( params[0], {} ).items() )
+            raise ValueError( 'Map storage function {} is not simulated'.format( name ) )
+
+    #################
+    #### Neurons ####
+    #################
+
+    def neuron( self, netuid: int, uid: int, lite: bool = False ) -> NeuronInfo:
+        subnet = self.subnet( netuid )
+        hotkey = subnet.hotkeys[uid]
+        stake_dict = { coldkey: Balance.from_rao( stake ) for coldkey, stake in self.stake.get( hotkey, {} ).items() }
+        stake = Balance.from_rao( self.total_stake( hotkey ) )
+        values = dict(
+            hotkey = hotkey,
+            coldkey = subnet.coldkeys[uid],
+            uid = uid,
+            netuid = netuid,
+            active = subnet.active[uid],
+            stake = stake,
+            stake_dict = stake_dict,
+            total_stake = stake,
+            rank = U16_NORMALIZED_FLOAT( subnet.rank[uid] ),
+            emission = subnet.emission[uid] / RAOPERTAO,
+            incentive = U16_NORMALIZED_FLOAT( subnet.incentive[uid] ),
+            consensus = U16_NORMALIZED_FLOAT( subnet.consensus[uid] ),
+            trust = U16_NORMALIZED_FLOAT( subnet.trust[uid] ),
+            validator_trust = U16_NORMALIZED_FLOAT( subnet.validator_trust[uid] ),
+            dividends = U16_NORMALIZED_FLOAT( subnet.dividends[uid] ),
+            last_update = subnet.last_update[uid],
+            validator_permit = subnet.validator_permit[uid],
+            prometheus_info = subnet.prometheus[uid],
+            axon_info = subnet.axons[uid],
+            pruning_score = U16_MAX,
+        )
+        if lite:
+            return NeuronInfoLite( **values )
+        return NeuronInfo( **values, weights = [ list( weight ) for weight in subnet.weights[uid] ], bonds = [ list( bond ) for bond in subnet.bonds[uid] ] )
+
+    def subnet_info( self, netuid: int ) -> Optional[SubnetInfo]:
+        if netuid not in self.netuids:
+            return None
+        subnet = self.subnet( netuid )
+        hyperparameters = subnet.hyperparameters
+        return SubnetInfo(
+            netuid = netuid,
+            rho = hyperparameters['Rho'],
+            kappa = hyperparameters['Kappa'],
+            difficulty = hyperparameters['Difficulty'],
+            immunity_period = hyperparameters['ImmunityPeriod'],
+            validator_batch_size = hyperparameters['ValidatorBatchSize'],
+            validator_sequence_length = hyperparameters['ValidatorSequenceLength'],
+            validator_epochs_per_reset = hyperparameters['ValidatorEpochsPerReset'],
+            validator_epoch_length = hyperparameters['ValidatorEpochLen'],
+            max_allowed_validators = hyperparameters['MaxAllowedValidators'],
+            min_allowed_weights = hyperparameters['MinAllowedWeights'],
+            max_weight_limit = hyperparameters['MaxWeightsLimit'],
+            scaling_law_power = hyperparameters['ScalingLawPower'],
+            synergy_scaling_law_power = hyperparameters['SynergyScalingLawPower'],
+            subnetwork_n = len( subnet ),
+            max_n = subnet.max_n,
+            blocks_since_epoch = ( self.block + netuid + 1 ) % ( hyperparameters['Tempo'] + 1 ),
+            tempo = hyperparameters['Tempo'],
+            modality = hyperparameters['NetworkModality'],
+            connection_requirements = {},
+            emission_value = hyperparameters['EmissionValues'],
+            burn = Balance.from_rao( hyperparameters['Burn'] ),
+        )
+
+    def delegate_info( self, hotkey: str ) -> DelegateInfo:
+        nominators = [ ( coldkey, Balance.from_rao( stake ) ) for coldkey, stake in self.stake.get( hotkey, {} ).items() ]
+        return DelegateInfo(
+            hotkey_ss58 = hotkey,
+            total_stake = Balance.from_rao( self.total_stake( hotkey ) ),
+            nominators = nominators,
+            owner_ss58 = self.owner[hotkey],
+            take = U16_NORMALIZED_FLOAT( self.delegates[hotkey] ),
+            validator_permits = [ netuid for netuid, subnet in self._all_subnets() if hotkey in subnet.uids and subnet.validator_permit[ subnet.uids[hotkey] ] ],
+            registrations = [ netuid for netuid, subnet in self._all_subnets() if hotkey in subnet.uids ],
+            return_per_1000 = Balance.from_rao( 0 ),
+            total_daily_return = Balance.from_rao( 0 ),
+        )
+
+
+class _SimReceipt:
+    r""" Receipt of a simulated extrinsic, included at once.
+    """
+    def __init__( self, extrinsic_hash: str, block_hash: str, error: Optional[SimulationError] = None ):
+        self.extrinsic_hash = extrinsic_hash
+        self.block_hash = block_hash
+        self.is_success = error is None
+        self.error_message = None if error is None else { 'type': 'Module', 'name': str( error ), 'docs': [] }
+        self.triggered_events = []
+
+    def process_events( self ):
+        pass
+
+
+class _SimSubstrate:
+    r""" Stands in for the SubstrateInterface of the extrinsic helpers, so that the calls they compose apply to the simulated chain.
+    """
+    def __init__( self, chain: SimulatedChain ):
+        self.chain = chain
+
+    def __enter__( self ) -> '_SimSubstrate':
+        return self
+
+    def __exit__( self, *args ):
+        pass
+
+    def close( self ):
+        pass
+
+    def compose_call( self, call_module: str, call_function: str, call_params: Dict[str, Any] = None, **kwargs ) -> Dict[str, Any]:
+        return { 'call_module': call_module, 'call_function': call_function, 'call_params': call_params or {} }
+
+    def create_signed_extrinsic( self, call: Dict[str, Any], keypair: 'bittensor.Keypair', nonce: Optional[int] = None, **kwargs ) -> Dict[str, Any]:
+        return { 'call': call, 'signer': keypair.ss58_address, 'nonce': nonce }
+
+    def submit_extrinsic( self, extrinsic: Dict[str, Any], wait_for_inclusion: bool = False, wait_for_finalization: bool = False ) -> _SimReceipt:
+        self.chain.delay()
+        with self.chain.lock:
+            extrinsic_hash = '0x' + blake2b( repr( ( extrinsic, self.chain.nonces.get( extrinsic['signer'], 0 ) ) ).encode(), digest_size = 32 ).hexdigest()
+            try:
+                self.chain.apply( extrinsic['signer'], extrinsic['call'] )
+                error = None
+            except SimulationError as e:
+                error = e
+            return _SimReceipt( extrinsic_hash, self.chain.block_hash( self.chain.block ), error )
+
+    def get_payment_info( self, call: Dict[str, Any], keypair: 'bittensor.Keypair' ) -> Dict[str, Any]:
+        calls = call['call_params'].get( 'calls', [ call ] )
+        return { 'weight': CALL_WEIGHT * len( calls ), 'class': 'normal', 'partialFee': 0 }
+
+    def get_constant( self, module_name: str, constant_name: str ) -> SimpleNamespace:
+        if ( module_name, constant_name ) != ( 'System', 'BlockWeights' ):
+            raise ValueError( 'Constant {}.{} is not simulated'.format( module_name, constant_name ) )
+        return SimpleNamespace( value = { 'per_class': { 'normal': { 'max_extrinsic': MAX_EXTRINSIC_WEIGHT } } } )
+
+    def get_account_nonce( self, ss58_address: str ) -> int:
+        return self.chain.nonces.get( ss58_address, 0 )
+
+    def get_block_hash( self, block_id: int ) -> str:
+        return self.chain.block_hash( block_id )
+
+    def get_block_number( self, block_hash: Optional[str] ) -> int:
+        return self.chain.block
+
+
+class _SimQueryMapResult( subtensor_impl.QueryMapRecords ):
+    r""" Records of a map storage query, with the values wrapped like the decoded records of substrate.
+    """
+    def __init__( self, records: List[Tuple[Any, Any]] ):
+        super().__init__( [ ( SimpleNamespace( value = key ), SimpleNamespace( value = value ) ) for key, value in records ] )
+
+
+class Simulated_Subtensor(subtensor_impl.Subtensor):
+    r""" Subtensor served by an in-process SimulatedChain instead of a chain endpoint, for load tests of the
+    metagraph, validator and cli code at realistic subnet sizes without a network. The extrinsic helpers run
+    unchanged, their calls apply to the simulated state.
+
+        Args:
+            chain (:obj:`SimulatedChain`, `optional`):
+                Simulated chain state, created from the keyword arguments if None.
+            **kwargs:
+                Arguments of SimulatedChain, e.g. n_subnets = 64, n_neurons = 4096, block_time = 0.1, latency = 0.01.
+    """
+    def __init__( self, chain: Optional[SimulatedChain] = None, **kwargs ):
+        self.chain = chain if chain is not None else SimulatedChain( **kwargs )
+        super().__init__(
+            substrate = _SimSubstrate( self.chain ),
+            network = 'sim',
+            chain_endpoint = 'sim',
+        )
+
+    def __str__( self ) -> str:
+        return 'Simulated_Subtensor(subnets={}, block={})'.format( len( self.chain.netuids ), self.chain.block )
+
+    ################
+    #### Blocks ####
+    ################
+
+    def get_current_block( self ) -> int:
+        self.chain.delay()
+        return self.chain.block
+
+    def wait_for_block( self, block: Optional[int] = None, timeout: Optional[float] = None ) -> int:
+        if block is None:
+            block = self.chain.block + 1 if timeout != 0 else self.chain.block
+        return self.chain.wait( block, timeout )
+
+    def block_stream( self ) -> Iterator[int]:
+        block = self.chain.block
+        while True:
+            yield block
+            block = self.chain.wait( block + 1 )
+
+    #################
+    #### Storage ####
+    #################
+
+    def query_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [] ) -> SimpleNamespace:
+        self.chain.delay()
+        return SimpleNamespace( value = self.chain.storage( name, params ) )
+
+    def query_map_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [] ) -> _SimQueryMapResult:
+        self.chain.delay()
+        return _SimQueryMapResult( self.chain.storage_map( name, params ) )
+
+    def iter_query_map_subtensor( self, name: str, block: Optional[int] = None, params: Optional[List[object]] = [], page_size: int = 100 ) -> Iterator[Tuple[object, object]]:
+        records = _SimQueryMapResult( self.chain.storage_map( name, params ) ).records
+        for start in range( 0, len( records ), page_size ):
+            self.chain.delay()
+            yield from records[start:start + page_size]
+
+    def get_subnet_hyperparameters( self, netuid: int, block: Optional[int] = None ) -> Optional[SubnetHyperparameters]:
+        self.chain.delay()
+        with self.chain.lock:
+            if netuid not in self.chain.netuids:
+                return None
+            hyperparameters = self.chain.subnet( netuid ).hyperparameters
+            return SubnetHyperparameters(
+                netuid = netuid,
+                block = self.chain.block,
+                validator_batch_size = hyperparameters['ValidatorBatchSize'],
+                validator_sequence_length = hyperparameters['ValidatorSequenceLength'],
+                validator_prune_len = hyperparameters['ValidatorPruneLen'],
+                validator_logits_divergence = U16_NORMALIZED_FLOAT( hyperparameters['ValidatorLogitsDivergence'] ),
+                validator_epochs_per_reset = hyperparameters['ValidatorEpochsPerReset'],
+                validator_epoch_length = hyperparameters['ValidatorEpochLen'],
+                validator_exclude_quantile = U16_NORMALIZED_FLOAT( hyperparameters['ValidatorExcludeQuantile'] ),
+                min_allowed_weights = hyperparameters['MinAllowedWeights'],
+                max_weight_limit = U16_NORMALIZED_FLOAT( hyperparameters['MaxWeightsLimit'] ),
+                scaling_law_power = hyperparameters['ScalingLawPower'] / 100.,
+                synergy_scaling_law_power = hyperparameters['SynergyScalingLawPower'] / 100.,
+                max_n = hyperparameters['MaxAllowedUids'],
+            )
+
+    ##################
+    #### Accounts ####
+    ##################
+
+    def get_balance( self, address: str, block: Optional[int] = None ) -> Balance:
+        self.chain.delay()
+        with self.chain.lock:
+            return Balance.from_rao( self.chain.balance( address ) )
+
+    def get_balances( self, block: Optional[int] = None ) -> Dict[str, Balance]:
+        self.chain.delay()
+        with self.chain.lock:
+            return { address: Balance.from_rao( balance ) for address, balance in self.chain.balances.items() }
+
+    def iter_balances( self, block: Optional[int] = None, page_size: int = 100 ) -> Iterator[Tuple[str, Balance]]:
+        with self.chain.lock:
+            balances = list( self.chain.balances.items() )
+        for start in range( 0, len( balances ), page_size ):
+            self.chain.delay()
+            for address, balance in balances[start:start + page_size]:
+                yield address, Balance.from_rao( balance )
+
+    ###################
+    #### Delegates ####
+    ###################
+
+    def get_delegates( self, block: Optional[int] = None ) -> List[DelegateInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            return [ self.chain.delegate_info( hotkey ) for hotkey in self.chain.delegates ]
+
+    def get_delegate_by_hotkey( self, hotkey_ss58: str, block: Optional[int] = None ) -> Optional[DelegateInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            return self.chain.delegate_info( hotkey_ss58 ) if hotkey_ss58 in self.chain.delegates else None
+
+    def get_delegated( self, coldkey_ss58: str, block: Optional[int] = None ) -> List[Tuple[DelegateInfo, Balance]]:
+        self.chain.delay()
+        with self.chain.lock:
+            return [ ( self.chain.delegate_info( hotkey ), Balance.from_rao( self.chain.stake[hotkey][coldkey_ss58] ) )
+                     for hotkey in self.chain.delegates if self.chain.stake.get( hotkey, {} ).get( coldkey_ss58, 0 ) > 0 ]
+
+    def is_hotkey_delegate( self, hotkey_ss58: str ) -> bool:
+        self.chain.delay()
+        return hotkey_ss58 in self.chain.delegates
+
+    #################
+    #### Subnets ####
+    #################
+
+    def get_subnet_info( self, netuid: int, block: Optional[int] = None ) -> Optional[SubnetInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            return self.chain.subnet_info( netuid )
+
+    def get_all_subnets_info( self, block: Optional[int] = None ) -> List[SubnetInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            return [ self.chain.subnet_info( netuid ) for netuid in self.chain.netuids ]
+
+    #################
+    #### Neurons ####
+    #################
+
+    def neuron_for_uid( self, uid: int, netuid: int, block: Optional[int] = None ) -> NeuronInfo:
+        self.chain.delay()
+        with self.chain.lock:
+            if uid == None or netuid not in self.chain.netuids or uid >= len( self.chain.subnet( netuid ) ):
+                return NeuronInfo._null_neuron()
+            return self.chain.neuron( netuid, uid )
+
+    def neuron_for_uid_lite( self, uid: int, netuid: int, block: Optional[int] = None ) -> NeuronInfoLite:
+        self.chain.delay()
+        with self.chain.lock:
+            if uid == None or netuid not in self.chain.netuids or uid >= len( self.chain.subnet( netuid ) ):
+                return NeuronInfoLite._null_neuron()
+            return self.chain.neuron( netuid, uid, lite = True )
+
+    def neurons( self, netuid: int, block: Optional[int] = None ) -> List[NeuronInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            if netuid not in self.chain.netuids:
+                return []
+            return [ self.chain.neuron( netuid, uid ) for uid in range( len( self.chain.subnet( netuid ) ) ) ]
+
+    def neurons_lite( self, netuid: int, block: Optional[int] = None ) -> List[NeuronInfoLite]:
+        self.chain.delay()
+        with self.chain.lock:
+            if netuid not in self.chain.netuids:
+                return []
+            return [ self.chain.neuron( netuid, uid, lite = True ) for uid in range( len( self.chain.subnet( netuid ) ) ) ]
+
+    def _neurons_for_uids( self, netuid: int, uids: List[int], block: int, block_hash: Optional[str] = None ) -> List[NeuronInfo]:
+        self.chain.delay()
+        with self.chain.lock:
+            return [ self.chain.neuron( netuid, uid ) for uid in uids ]
+
+    def metagraph( self, netuid: int, block: Optional[int] = None, previous: Optional['bittensor.Metagraph'] = None, lite: bool = False ) -> 'bittensor.Metagraph':
+        incremental = not lite and previous is not None and previous.netuid == netuid and previous.neurons is not None \
+                      and previous.info is not None and not previous.lite
+        # The chain lock holds the state, so that the neurons and subnet info are from the same block.
+        with self.chain.lock:
+            block = self.chain.block
+            subnet_info = self.get_subnet_info( netuid )
+            if subnet_info == None:
+                raise ValueError('Could not find subnet info for netuid: {}'.format(netuid))
+            if lite:
+                neurons = self.neurons_lite( netuid )
+            elif incremental:
+                neurons = self.neurons_incremental( netuid = netuid, previous = previous, block = block )
+            else:
+                neurons = self.neurons( netuid )
+        from_neurons = bittensor.metagraph.from_neurons_lite if lite else bittensor.metagraph.from_neurons
+        return from_neurons( network = self.network, netuid = netuid, info = subnet_info, neurons = neurons, block = block )
+
+    def submit_pipelined( self, keypair: 'bittensor.Keypair', call_module: str, call_function: str, call_params: Dict[str, Any] ) -> Future:
+        future = Future()
+        with self.substrate as substrate:
+            call = substrate.compose_call( call_module = call_module, call_function = call_function, call_params = call_params )
+            future.set_result( substrate.submit_extrinsic( substrate.create_signed_extrinsic( call = call, keypair = keypair ) ) )
+        return future
@@ -432,6 +432,9 @@ def solve_for_difficulty_fast( subtensor, wallet, netuid: int, output_in_place:
     solvers = [ Solver(i, num_processes, update_interval, finished_queues[i], solution_queue, stopEvent, curr_block, curr_block_num, curr_diff, check_block, limit)
                 for i in range(num_processes) ]
 
+    # Start the block subscription, the new block checks then read the current block without a query.
+    subtensor.wait_for_block( timeout = 0 )
+
     # Get first block
     block_number, difficulty, block_hash = get_block_with_retry(subtensor = subtensor, netuid = netuid)
 
@@ -719,6 +722,9 @@ def solve_for_difficulty_fast_cuda( subtensor: 'bittensor.Subtensor', wallet: 'b
                     for i in range(num_processes) ]
 
 
+        # Start the block subscription, the new block checks then read the current block without a query.
+        subtensor.wait_for_block( timeout = 0 )
+
         # Get first block
         block_number, difficulty, block_hash = get_block_with_retry(subtensor = subtensor, netuid = netuid)
 
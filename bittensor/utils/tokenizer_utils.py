@@ -1014,6 +1014,47 @@ def phrase_cross_entropy(target_phrases: Union[List[List[int]], torch.Tensor],
     return loss_val, loss
 
 
+def topk_tokens_to_sparse(topk_tensor: torch.Tensor, vocab_size_std: int,
+                          vocab_size_min: int = 50257) -> Tuple[torch.Tensor, torch.Tensor]:
+    r"""
+    Convert topk_tokens first token probabilities into sparse (token, probability) pairs of a standard logits tensor,
+    without materializing the [batch_size, vocab_size_std] tensor. Tokens may repeat within a batch item,
+    in which case their probabilities accumulate.
+        Args:
+            topk_tensor (:obj:`torch.Tensor`, `required`):
+                [batch_size, (topk + 1), max_len] tensor includes topk token probabilities (prob_k) + floor_prob
+                in first column with gradients attached, with std_tokens in remaining columns with ignore_index padding.
+            vocab_size_std (:obj:`int`, `optional`):
+                Standard tokenizer vocab_size for validating token ids.
+            vocab_size_min (:obj:`int`, `optional`):
+                Minimum server vocab_size expected, should set to nominal 50257,
+                used to prevent the floor_probs from being too large.
+        Returns:
+            topk_tokens (:obj:`torch.LongTensor`, `required`):
+                [batch_size, topk] First token of each topk phrase.
+            n_topk_probs (:obj:`torch.Tensor`, `required`):
+                [batch_size, topk] Normalized topk probabilities.
+    """
+    batch_size, topk_p1, max_len = topk_tensor.shape  # [batch_size, (topk + 1), max_len]
+    topk = topk_p1 - 1
+
+    topk_tokens = topk_tensor[:, :-1, 1].round().to(torch.int64)  # [batch_size, topk] first tokens
+    topk_probs = topk_tensor[:, :-1, 0]  # [batch_size, topk] Probabilities for each phrase in topk
+    floor_probs = topk_tensor[:, -1, 0]  # [batch_size] Floor probabilities as mean probability for non-topk tokens
+
+    if topk > 0 and (topk_tokens.min() < 0 or topk_tokens.max() >= vocab_size_std):
+        raise ValueError(f'topk tokens out of range [0, {vocab_size_std})')
+
+    topk_probs = torch.clamp(topk_probs, 0, 1)  # [batch_size, topk] ensure probabilities within [0, 1]
+    floor_probs = torch.clamp(floor_probs, 0, 1)  # [batch_size] ensure floor probabilities within [0, 1]
+
+    # === Ensure total probability is 1 ===
+    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [batch_size] total probs
+    n_topk_probs = topk_probs / total_probs[:, None]  # [batch_size, topk] normalized topk_probs
+
+    return topk_tokens, n_topk_probs
+
+
 def topk_tokens_to_vocab_size(topk_tensor: torch.Tensor, vocab_size_std: int, vocab_size_min: int = 50257) -> torch.Tensor:
     r"""
     Convert topk_tokens first token probabilities into a standard logits tensor shape [batch_size, vocab_size_std].
@@ -1040,23 +1081,10 @@ def topk_tokens_to_vocab_size(topk_tensor: torch.Tensor, vocab_size_std: int, vo
             logits (:obj:`torch.Tensor`, `required`):
                 [batch_size, vocab_size_std] Standard logits.
     """
-
-    batch_size, topk_p1, max_len = topk_tensor.shape  # [batch_size, (topk + 1), max_len]
-    topk = topk_p1 - 1
-
-    topk_tokens = topk_tensor[:, :-1, 1].round().to(torch.int64)  # [batch_size, topk] first tokens
-    topk_probs = topk_tensor[:, :-1, 0]  # [batch_size, topk] Probabilities for each phrase in topk
-    floor_probs = topk_tensor[:, -1, 0]  # [batch_size] Floor probabilities as mean probability for non-topk tokens
-
-    topk_probs = torch.clamp(topk_probs, 0, 1)  # [batch_size, topk] ensure probabilities within [0, 1]
-    floor_probs = torch.clamp(floor_probs, 0, 1)  # [batch_size] ensure floor probabilities within [0, 1]
-
-    # === Ensure total probability is 1 ===
-    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [batch_size] total probs
-    n_topk_probs = topk_probs / total_probs[:, None]  # [batch_size, topk] normalized topk_probs
+    topk_tokens, n_topk_probs = topk_tokens_to_sparse(topk_tensor, vocab_size_std, vocab_size_min)
 
     # === Convert to logits tensor ===
-    probs = torch.zeros((batch_size, vocab_size_std))  # [batch_size, vocab_size_std]
+    probs = torch.zeros((topk_tensor.shape[0], vocab_size_std))  # [batch_size, vocab_size_std]
     probs.scatter_add_(1, topk_tokens, n_topk_probs)  # accumulate token probabilities onto logits tensor
 
     return probs  # [batch_size, vocab_size_std]
@@ -15,8 +15,13 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import os
+import random
+import tempfile
 import unittest
+import torch
 import bittensor
+import bittensor.utils.weight_utils as weight_utils
 from tests.helpers import get_mock_neuron, get_mock_hotkey, get_mock_coldkey
 
 class TestMetagraph(unittest.TestCase):
@@ -45,3 +50,125 @@ class TestMetagraph(unittest.TestCase):
         self.assertEqual(len(metagraph.hotkeys), 2000)
         self.assertEqual(len(metagraph.coldkeys), 2000)
         self.assertEqual(len(metagraph.uids), 2000)
+
+    @staticmethod
+    def _neuron(uid, **kwargs):
+        neuron = dict(
+            hotkey = get_mock_hotkey(uid + 1), coldkey = get_mock_coldkey(uid + 1), uid = uid, netuid = -1, active = 1,
+            stake = bittensor.Balance.from_rao(1), stake_dict = {}, total_stake = bittensor.Balance.from_rao(1),
+            rank = 0., emission = 0., incentive = 0., consensus = 0., trust = 0., validator_trust = 0., dividends = 0.,
+            last_update = 0, validator_permit = True, weights = [], bonds = [], pruning_score = 0,
+            prometheus_info = bittensor.PrometheusInfo( block = 0, version = 1, ip = '0.0.0.0', port = 0, ip_type = 4 ),
+            axon_info = bittensor.AxonInfo( block = 0, version = 1, ip = '0.0.0.0', port = 0, ip_type = 4, protocol = 0,
+                                            placeholder1 = 0, placeholder2 = 0 ),
+        )
+        neuron.update(kwargs)
+        return bittensor.NeuronInfo(**neuron)
+
+    def test_from_neurons_sparse_weights_and_bonds(self):
+        n = 50
+        neurons = []
+        for i in range(n):
+            w_uids = random.sample(range(n), random.randint(0, 5))
+            b_uids = random.sample(range(n), random.randint(0, 5))
+            neurons.append(self._neuron(
+                uid = i, rank = random.random(),
+                weights = [ [uid, random.randint(1, 65535)] for uid in w_uids ],
+                bonds = [ [uid, random.randint(1, 2**32)] for uid in b_uids ],
+            ))
+        random.shuffle(neurons)
+        metagraph = bittensor.metagraph.from_neurons( network = "mock", netuid = -1, info = None, neurons = neurons, block = 0 )
+
+        # dense construction row by row, as before the sparse matrices
+        weights = torch.zeros(n, n)
+        bonds = torch.zeros(n, n, dtype=torch.int64)
+        ranks = torch.zeros(n)
+        for neuron in neurons:
+            ranks[neuron.uid] = neuron.rank
+            if len(neuron.weights) > 0:
+                weights[neuron.uid] = weight_utils.convert_weight_uids_and_vals_to_tensor( n, *zip(*neuron.weights) )
+            if len(neuron.bonds) > 0:
+                bonds[neuron.uid] = weight_utils.convert_bond_uids_and_vals_to_tensor( n, *zip(*neuron.bonds) )
+        bonds = torch.nn.functional.normalize( bonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( n ) * 0.5
+
+        assert metagraph.sparse_weights.is_sparse and metagraph.sparse_bonds.is_sparse
+        assert torch.equal(metagraph.W, weights)
+        assert torch.allclose(metagraph.B, bonds)
+        assert torch.equal(metagraph.ranks, ranks)
+        assert metagraph.hotkeys == [ get_mock_hotkey(i + 1) for i in range(n) ]
+
+        # sparse state_dict round trip, and dense state_dict of previous versions
+        state_dict = metagraph.state_dict()
+        assert 'weights' not in state_dict and state_dict['sparse_weights'].is_sparse
+        loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_state_dict( state_dict )
+        assert torch.equal(loaded.W, weights)
+        state_dict['weights'], state_dict['bonds'] = state_dict.pop('sparse_weights').to_dense(), state_dict.pop('sparse_bonds').to_dense()
+        loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_state_dict( state_dict )
+        assert torch.equal(loaded.W, weights) and loaded.sparse_bonds.is_sparse
+
+    def test_key_index(self):
+        neurons = [ self._neuron( uid = i ) for i in range(6) ]
+        neurons[4].coldkey = neurons[1].coldkey  # second hotkey of a coldkey
+        neurons[5].hotkey = neurons[2].hotkey
+        metagraph = bittensor.metagraph.from_neurons( network = "mock", netuid = -1, info = None, neurons = neurons, block = 0 )
+
+        assert metagraph.hotkeys == [ neuron.hotkey for neuron in neurons ]
+        assert metagraph.hotkeys is metagraph.hotkeys  # cached
+        assert metagraph.hotkey_to_uid( neurons[3].hotkey ) == metagraph.hotkeys.index( neurons[3].hotkey ) == 3
+        assert metagraph.hotkey_to_uid( neurons[2].hotkey ) == 2  # first uid, as list.index
+        assert metagraph.hotkey_to_uid( 'unknown' ) == -1 and 'unknown' not in metagraph.hotkeys
+        assert metagraph.coldkey_to_uids( neurons[1].coldkey ) == (1, 4)
+        assert metagraph.coldkey_to_uids( 'unknown' ) == ()
+        with self.assertRaises(ValueError):
+            metagraph.hotkeys.index( 'unknown' )
+        with self.assertRaises(TypeError):
+            metagraph.hotkeys[0] = 'other'
+        assert metagraph.hotkeys + [] == list( metagraph.hotkeys )
+
+        loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_state_dict( metagraph.state_dict() )
+        assert loaded.hotkeys == metagraph.hotkeys
+        assert loaded.coldkey_to_uids( neurons[1].coldkey ) == (1, 4)
+
+    def test_from_neurons_lite(self):
+        neurons = []
+        for i in range(6):
+            neuron = self._neuron( uid = i, rank = random.random() ).__dict__
+            del neuron['weights'], neuron['bonds']
+            neurons.append( bittensor.NeuronInfoLite( **neuron ) )
+        metagraph = bittensor.metagraph.from_neurons_lite( network = "mock", netuid = -1, info = None, neurons = neurons, block = 0 )
+
+        assert metagraph.lite
+        assert metagraph.hotkeys == [ neuron.hotkey for neuron in neurons ]
+        assert torch.equal( metagraph.ranks, torch.tensor( [ neuron.rank for neuron in neurons ] ) )
+        assert metagraph.validator_permit.all()
+        with self.assertRaises(ValueError):
+            metagraph.W
+        with self.assertRaises(ValueError):
+            metagraph.bonds
+
+        # lite state_dict round trip, without weights and bonds
+        state_dict = metagraph.state_dict()
+        assert 'sparse_weights' not in state_dict and 'sparse_bonds' not in state_dict
+        loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_state_dict( state_dict )
+        assert loaded.lite and loaded.hotkeys == metagraph.hotkeys
+
+    def test_columnar_save_and_load(self):
+        neurons = [ self._neuron( uid = i, rank = random.random(), weights = [ [ (i + 1) % 8, 100 ] ], bonds = [ [ i, 7 ] ] ) for i in range(8) ]
+        metagraph = bittensor.metagraph.from_neurons( network = "mock", netuid = -1, info = None, neurons = neurons, block = 12 )
+
+        with tempfile.TemporaryDirectory() as path:
+            metagraph.save_columnar_to_path( path = path, filename = 'mock_-1.mg' )
+            assert os.listdir( path ) == [ 'mock_-1.mg' ]
+            for mmap in [ False, True ]:
+                loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_path( os.path.join( path, 'mock_-1.mg' ), mmap = mmap )
+                assert loaded.block.item() == 12 and loaded.info is None
+                assert loaded.hotkeys == metagraph.hotkeys
+                assert torch.equal( loaded.ranks, metagraph.ranks )
+                assert torch.equal( loaded.endpoints, metagraph.endpoints )
+                assert torch.equal( loaded.validator_permit, metagraph.validator_permit )
+                assert torch.equal( loaded.W, metagraph.W ) and torch.allclose( loaded.B, metagraph.B )
+
+            # state_dicts of previous versions still load
+            metagraph.save_to_path( path = path, filename = 'mock_-1.pt' )
+            loaded = bittensor.metagraph( network = 'finney', netuid = -1 ).load_from_path( os.path.join( path, 'mock_-1.pt' ), mmap = True )
+            assert torch.equal( loaded.W, metagraph.W )
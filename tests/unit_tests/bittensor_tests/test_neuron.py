@@ -1,5 +1,9 @@
 from atexit import register
 from types import SimpleNamespace
+import math
+import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 from more_itertools import side_effect
@@ -186,7 +190,89 @@ class TestCoreServer(unittest.TestCase):
             mock_register.assert_called_once()
 
 
+class TestModelOutputCache(unittest.TestCase):
+    def _model_output(self, batch_size=2, seq_len=4, vocab_size=8, hidden=3):
+        return SimpleNamespace(logits=torch.rand(batch_size, seq_len, vocab_size),
+                               hidden_states=(torch.rand(batch_size, seq_len, hidden),))
+
+    def test_hit_returns_cached_tensors(self):
+        cache = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=10 ** 6, ttl=60)
+        input_ids = torch.randint(0, 100, (2, 4))
+        model_output = self._model_output()
+
+        assert cache.get(input_ids) is None
+        cache.put(input_ids, model_output)
+        cached = cache.get(input_ids.clone())
+
+        assert torch.equal(cached.logits, model_output.logits)
+        assert torch.equal(cached.hidden_states[-1], model_output.hidden_states[-1])
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_attention_mask_in_key(self):
+        cache = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=10 ** 6, ttl=60)
+        input_ids = torch.randint(0, 100, (2, 4))
+        attention_mask = torch.ones(2, 4, dtype=torch.long)
+        padded_mask = attention_mask.clone()
+        padded_mask[:, -1] = 0
+
+        cache.put(input_ids, self._model_output(), attention_mask)
+        assert cache.get(input_ids) is None  # output computed without a mask
+        assert cache.get(input_ids, padded_mask) is None
+        assert cache.get(input_ids, attention_mask.clone()) is not None
+
+    def test_lru_eviction_under_budget(self):
+        model_output = self._model_output()
+        entry_bytes = 4 * (model_output.logits.nelement() + model_output.hidden_states[-1].nelement())
+        cache = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=2 * entry_bytes, ttl=60)
+        inputs = [torch.full((2, 4), i) for i in range(3)]
+
+        cache.put(inputs[0], model_output)
+        cache.put(inputs[1], model_output)
+        cache.get(inputs[0])  # inputs[1] is now least recently used
+        cache.put(inputs[2], model_output)
+
+        assert len(cache) == 2
+        assert cache.total_bytes <= cache.max_bytes
+        assert cache.get(inputs[1]) is None
+        assert cache.get(inputs[0]) is not None
+
+    def test_expiry_in_insertion_order(self):
+        cache = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=10 ** 6, ttl=60)
+        inputs = [torch.full((2, 4), i) for i in range(3)]
+        for input_ids in inputs:
+            cache.put(input_ids, self._model_output())
+        cache.get(inputs[0])  # most recently used, still the oldest insertion
+        with patch('time.time', return_value=time.time() + 120):
+            assert cache.get(inputs[2]) is None
+        assert len(cache) == 0 and len(cache.inserted) == 0 and cache.total_bytes == 0
+
+        cache.put(inputs[0], self._model_output())
+        cache.clear()
+        assert cache.get(inputs[0]) is None and len(cache.inserted) == 0
+
+    def test_ttl_expiry_and_disabled(self):
+        input_ids = torch.randint(0, 100, (2, 4))
+        cache = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=10 ** 6, ttl=0)
+        cache.put(input_ids, self._model_output())
+        time.sleep(0.01)
+        assert cache.get(input_ids) is None
+        assert cache.total_bytes == 0
+
+        disabled = bittensor._neuron.text.core_server.nucleus_impl.ModelOutputCache(max_bytes=0, ttl=60)
+        disabled.put(input_ids, self._model_output())
+        assert disabled.get(input_ids) is None
+
+
 class TestCoreValidator(unittest.TestCase):
+    def test_nucleus_missing_subnet_hyperparameters(self):
+        core_validator = bittensor._neuron.text.core_validator
+        config = core_validator.neuron.config()
+        config.netuid = 99
+        subtensor = MagicMock()
+        subtensor.get_subnet_hyperparameters.return_value = None
+        with self.assertRaisesRegex(ValueError, 'netuid: 99'):
+            core_validator.nucleus(config=config, device='cpu', subtensor=subtensor, vlogger=MagicMock())
+
     def test_corevalidator_reregister_flag_false_exit(self):
         config = bittensor.Config()
         config.neuron = bittensor.neurons.core_server.neuron.config()
@@ -387,5 +473,516 @@ class TestBlacklist(unittest.TestCase):
             assert blacklist(mock_hotkey_1, bittensor.proto.RequestType.FORWARD) == False
 
 
+class TestValidatorShapleySynergy(unittest.TestCase):
+    @staticmethod
+    def _reference_synergy(stats, measured, ext, scaling_law_power):
+        # pairwise loop of the original implementation, for equivalence checks
+        scaling_law_loss_to_params = bittensor._neuron.text.core_validator.scaling_law_loss_to_params
+        responsives = [uid for uid, stat in stats.items() if 'loss' + ext in stat]
+        for _first, first in stats.items():
+            for _second, second in stats.items():
+                if _second <= _first:
+                    continue
+                expected_loss = torch.min(first['loss' + ext], second['loss' + ext])
+                measured_loss = measured(first, second)
+                loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2 / len(responsives)
+                first['synergy_loss_diff' + ext] += loss_diff_share
+                second['synergy_loss_diff' + ext] += loss_diff_share
+                synergy_share = torch.clamp(torch.pow(scaling_law_loss_to_params(measured_loss), scaling_law_power) -
+                                            torch.pow(scaling_law_loss_to_params(expected_loss), scaling_law_power), 0) / 2
+                synergy_share /= len(responsives)
+                first['synergy' + ext] += synergy_share
+                second['synergy' + ext] += synergy_share
+
+    def _assert_matches(self, stats, reference, ext):
+        for uid in stats:
+            for key in ['synergy' + ext, 'synergy_loss_diff' + ext]:
+                assert torch.allclose(torch.as_tensor(stats[uid][key]), torch.as_tensor(reference[uid][key]),
+                                      rtol=1e-4, atol=1e-6)
+
+    def test_textcausallm_synergy_matches_pairwise(self):
+        batch_size, seq_len, vocab_size = 2, 5, 11
+        target = torch.randint(0, vocab_size, (batch_size, seq_len))
+        loss_fct = torch.nn.CrossEntropyLoss()
+        stats, reference = {}, {}
+        for uid in [7, 3, 12, 5]:
+            logits = torch.randn(batch_size, seq_len, vocab_size) * 3
+            loss = loss_fct(logits.view(-1, vocab_size), target.view(-1))
+            stats[uid] = {'logits': logits, 'loss': loss, 'synergy': 0, 'synergy_loss_diff': 0}
+            reference[uid] = {'logits': logits, 'loss': loss, 'synergy': 0, 'synergy_loss_diff': 0}
+
+        def _measured(first, second):
+            combined_logits = torch.log((torch.softmax(first['logits'], dim=-1) +
+                                         torch.softmax(second['logits'], dim=-1)) / 2 + 1e-40)
+            return loss_fct(combined_logits.view(-1, vocab_size), target.view(-1))
+
+        def _synergy(responsives, _target, _ext):
+            _target = _target.reshape(-1, 1)
+            return torch.stack([torch.softmax(s['logits'].reshape(_target.shape[0], -1), dim=-1).gather(1, _target).squeeze(1)
+                                for s in responsives])
+
+        self._reference_synergy(reference, _measured, '', scaling_law_power=0.5)
+        syn_loss_diff = bittensor._neuron.text.core_validator.shapley_synergy(stats, _synergy, '', target=target,
+                                                                               scaling_law_power=0.5, max_block_bytes=64)
+        self._assert_matches(stats, reference, '')
+        assert set(syn_loss_diff[3].keys()) == {3, 5, 7, 12}
+
+    def test_textcausallmnext_synergy_matches_pairwise(self):
+        stats, reference = {}, {}
+        for uid in range(9):
+            losses = torch.rand(4) * 6
+            stats[uid] = {'losses_nxt': losses, 'loss_nxt': losses.mean(), 'synergy_nxt': 0, 'synergy_loss_diff_nxt': 0}
+            reference[uid] = {'losses_nxt': losses, 'loss_nxt': losses.mean(), 'synergy_nxt': 0, 'synergy_loss_diff_nxt': 0}
+        stats[9] = {'uid': 9}  # unresponsive endpoint is skipped
+        reference[9] = {'uid': 9}
+
+        def _measured(first, second):
+            return -torch.log((torch.exp(-first['losses_nxt']) + torch.exp(-second['losses_nxt'])) / 2 + 1e-40).mean()
+
+        def _synergy(responsives, target, ext):
+            return torch.stack([torch.exp(-s['losses_nxt']) for s in responsives])
+
+        self._reference_synergy({uid: s for uid, s in reference.items() if 'loss_nxt' in s}, _measured, '_nxt', 0.5)
+        bittensor._neuron.text.core_validator.shapley_synergy(stats, _synergy, '_nxt', scaling_law_power=0.5,
+                                                              max_block_bytes=3 * 3 * 4 * 4)
+        self._assert_matches({uid: s for uid, s in stats.items() if 'loss_nxt' in s}, reference, '_nxt')
+        assert 'synergy_nxt' not in stats[9]
+
+class TestValidatorLogitsDivergence(unittest.TestCase):
+    @staticmethod
+    def _topk_tensor(batch_size, topk, token_pool):
+        topk_tensor = torch.full((batch_size, topk + 1, 3), -100.)
+        probs = torch.rand(batch_size, topk)
+        topk_tensor[:, :-1, 0] = 0.9 * probs / probs.sum(dim=-1, keepdim=True)
+        topk_tensor[:, :-1, 1] = torch.randint(0, token_pool, (batch_size, topk)).float()
+        topk_tensor[:, -1, 0] = 1e-6  # floor probability
+        return topk_tensor
+
+    def test_sparse_divergence_matches_dense(self):
+        topk_tokens_to_vocab_size = bittensor.utils.tokenizer_utils.topk_tokens_to_vocab_size
+        responses = [self._topk_tensor(4, topk, token_pool=20) for topk in [5, 8, 3, 10]]
+        responses += [responses[1].clone()]
+        responses += [torch.zeros(2, 4, 3)]  # mismatched batch size is skipped
+        uids = torch.arange(len(responses))
+        return_ops = [torch.tensor([bittensor.proto.ReturnCode.Success]) for _ in responses]
+        times = [torch.tensor([0.1]) for _ in responses]
+        stats = {uid: {} for uid in range(len(responses))}
+
+        bittensor._neuron.text.core_validator.logits_divergence(stats, uids, [[r] for r in responses],
+                                                                return_ops, times, ext='_nxt')
+
+        # dense reference over the full vocabulary
+        probs = [topk_tokens_to_vocab_size(r, bittensor.__vocab_size__) for r in responses[:-1]]
+        probs_avg_sqrt = (sum(probs) / len(probs)).sqrt()
+        divergences = torch.stack([(0.5 * torch.pow(p.sqrt() - probs_avg_sqrt, 2).sum(dim=1)).sqrt() for p in probs])
+        avg, std = divergences.mean(dim=0), divergences.std(dim=0)
+        excess = torch.clamp(torch.pow(torch.clamp(divergences - (avg + std), 0) / (std + 1e-9), 3), 0, 10).mean(dim=1)
+
+        for uid in range(len(probs)):
+            assert torch.isclose(stats[uid]['logits_divergence_nxt'], divergences[uid].mean(), atol=1e-5)
+            assert torch.isclose(stats[uid]['logits_excess_nxt'], excess[uid], atol=1e-4)
+        assert stats[len(responses) - 1] == {}
+
+class TestValidatorQuery(unittest.TestCase):
+    @staticmethod
+    def _nucleus(seed):
+        core_validator = bittensor._neuron.text.core_validator
+        config = core_validator.neuron.config()
+        config.neuron.validation_len = 2
+        config.neuron.prune_len = 0
+        config.nucleus.topk = 3
+        nucleus = MagicMock()
+        nucleus.config = config
+        nucleus.device = 'cpu'
+        nucleus.permute_uids = []
+        nucleus.permute_generator = torch.Generator().manual_seed(seed)
+        nucleus.query_step = 0
+        nucleus.endpoint_failures = torch.zeros(0, dtype=torch.long)
+        nucleus.endpoint_cooldown = torch.zeros(0, dtype=torch.long)
+        for method in ['available_uids', 'update_endpoint_failures', '_resize_endpoint_failures']:
+            setattr(nucleus, method, getattr(core_validator.nucleus, method).__get__(nucleus))
+        nucleus._dendrite_query = lambda dendrite, endpoints, inputs_seq, synapses: [e for e in endpoints]
+        return nucleus
+
+    @staticmethod
+    def _metagraph(n, serving=None):
+        serving = range(n) if serving is None else serving
+        return SimpleNamespace(n=torch.tensor(n), endpoints=list(range(n)),
+                               endpoint_objs=[SimpleNamespace(is_serving=uid in serving) for uid in range(n)])
+
+    def test_query_permutation_independent_of_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        query = bittensor._neuron.text.core_validator.nucleus.query
+        metagraph = self._metagraph(8)
+        inputs = torch.randint(0, 100, (2, 16))
+
+        serial, pipelined = self._nucleus(seed=7), self._nucleus(seed=7)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for _ in range(6):
+                serial_request = query(serial, inputs, metagraph, None)
+                pipelined_request = query(pipelined, inputs, metagraph, None, executor=executor)
+                assert serial_request.future is None
+                assert torch.equal(serial_request.uids, pipelined_request.uids)
+                assert pipelined_request.future.result() == serial_request.responses
+                assert serial_request.inputs_seq.shape[-1] == serial_request.inputs.shape[-1] - 2
+
+    def test_query_covers_all_uids_before_repeating(self):
+        query = bittensor._neuron.text.core_validator.nucleus.query
+        metagraph = self._metagraph(9)
+        nucleus = self._nucleus(seed=0)
+        uids = torch.cat([query(nucleus, torch.randint(0, 100, (2, 16)), metagraph, None).uids for _ in range(3)])
+        assert sorted(uids.tolist()) == list(range(9))
+
+    def test_query_skips_unserving_uids(self):
+        query = bittensor._neuron.text.core_validator.nucleus.query
+        serving = [0, 2, 3, 5, 8, 9]
+        metagraph = self._metagraph(12, serving=serving)
+        nucleus = self._nucleus(seed=1)
+        requests = [query(nucleus, torch.randint(0, 100, (2, 16)), metagraph, None) for _ in range(2)]
+        assert all(len(request.uids) == 3 for request in requests)
+        uids = torch.cat([request.uids for request in requests]).tolist()
+        skipped = torch.cat([request.skipped_uids for request in requests]).tolist()
+        assert sorted(uids) == serving
+        assert set(skipped) <= set(range(12)) - set(serving)
+        assert len(nucleus.permute_uids) + len(skipped) + len(uids) == 12  # each UID covered once per permutation
+
+    def test_failure_cooldown(self):
+        query = bittensor._neuron.text.core_validator.nucleus.query
+        metagraph = self._metagraph(4)
+        nucleus = self._nucleus(seed=2)
+        nucleus.config.nucleus.topk = 4
+        nucleus.config.nucleus.failure_threshold = 2
+        nucleus.config.nucleus.failure_cooldown = 3
+        unavailable = torch.tensor([bittensor.proto.ReturnCode.Unavailable])
+        success = torch.tensor([bittensor.proto.ReturnCode.Success])
+
+        for _ in range(2):
+            request = query(nucleus, torch.randint(0, 100, (2, 16)), metagraph, None)
+            nucleus.update_endpoint_failures(request.uids, [unavailable if uid == 1 else success for uid in request.uids])
+
+        for _ in range(3):  # uid 1 in cooldown
+            request = query(nucleus, torch.randint(0, 100, (2, 16)), metagraph, None)
+            assert 1 not in request.uids.tolist() and request.skipped_uids.tolist() == [1]
+
+        request = query(nucleus, torch.randint(0, 100, (2, 16)), metagraph, None)
+        assert 1 in request.uids.tolist()
+
+class TestValidatorNeuronStats(unittest.TestCase):
+    alpha = 0.1
+    synapse_keys = ['shapley_values_nxt']
+
+    def _reference_update(self, neuron_stats, batch):
+        # dict of dicts update as before the columnar store
+        scaling_law_loss_to_params = bittensor._neuron.text.core_validator.scaling_law_loss_to_params
+        responsive_uids = []
+        for _uid, _stats in batch.items():
+            stats = neuron_stats.setdefault(_uid, {})
+            for key in _stats:
+                if math.isnan(_stats[key]):
+                    continue
+                stats[key] = (1 - self.alpha) * stats[key] + self.alpha * _stats[key] if key in stats else _stats[key]
+            extra_stats = {}
+            if 'loss_nxt' in _stats and 'loss_nxt' in stats:
+                _num_params = scaling_law_loss_to_params(torch.tensor(stats['loss_nxt']))
+                _pow_num_params = torch.pow(_num_params, 0.5)
+                extra_stats.update({'est_params_nxt': _num_params.item(), 'base_params_nxt': _pow_num_params.item()})
+                if 'synergy_nxt' in stats:
+                    extra_stats['shapley_values_nxt'] = extra_stats['base_params_nxt'] + stats['synergy_nxt']
+                    if 'logits_excess_nxt' in stats:
+                        extra_stats['shapley_values_nxt'] /= 1 + 2. * stats['logits_excess_nxt']
+            stats['updates!'] = stats.get('updates!', 0) + 1
+            for key in self.synapse_keys:
+                zkey = key + '!'
+                stats.setdefault(zkey, 0.)
+                if key in _stats and not math.isnan(_stats[key]):
+                    responsive_uids += [_uid]
+                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * _stats[key]
+                elif key in extra_stats and not math.isnan(extra_stats[key]):
+                    responsive_uids += [_uid]
+                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * extra_stats[key]
+                else:
+                    stats[zkey] = (1 - self.alpha) * stats[zkey]
+            for key in self.synapse_keys:
+                if key in _stats or key in extra_stats:
+                    stats['updates_' + key] = stats.get('updates_' + key, 0) + 1
+            for key in extra_stats:
+                if not math.isnan(extra_stats[key]):
+                    stats[key] = (1 - self.alpha) * stats[key] + self.alpha * extra_stats[key] if key in stats else extra_stats[key]
+        return responsive_uids
+
+    @staticmethod
+    def _batch(n, topk):
+        batch = {}
+        for uid in torch.randperm(n)[:topk].tolist():
+            if torch.rand(1) < 0.3:  # non-responsive
+                batch[uid] = {'uid': uid, 'response_time_nxt': 12.}
+                continue
+            batch[uid] = {'uid': uid, 'response_time_nxt': torch.rand(1).item(),
+                          'loss_nxt': 2 + 4 * torch.rand(1).item(),
+                          'synergy_nxt': float('nan') if torch.rand(1) < 0.2 else 100 * torch.rand(1).item(),
+                          'logits_excess_nxt': torch.tensor(torch.rand(1).item())}
+        return batch
+
+    def test_update_matches_dict_of_dicts(self):
+        neuron = MagicMock()
+        neuron.alpha = self.alpha
+        neuron.synapse_keys = self.synapse_keys
+        neuron.config.nucleus.scaling_law_power = 0.5
+        neuron.config.nucleus.logits_divergence = 2.
+        neuron.neuron_stats = bittensor._neuron.text.core_validator.NeuronStats(n=16)
+        update = bittensor._neuron.text.core_validator.neuron.neuron_stats_update
+
+        reference = {}
+        for _ in range(20):
+            batch = self._batch(24, 6)
+            reference_responsive = self._reference_update(reference, batch)
+            responsive, queried = update(neuron, batch)
+            assert responsive == reference_responsive
+            assert queried == list(batch.keys())
+
+        assert sorted(neuron.neuron_stats.keys()) == sorted(reference.keys())
+        for uid, stats in reference.items():
+            assert set(neuron.neuron_stats[uid].keys()) == set(stats.keys())
+            for key, value in stats.items():
+                assert math.isclose(neuron.neuron_stats[uid][key], float(value), rel_tol=1e-5), (uid, key)  # reference scaling law in float32
+
+    def test_dict_view_round_trip(self):
+        NeuronStats = bittensor._neuron.text.core_validator.NeuronStats
+        stats = NeuronStats.from_dict({3: {'updates!': 2, 'loss_nxt': 3.5}, 7: {'loss_nxt': 2.5}})
+        assert stats.n == 8 and len(stats) == 2 and 3 in stats and 4 not in stats
+        assert stats[3] == {'updates!': 2, 'loss_nxt': 3.5}
+        del stats[3]
+        assert 3 not in stats and stats.to_dict() == {7: {'loss_nxt': 2.5}}
+        stats.resize(10)
+        values, valid = stats.column('loss_nxt')
+        assert len(values) == 10 and valid.tolist() == [i == 7 for i in range(10)]
+
+class TestValidatorCheckpoint(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _update(stats, uids):
+        uids = torch.tensor(uids)
+        stats.add(uids)
+        stats.ema('loss_nxt', uids, torch.rand(len(uids), dtype=torch.float64), 0.1)
+        stats.increment('updates!', uids)
+
+    def test_journal_replay(self):
+        core_validator = bittensor._neuron.text.core_validator
+        stats = core_validator.NeuronStats(n=8)
+        hotkeys = [f'hk{i}' for i in range(8)]
+        changes = {}
+        checkpoint = core_validator.ValidatorCheckpoint(self.path, compact_every=10)
+
+        self._update(stats, [0, 1, 2])
+        checkpoint.write(stats, hotkeys, changes)  # snapshot
+        self._update(stats, [2, 5])
+        checkpoint.write(stats, hotkeys, changes)  # journal record
+        del stats[1]
+        hotkeys = hotkeys[:6] + ['new6'] + hotkeys[7:] + ['hk8']
+        changes[6] = {123: {'new_hotkey': 'new6', 'old_hotkey': 'hk6'}}
+        checkpoint.write(stats, hotkeys, changes)  # journal record
+        checkpoint.close()
+        assert os.path.getsize(os.path.join(self.path, 'journal.bin')) > 0
+
+        state = core_validator.ValidatorCheckpoint(self.path).load()
+        assert state.neuron_stats.to_dict() == stats.to_dict()
+        assert state.neuron_hotkeys == hotkeys
+        assert state.neuron_changes == changes
+
+    def test_torn_journal_record(self):
+        core_validator = bittensor._neuron.text.core_validator
+        stats = core_validator.NeuronStats(n=4)
+        checkpoint = core_validator.ValidatorCheckpoint(self.path)
+        self._update(stats, [0, 1])
+        checkpoint.write(stats, ['a', 'b', 'c', 'd'])
+        self._update(stats, [1])
+        checkpoint.write(stats, ['a', 'b', 'c', 'd'])
+        checkpoint.flush()
+        expected = stats.to_dict()
+        self._update(stats, [3])
+        checkpoint.write(stats, ['a', 'b', 'c', 'd'])
+        checkpoint.close()
+
+        journal = os.path.join(self.path, 'journal.bin')
+        with open(journal, 'r+b') as f:
+            f.truncate(os.path.getsize(journal) - 5)  # crash while appending the last record
+
+        checkpoint = core_validator.ValidatorCheckpoint(self.path)
+        assert checkpoint.load().neuron_stats.to_dict() == expected
+        assert checkpoint.records is None  # compacts on the next write
+        checkpoint.close()
+
+    def test_failed_record_forces_snapshot(self):
+        core_validator = bittensor._neuron.text.core_validator
+        stats = core_validator.NeuronStats(n=4)
+        checkpoint = core_validator.ValidatorCheckpoint(self.path)
+        self._update(stats, [0])
+        checkpoint.write(stats, ['a', 'b', 'c', 'd'])  # snapshot
+        checkpoint.flush()
+        self._update(stats, [1])
+        with patch.object(core_validator.checkpoint.pickle, 'dumps', side_effect=OSError('disk full')):
+            checkpoint.write(stats, ['a', 'b', 'c', 'd'])  # journal record fails
+            checkpoint.flush()
+        self._update(stats, [2])
+        checkpoint.write(stats, ['a', 'b', 'c', 'd'])  # snapshot including the rows of the failed record
+        assert checkpoint.records == 0
+        checkpoint.close()
+
+        assert core_validator.ValidatorCheckpoint(self.path).load().neuron_stats.to_dict() == stats.to_dict()
+
+    def test_compaction(self):
+        core_validator = bittensor._neuron.text.core_validator
+        stats = core_validator.NeuronStats(n=4)
+        checkpoint = core_validator.ValidatorCheckpoint(self.path, compact_every=2)
+        for uid in range(4):
+            self._update(stats, [uid])
+            checkpoint.write(stats, ['a', 'b', 'c', 'd'])  # snapshot, 2 records, snapshot
+        checkpoint.close()
+
+        assert os.path.getsize(os.path.join(self.path, 'journal.bin')) == 0
+        assert not os.path.exists(os.path.join(self.path, 'model.torch.tmp'))
+        checkpoint = core_validator.ValidatorCheckpoint(self.path)
+        assert checkpoint.load().neuron_stats.to_dict() == stats.to_dict()
+        assert checkpoint.seq == 4 and checkpoint.records == 0
+        checkpoint.close()
+
+    def test_load_dict_of_dicts(self):
+        core_validator = bittensor._neuron.text.core_validator
+        neuron_stats = {2: {'uid': 2, 'updates!': 3, 'loss_nxt': 2.5}}
+        torch.save({'neuron_stats': neuron_stats, 'neuron_hotkeys': ['a', 'b', 'c']}, os.path.join(self.path, 'model.torch'))
+        checkpoint = core_validator.ValidatorCheckpoint(self.path)
+        state = checkpoint.load()
+        assert state.neuron_stats.to_dict() == neuron_stats and state.neuron_hotkeys == ['a', 'b', 'c']
+        assert checkpoint.records is None
+        checkpoint.close()
+
+class TestValidatorReplay(unittest.TestCase):
+    def test_replay_matches_scoring(self):
+        import tempfile
+        core_validator = bittensor._neuron.text.core_validator
+        topk_tensor = TestValidatorLogitsDivergence._topk_tensor
+        responses = [[topk_tensor(2, 4, token_pool=50)] for _ in range(3)] + [[torch.zeros(2, 5, 3)]]
+        return_ops = [torch.tensor([bittensor.proto.ReturnCode.Success]) for _ in range(3)]
+        return_ops += [torch.tensor([bittensor.proto.ReturnCode.Unavailable])]
+        validation_params = {
+            'uids': torch.tensor([4, 0, 7, 2]),
+            'query_responses': responses,
+            'return_ops': return_ops,
+            'times': [torch.tensor([0.1]) for _ in responses],
+            'routing_score': torch.rand(8, requires_grad=True),
+            'inputs': torch.randint(0, 50, (2, 12)),
+            'validation_len': 2,
+            'loss_fct': torch.nn.CrossEntropyLoss(),
+            'logits_divergence_penalty': 2.,
+            'scaling_law_power': 0.5,
+            'synergy_scaling_law_power': 0.6,
+            'vlogger': None,
+            'logging': False,
+        }
+        synapses = [(bittensor.synapse.TextCausalLMNext(), core_validator.textcausallmnext)]
+        loss, stats = core_validator.textcausallmnext(**validation_params, synapse=synapses[0][0], index_s=0)
+
+        with tempfile.TemporaryDirectory() as path:
+            recorder = core_validator.ValidationRecorder(path)
+            recorder.record(synapses, validation_params)
+            recorder.record(synapses, validation_params)
+            recorder.close()
+            assert sorted(os.listdir(path)) == ['00000000.pt', '00000001.pt']
+
+            profiler = core_validator.replay.StageProfiler()
+            results = core_validator.replay.replay(path, profiler=profiler)
+
+        assert len(results) == 2
+        replay_loss, replay_stats = results[0]
+        assert torch.isclose(replay_loss, loss)
+        assert replay_stats.keys() == stats.keys()
+        for uid in stats:
+            for key, value in stats[uid].items():
+                assert torch.allclose(torch.as_tensor(replay_stats[uid][key]), torch.as_tensor(value), equal_nan=True)
+        assert profiler.stages['TextCausalLMNext']['calls'] == 2
+        assert profiler.stages['shapley_base']['calls'] == 2
+        assert core_validator.shapley_base.__name__ == 'shapley_base'  # stage wrappers are removed
+
+    def test_compressed_textcausallm_logits(self):
+        replay = bittensor._neuron.text.core_validator.replay
+        logits = torch.randn(2, 5, 100) * 3
+        encoded = replay.compress_logits(logits, topk=10)
+        decoded = replay.decompress_logits(encoded)
+
+        assert decoded.shape == logits.shape and encoded['values'].dtype == torch.float16
+        values, indices = logits.topk(10, dim=-1)
+        assert torch.equal(decoded.gather(-1, indices), values.half().float())  # topk kept in fp16
+        assert torch.allclose(decoded.softmax(-1).sum(-1), torch.ones(2, 5), atol=1e-2)  # tail keeps its mass
+        assert torch.allclose(decoded.softmax(-1).gather(-1, indices), logits.softmax(-1).gather(-1, indices), atol=1e-2)
+        assert replay.compress_logits(torch.randn(2, 5, 8), topk=10).dtype == torch.float16  # small vocab, dense
+
+    def test_recorder_drops_when_writes_lag(self):
+        import tempfile
+        core_validator = bittensor._neuron.text.core_validator
+        validation_params = {
+            'uids': torch.tensor([0]), 'query_responses': [[torch.randn(2, 4, 20)]],
+            'return_ops': [torch.tensor([bittensor.proto.ReturnCode.Success])], 'times': [torch.tensor([0.1])],
+            'routing_score': torch.rand(1), 'inputs': torch.randint(0, 20, (2, 4)), 'validation_len': 2,
+            'logits_divergence_penalty': 2., 'scaling_law_power': 0.5, 'synergy_scaling_law_power': 0.6,
+        }
+        synapses = [(bittensor.synapse.TextCausalLM(), core_validator.textcausallm)]
+        with tempfile.TemporaryDirectory() as path:
+            recorder = core_validator.ValidationRecorder(path, topk=5, max_pending=2)
+            written = threading.Event()
+            with patch.object(core_validator.replay.torch, 'save', side_effect=lambda *args: written.wait(5)):
+                for _ in range(4):
+                    recorder.record(synapses, validation_params)
+                assert recorder.dropped == 2 and recorder.pending == 2
+                written.set()
+                recorder.close()
+            assert recorder.pending == 0 and recorder.index == 2
+
+class TestValidatorScoringPool(unittest.TestCase):
+    def test_pool_scoring_matches_in_process(self):
+        core_validator = bittensor._neuron.text.core_validator
+        topk_tensor = TestValidatorLogitsDivergence._topk_tensor
+        responses = [[topk_tensor(2, 4, token_pool=50)] for _ in range(5)] + [[torch.zeros(2, 5, 3)]]
+        return_ops = [torch.tensor([bittensor.proto.ReturnCode.Success]) for _ in range(5)]
+        return_ops += [torch.tensor([bittensor.proto.ReturnCode.Unavailable])]
+        validation_params = {
+            'uids': torch.tensor([4, 0, 7, 2, 9, 5]),
+            'query_responses': responses,
+            'return_ops': return_ops,
+            'times': [torch.tensor([0.1]) for _ in responses],
+            'routing_score': torch.rand(10, requires_grad=True),
+            'inputs': torch.randint(0, 50, (2, 12)),
+            'validation_len': 2,
+            'loss_fct': torch.nn.CrossEntropyLoss(),
+            'logits_divergence_penalty': 2.,
+            'scaling_law_power': 0.5,
+            'synergy_scaling_law_power': 0.6,
+            'vlogger': None,
+            'logging': False,
+            'synapse': bittensor.synapse.TextCausalLMNext(),
+        }
+        loss, stats = core_validator.textcausallmnext(**validation_params)
+
+        scoring_pool = core_validator.ScoringPool(num_workers=2)
+        try:
+            pool_loss, pool_stats = core_validator.textcausallmnext(**validation_params, scoring_pool=scoring_pool)
+            pool_losses = scoring_pool.map(core_validator.textcausallmnext_losses, validation_params['uids'],
+                                           responses, return_ops, inputs_nxt=validation_params['inputs'][..., -2:])
+        finally:
+            scoring_pool.close()
+
+        assert sorted(pool_losses.keys()) == [0, 2, 4, 7, 9]  # successful responses only
+        assert torch.isclose(pool_loss, loss)
+        assert pool_stats.keys() == stats.keys()
+        for uid in stats:
+            for key, value in stats[uid].items():
+                assert torch.allclose(torch.as_tensor(pool_stats[uid][key]), torch.as_tensor(value), equal_nan=True)
+
 if __name__ == '__main__':
     unittest.main()
@@ -16,12 +16,19 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import asyncio
+import dataclasses
+import json
+import threading
+import time
 import unittest.mock as mock
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 import pytest
 
 import bittensor
 import unittest
+from tests.helpers import get_mock_neuron_by_uid
 
 class TestSubtensorWithExternalAxon(unittest.TestCase):
     """
@@ -182,5 +189,691 @@ class TestStakeMultiple(unittest.TestCase):
             self.assertEqual(kwargs['call_function'], 'add_stake')
             self.assertAlmostEqual(kwargs['call_params']['ammount_staked'], mock_amount.rao, delta=1.0 * 1e9) # delta of 1.0 TAO
 
+    def _mock_batch_subtensor(self, weight: int):
+        coldkey_ss58 = "5DD26kC2kxajmwfbbZmVmxhrY9VeeyR1Gpzy9i8wxLUg6zxm"
+        substrate = MagicMock(
+            compose_call=MagicMock(side_effect=lambda **kwargs: kwargs),
+            get_payment_info=MagicMock(return_value={ 'weight': weight }),
+            get_constant=MagicMock(return_value=MagicMock(value={ 'per_class': { 'normal': { 'max_extrinsic': 1000 } } })),
+            submit_extrinsic=MagicMock(return_value=MagicMock(is_success=True)),
+        )
+        mock_subtensor = MagicMock(
+            spec=bittensor.Subtensor,
+            network="mock",
+            get_balance=MagicMock(return_value=bittensor.Balance.from_tao(10.0)),
+            get_stake_for_coldkey_and_hotkey=MagicMock(return_value=bittensor.Balance.from_tao(1.0)),
+            get_hotkey_owner=MagicMock(return_value=coldkey_ss58),
+            get_current_block=MagicMock(return_value=100),
+            substrate=MagicMock(__enter__=MagicMock(return_value=substrate)),
+        )
+        mock_wallet = MagicMock(
+            spec=bittensor.Wallet,
+            coldkey=MagicMock(),
+            coldkeypub=MagicMock(ss58_address=coldkey_ss58),
+            hotkey=MagicMock(ss58_address="5CtstubuSoVLJGCXkiWRNKrrGg2DVBZ9qMs2qYTLsZR4q1Wg"),
+        )
+        return mock_subtensor, mock_wallet, substrate
+
+    def test_stake_multiple_batch(self):
+        mock_subtensor, mock_wallet, substrate = self._mock_batch_subtensor(weight = 500)
+        hotkey_ss58s = [ "5CtstubuSoVLJGCXkiWRNKrrGg2DVBZ9qMs2qYTLsZR4q1Wg", "5DD26kC2kxajmwfbbZmVmxhrY9VeeyR1Gpzy9i8wxLUg6zxm" ]
+
+        assert bittensor.Subtensor.add_stake_multiple(
+            mock_subtensor,
+            wallet=mock_wallet,
+            hotkey_ss58s=hotkey_ss58s,
+            amounts=[ bittensor.Balance.from_tao(1.0), bittensor.Balance.from_tao(2.0) ],
+            batch=True,
+        )
+
+        # A single batch_all extrinsic holds both stakes.
+        substrate.submit_extrinsic.assert_called_once()
+        _, kwargs = substrate.create_signed_extrinsic.call_args
+        self.assertEqual(kwargs['call']['call_module'], 'Utility')
+        self.assertEqual(kwargs['call']['call_function'], 'batch_all')
+        calls = kwargs['call']['call_params']['calls']
+        self.assertEqual([ call['call_function'] for call in calls ], [ 'add_stake', 'add_stake' ])
+        self.assertEqual([ call['call_params']['hotkey'] for call in calls ], hotkey_ss58s)
+
+        # The post-state is read at a single block.
+        for _, kwargs in mock_subtensor.get_stake_for_coldkey_and_hotkey.call_args_list[2:]:
+            self.assertEqual(kwargs['block'], 100)
+
+    def test_unstake_multiple_batch_exceeds_weight(self):
+        mock_subtensor, mock_wallet, substrate = self._mock_batch_subtensor(weight = 5000)
+        hotkey_ss58s = [ "5CtstubuSoVLJGCXkiWRNKrrGg2DVBZ9qMs2qYTLsZR4q1Wg", "5DD26kC2kxajmwfbbZmVmxhrY9VeeyR1Gpzy9i8wxLUg6zxm" ]
+
+        assert bittensor.Subtensor.unstake_multiple(
+            mock_subtensor,
+            wallet=mock_wallet,
+            hotkey_ss58s=hotkey_ss58s,
+            amounts=[ bittensor.Balance.from_tao(0.5), bittensor.Balance.from_tao(0.5) ],
+            batch=True,
+        )
+
+        # The batch is not submitted, each unstake is submitted in turn.
+        self.assertEqual(substrate.submit_extrinsic.call_count, 2)
+        for _, kwargs in substrate.create_signed_extrinsic.call_args_list:
+            self.assertEqual(kwargs['call']['call_function'], 'remove_stake')
+
+class TestGetSubnetHyperparameters(unittest.TestCase):
+    """
+    Test reading all validator hyper parameters in one batched storage query
+    """
+    storage = {
+        'NetworksAdded': True, 'ValidatorBatchSize': 32, 'ValidatorSequenceLength': 256, 'ValidatorPruneLen': 1,
+        'ValidatorLogitsDivergence': 1310, 'ValidatorEpochsPerReset': 60, 'ValidatorEpochLen': 100,
+        'ValidatorExcludeQuantile': 6553, 'MinAllowedWeights': 1024, 'MaxWeightsLimit': 1000,
+        'ScalingLawPower': 50, 'SynergyScalingLawPower': 50, 'MaxAllowedUids': 4096,
+    }
+
+    def _mock_subtensor(self, storage):
+        substrate = MagicMock(
+            get_chain_head=MagicMock(return_value='0xhead'),
+            get_block_number=MagicMock(return_value=123),
+            create_storage_key=MagicMock(side_effect=lambda module, name, params: name),
+            query_multi=MagicMock(side_effect=lambda keys, block_hash: [(key, MagicMock(value=storage[key])) for key in keys]),
+        )
+        return MagicMock(spec=bittensor.Subtensor, substrate=MagicMock(__enter__=MagicMock(return_value=substrate))), substrate
+
+    def test_get_subnet_hyperparameters(self):
+        mock_subtensor, substrate = self._mock_subtensor(self.storage)
+        hyperparameters = bittensor.Subtensor.get_subnet_hyperparameters(mock_subtensor, netuid=3)
+
+        substrate.query_multi.assert_called_once()
+        _, kwargs = substrate.query_multi.call_args
+        self.assertEqual(kwargs['block_hash'], '0xhead')
+        substrate.query.assert_not_called()
+
+        self.assertEqual(hyperparameters.netuid, 3)
+        self.assertEqual(hyperparameters.block, 123)
+        self.assertEqual(hyperparameters.validator_batch_size, 32)
+        self.assertEqual(hyperparameters.validator_epoch_length, 100)
+        self.assertEqual(hyperparameters.max_n, 4096)
+        self.assertAlmostEqual(hyperparameters.validator_exclude_quantile, bittensor.utils.U16_NORMALIZED_FLOAT(6553))
+        self.assertAlmostEqual(hyperparameters.scaling_law_power, 0.5)
+        with pytest.raises(Exception):
+            hyperparameters.validator_batch_size = 64  # frozen
+
+    def test_get_subnet_hyperparameters_no_subnet(self):
+        mock_subtensor, _ = self._mock_subtensor({**self.storage, 'NetworksAdded': False})
+        self.assertIsNone(bittensor.Subtensor.get_subnet_hyperparameters(mock_subtensor, netuid=3))
+
+class TestIncrementalMetagraphSync(unittest.TestCase):
+    """
+    Test incremental metagraph sync from the lite neurons
+    """
+    @staticmethod
+    def _neuron(uid, hotkey = None, last_update = 0, weights = None, bonds = None, validator_permit = False, rank = 0.):
+        return bittensor.NeuronInfo(
+            hotkey = hotkey or 'hk{}'.format(uid), coldkey = 'ck{}'.format(uid), uid = uid, netuid = 3, active = 1,
+            stake = bittensor.Balance.from_rao(1), stake_dict = {}, total_stake = bittensor.Balance.from_rao(1),
+            rank = rank, emission = 0., incentive = 0., consensus = 0., trust = 0., validator_trust = 0., dividends = 0.,
+            last_update = last_update, validator_permit = validator_permit, weights = weights or [], bonds = bonds or [],
+            prometheus_info = bittensor.PrometheusInfo( block = 0, version = 1, ip = '0.0.0.0', port = 0, ip_type = 4 ),
+            axon_info = bittensor.AxonInfo( block = 0, version = 1, ip = '0.0.0.0', port = 0, ip_type = 4, protocol = 0,
+                                            placeholder1 = 0, placeholder2 = 0 ),
+            pruning_score = 0,
+        )
+
+    @staticmethod
+    def _lite(neuron):
+        fields = [ field.name for field in dataclasses.fields(bittensor.NeuronInfoLite) ]
+        return bittensor.NeuronInfoLite( **{ name: getattr(neuron, name) for name in fields } )
+
+    def _sync(self, previous_neurons, chain_neurons, previous_block, block):
+        previous = bittensor.metagraph.from_neurons( network = 'finney', netuid = 3, info = SimpleNamespace(tempo = 99),
+                                                     neurons = previous_neurons, block = previous_block )
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.neurons_lite.return_value = [ self._lite(neuron) for neuron in chain_neurons ]
+        mock_subtensor._neurons_for_uids.side_effect = lambda netuid, uids, block, block_hash: [ chain_neurons[uid] for uid in uids ]
+        mock_subtensor.neurons.return_value = chain_neurons
+        neurons = bittensor.Subtensor.neurons_incremental( mock_subtensor, netuid = 3, previous = previous, block = block, block_hash = '0xabc' )
+        refetched = sorted( uid for call in mock_subtensor._neurons_for_uids.call_args_list for uid in call.args[1] )
+        assert all( call.args[3] == '0xabc' for call in mock_subtensor._neurons_for_uids.call_args_list )
+        return sorted( neurons, key = lambda neuron: neuron.uid ), refetched, mock_subtensor.neurons.called
+
+    def test_refetches_changed_neurons(self):
+        previous = [ self._neuron(uid, weights = [[0, 100]]) for uid in range(15) ]
+        chain = [ self._neuron(uid, weights = [[0, 100]], rank = 0.5) for uid in range(15) ]
+        chain[1] = self._neuron(1, hotkey = 'new1')  # re-registered
+        chain[3] = self._neuron(3, last_update = 10, weights = [[1, 200]])  # set weights
+        chain += [ self._neuron(15, weights = [[2, 300]]) ]  # new uid
+
+        neurons, refetched, full_sync = self._sync(previous, chain, previous_block = 5, block = 10)  # no epoch at tempo 99
+        assert refetched == [1, 3, 15] and not full_sync
+        assert neurons == chain  # unchanged neurons keep their weights, with the lite fields of the block
+
+    def test_refetches_bonds_after_epoch(self):
+        previous = [ self._neuron(0, validator_permit = True, bonds = [[1, 10]]), self._neuron(1), self._neuron(2, bonds = [[0, 5]]) ]
+        chain = [ self._neuron(0, validator_permit = True, bonds = [[1, 20]]), self._neuron(1), self._neuron(2, bonds = [[0, 7]]) ]
+
+        neurons, refetched, full_sync = self._sync(previous, chain, previous_block = 90, block = 100)  # epoch at block 96 for netuid 3
+        assert refetched == [] and full_sync  # 2 of 3 neurons refetched, one request for all
+        assert neurons == chain
+
+    def test_neurons_for_uids_at_block_hash(self):
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.pool = SimpleNamespace( size = 4 )
+        mock_subtensor._runtime_call.side_effect = lambda method, params, block_hash: [ params[1] ]
+        with patch.object(bittensor.NeuronInfo, 'from_vec_u8', side_effect = lambda result: self._neuron(result[0])):
+            neurons = bittensor.Subtensor._neurons_for_uids( mock_subtensor, 3, [4, 1, 7], 100, '0xabc' )
+        assert [ neuron.uid for neuron in neurons ] == [4, 1, 7]
+        assert all( call.args[2] == '0xabc' for call in mock_subtensor._runtime_call.call_args_list )
+        mock_subtensor._pin_block.assert_not_called()
+
+class TestMetagraphPinnedBlock(unittest.TestCase):
+    """
+    Test that the metagraph neurons, subnet info and block are read at one pinned block hash
+    """
+    def test_metagraph_pinned_block(self):
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.network = 'finney'
+        mock_subtensor._pin_block.return_value = (100, '0xabc')
+        mock_subtensor.pool = SimpleNamespace( size = 2 )
+        mock_subtensor._runtime_call.return_value = [1]
+        neurons = [ get_mock_neuron_by_uid(0) ]
+        with patch.object(bittensor.NeuronInfo, 'list_from_vec_u8', return_value = neurons), \
+             patch.object(bittensor.SubnetInfo, 'from_vec_u8', return_value = SimpleNamespace(tempo = 99)):
+            metagraph = bittensor.Subtensor.metagraph( mock_subtensor, netuid = 3 )
+
+        mock_subtensor._pin_block.assert_called_once_with( None )
+        methods = sorted( call.args[0] for call in mock_subtensor._runtime_call.call_args_list )
+        assert methods == [ 'neuronInfo_getNeurons', 'subnetInfo_getSubnetInfo' ]
+        assert all( call.args[2] == '0xabc' for call in mock_subtensor._runtime_call.call_args_list )
+        assert metagraph.block.item() == 100 and metagraph.n.item() == 1
+        mock_subtensor.get_current_block.assert_not_called()
+
+    def test_subnet_info_on_subquery_pool(self):
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.network = 'finney'
+        mock_subtensor._pin_block.return_value = (100, '0xabc')
+        mock_subtensor.pool = SimpleNamespace( size = 1 )
+        mock_subtensor._subquery_pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = MagicMock, size = 1 )
+        mock_subtensor._runtime_call.return_value = [1]
+        with patch.object(bittensor.NeuronInfo, 'list_from_vec_u8', return_value = [ get_mock_neuron_by_uid(0) ]), \
+             patch.object(bittensor.SubnetInfo, 'from_vec_u8', return_value = SimpleNamespace(tempo = 99)):
+            bittensor.Subtensor.metagraph( mock_subtensor, netuid = 3 )
+
+        # With a pool of one, the subnet info is read on the second connection, through a checkout of its own pool.
+        pools = { call.args[0]: call.kwargs.get('pool') for call in mock_subtensor._runtime_call.call_args_list }
+        assert pools == { 'neuronInfo_getNeurons': None, 'subnetInfo_getSubnetInfo': mock_subtensor._subquery_pool }
+
+class TestSubstratePool(unittest.TestCase):
+    """
+    Test the pool of connections for concurrent read queries
+    """
+    def test_checkout(self):
+        pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = MagicMock, size = 2 )
+        with pool.checkout():
+            assert len(pool) == 1
+        with pool.checkout():
+            assert len(pool) == 1  # reuses the idle connection
+            with pool.checkout():
+                assert len(pool) == 2  # a new connection while the first is busy
+
+    def test_concurrent_checkouts(self):
+        pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = MagicMock, size = 3 )
+        in_use = set()
+        lock = threading.Lock()
+        def read():
+            with pool.checkout() as substrate:
+                with lock:
+                    assert id(substrate) not in in_use  # one thread per connection
+                    in_use.add(id(substrate))
+                time.sleep(0.01)
+                with lock:
+                    in_use.remove(id(substrate))
+        threads = [ threading.Thread( target = read ) for _ in range(12) ]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        assert len(pool) <= 3
+
+    def test_query_map_read_in_checkout(self):
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = lambda: substrate, size = 1 )
+        mock_subtensor._cached.side_effect = lambda method, params, block, fetch: fetch()
+        def lazy_result():
+            for netuid in range(3):
+                assert mock_subtensor.pool._busy[0].locked()  # each page is read on the checked out connection
+                yield ( SimpleNamespace( value = netuid ), SimpleNamespace( value = True ) )
+        substrate.query_map.side_effect = lambda **kwargs: lazy_result()
+
+        result = bittensor.Subtensor.query_map_subtensor( mock_subtensor, 'NetworksAdded' )
+        assert not mock_subtensor.pool._busy[0].locked()
+        assert [ netuid.value for netuid, _ in result ] == [0, 1, 2] and len( result.records ) == 3
+
+    def test_cached_query_map_iterations(self):
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        substrate.query_map.side_effect = lambda **kwargs: iter( [ ( SimpleNamespace( value = i ), SimpleNamespace( value = True ) ) for i in range(3) ] )
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = lambda: substrate, size = 1 )
+        mock_subtensor.cache = bittensor._subtensor.query_cache.QueryCache()
+        mock_subtensor._cached.side_effect = lambda *args: bittensor.Subtensor._cached( mock_subtensor, *args )
+
+        first = iter( bittensor.Subtensor.query_map_subtensor( mock_subtensor, 'NetworksAdded', 100 ) )
+        next( first )
+        second = bittensor.Subtensor.query_map_subtensor( mock_subtensor, 'NetworksAdded', 100 )  # cache hit
+        assert substrate.query_map.call_count == 1
+        assert [ netuid.value for netuid, _ in second ] == [0, 1, 2]  # independent of the started iteration
+        assert [ netuid.value for netuid, _ in first ] == [1, 2]
+
+class TestIterQueryMap(unittest.TestCase):
+    """
+    Test the paged iteration of map storage functions
+    """
+    def setUp(self):
+        accounts = [ ( SimpleNamespace( value = 'account{}'.format(i) ), { 'data': { 'free': SimpleNamespace( value = i ) } } ) for i in range(5) ]
+        def query_map( module, storage_function, params, block_hash, max_results, start_key, page_size ):
+            start = 0 if start_key == None else int( start_key ) + 1
+            records = accounts[start:start + max_results]
+            return SimpleNamespace( records = records, last_key = str( start + len(records) - 1 ) )
+        self.substrate = MagicMock()
+        self.substrate.__enter__.return_value = self.substrate
+        self.substrate.get_chain_head.return_value = '0xhead'
+        self.substrate.query_map.side_effect = query_map
+        self.subtensor = MagicMock( spec = bittensor.Subtensor )
+        self.subtensor.pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = lambda: self.substrate, size = 1 )
+        self.subtensor.iter_query_map = lambda *args, **kwargs: bittensor.Subtensor.iter_query_map( self.subtensor, *args, **kwargs )
+
+    def test_pages(self):
+        records = bittensor.Subtensor.iter_query_map( self.subtensor, 'System', 'Account', page_size = 2 )
+        assert self.substrate.query_map.call_count == 0  # nothing is read before the first record is requested
+        assert next( records )[0].value == 'account0'
+        assert self.substrate.query_map.call_count == 1
+        assert [ r[0].value for r in records ] == [ 'account{}'.format(i) for i in range(1, 5) ]
+        assert self.substrate.query_map.call_count == 3
+        # All pages are read at the chain head of the first page.
+        assert { call.kwargs['block_hash'] for call in self.substrate.query_map.call_args_list } == { '0xhead' }
+        self.substrate.get_chain_head.assert_called_once()
+
+    def test_iter_balances(self):
+        balances = dict( bittensor.Subtensor.iter_balances( self.subtensor, page_size = 3 ) )
+        assert balances == { 'account{}'.format(i): bittensor.Balance( i ) for i in range(5) }
+        assert self.substrate.query_map.call_count == 2
+
+class TestExtrinsicPipeline(unittest.TestCase):
+    """
+    Test pipelined extrinsic submission with locally reserved nonces
+    """
+    def test_nonce_manager(self):
+        fetch = MagicMock(side_effect=[5, 9])
+        nonces = bittensor._subtensor.extrinsic_pipeline.NonceManager( fetch = fetch )
+        assert [ nonces.reserve('a') for _ in range(3) ] == [5, 6, 7]
+        fetch.assert_called_once_with('a')
+        nonces.resync('a')
+        assert nonces.reserve('a') == 9
+
+    def test_submit_resyncs_and_tracks_inclusion(self):
+        from hashlib import blake2b
+        from substrateinterface.exceptions import SubstrateRequestException
+        encoded = '0x' + 'ab' * 40
+        extrinsic_hash = '0x' + blake2b( bytes.fromhex( encoded[2:] ), digest_size = 32 ).hexdigest()
+
+        pipeline = None
+        included = threading.Event()
+        def submit_extrinsic(extrinsic, wait_for_inclusion, wait_for_finalization):
+            # Pending before submission, so that a block scanned before submit returns resolves the receipt.
+            assert extrinsic_hash in pipeline._pending
+            if substrate.submit_extrinsic.call_count == 1:
+                raise SubstrateRequestException({ 'code': 1014, 'message': 'Priority is too low: (1 vs 1)' })
+            included.set()
+            return SimpleNamespace( extrinsic_hash = extrinsic_hash )
+        def block_stream():
+            included.wait(5)
+            yield 11
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        substrate.get_account_nonce.side_effect = [5, 6]
+        substrate.create_signed_extrinsic.return_value = SimpleNamespace( data = SimpleNamespace( data = bytes.fromhex( encoded[2:] ) ) )
+        substrate.submit_extrinsic.side_effect = submit_extrinsic
+        substrate.rpc_request.return_value = { 'result': { 'block': { 'extrinsics': [ '0x00', encoded ] } } }
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.substrate = substrate
+        mock_subtensor.pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = MagicMock, size = 1, substrate = substrate )
+        mock_subtensor.get_current_block.return_value = 10
+        mock_subtensor.block_stream.side_effect = block_stream
+
+        pipeline = bittensor._subtensor.extrinsic_pipeline.ExtrinsicPipeline( mock_subtensor )
+        with patch('bittensor._subtensor.extrinsic_pipeline.ExtrinsicReceipt') as receipt:
+            future = pipeline.submit( MagicMock(ss58_address = 'a'), 'SubtensorModule', 'set_weights', {} )
+            assert future.result( timeout = 5 ) == receipt.return_value
+
+        # Re-signed with the chain nonce after the rejection.
+        assert [ call.kwargs['nonce'] for call in substrate.create_signed_extrinsic.call_args_list ] == [5, 6]
+        receipt.assert_called_once_with( substrate = substrate, extrinsic_hash = extrinsic_hash, block_hash = substrate.get_block_hash.return_value, extrinsic_idx = 1 )
+        receipt.return_value.process_events.assert_called_once()
+        assert len(pipeline) == 0
+
+    def test_concurrent_first_submissions_share_pipeline(self):
+        subtensor = bittensor.Subtensor( substrate = MagicMock(), network = 'finney', chain_endpoint = 'ws://127.0.0.1:9944' )
+        pipelines = []
+        with patch.object(bittensor._subtensor.extrinsic_pipeline.ExtrinsicPipeline, 'submit', autospec = True,
+                          side_effect = lambda pipeline, *args: pipelines.append( pipeline )):
+            threads = [ threading.Thread( target = subtensor.submit_pipelined, args = ( MagicMock(), 'Balances', 'transfer', {} ) ) for _ in range(8) ]
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+        assert len(pipelines) == 8 and len( set( map( id, pipelines ) ) ) == 1
+
+class TestBlockSubscription(unittest.TestCase):
+    """
+    Test the new-head subscription shared by block waiters
+    """
+    def test_wait_for_block(self):
+        closed = threading.Event()
+        def rpc_request(method, params, result_handler):
+            assert method == 'chain_subscribeNewHeads'
+            for number in [10, 11, 11, 12]:
+                result_handler({'params': {'result': {'number': hex(number)}}}, 0, 'id')
+            closed.wait(5)  # keeps the subscription open
+        substrate = MagicMock()
+        substrate.rpc_request.side_effect = rpc_request
+
+        subscription = bittensor._subtensor.block_subscription.BlockSubscription( connect = lambda: substrate )
+        assert subscription.wait( 12, timeout = 5 ) == 12
+        assert subscription.wait( timeout = 0.1 ) == 12  # no next block
+        assert next( subscription.stream() ) == 12
+        subscription.close()
+        closed.set()
+        assert substrate.rpc_request.call_count == 1
+
+    def test_stale_head_reconnects(self):
+        heads = iter([10, 11])
+        silent = threading.Event()
+        def rpc_request(method, params, result_handler):
+            silent.clear()
+            result_handler({'params': {'result': {'number': hex(next(heads))}}}, 0, 'id')
+            silent.wait(5)  # no further heads until the connection is closed
+        substrate = MagicMock(spec=['rpc_request', 'close'])
+        substrate.rpc_request.side_effect = rpc_request
+        substrate.close.side_effect = silent.set
+
+        subscription = bittensor._subtensor.block_subscription.BlockSubscription( connect = lambda: substrate, retry_delay = 0, stale_after = 0.2 )
+        assert subscription.wait( 10, timeout = 5 ) == 10
+        assert subscription.head() == 10
+        time.sleep( 0.3 )
+        assert subscription.head() is None  # stale, reconnects
+        assert subscription.wait( 11, timeout = 5 ) == 11
+        assert subscription.head() == 11
+        subscription.close()
+        assert subscription.block is None
+        silent.set()
+
+class TestQueryCache(unittest.TestCase):
+    """
+    Test the block-aware query response cache
+    """
+    def test_pinned_and_latest(self):
+        cache = bittensor._subtensor.query_cache.QueryCache( ttl = 12 )
+        fetch = MagicMock(side_effect = range(100))
+        with patch('time.monotonic', return_value = 0.):
+            assert cache.get( 'Tempo', [3], 10, fetch ) == 0
+            assert cache.get( 'Tempo', [3], 10, fetch ) == 0
+            assert cache.get( 'Tempo', [4], 10, fetch ) == 1
+            assert cache.get( 'Tempo', [3], None, fetch ) == 2
+            assert cache.get( 'Tempo', [3], None, fetch ) == 2
+        with patch('time.monotonic', return_value = 13.):
+            assert cache.get( 'Tempo', [3], None, fetch ) == 3  # latest expired after one block
+            assert cache.get( 'Tempo', [3], 10, fetch ) == 0  # pinned never expires
+        assert (cache.hits, cache.misses) == (3, 4)
+
+    def test_max_size(self):
+        cache = bittensor._subtensor.query_cache.QueryCache( max_size = 2 )
+        for block in range(3):
+            cache.get( 'Tempo', [3], block, lambda: block )
+        cache.get( 'Tempo', [3], 0, lambda: 'refetched' )
+        assert len(cache) == 2 and cache.misses == 4
+
+    def test_latest_dropped_on_head_advance(self):
+        cache = bittensor._subtensor.query_cache.QueryCache()
+        fetch = MagicMock(side_effect = range(100))
+        cache.advance( 10 )
+        assert cache.get( 'Tempo', [3], None, fetch ) == 0
+        assert cache.get( 'Tempo', [3], 10, fetch ) == 1
+        cache.advance( 10 )
+        assert cache.get( 'Tempo', [3], None, fetch ) == 0  # same head
+        cache.advance( 11 )
+        assert cache.get( 'Tempo', [3], None, fetch ) == 2  # head advanced
+        assert cache.get( 'Tempo', [3], 10, fetch ) == 1  # pinned kept
+        cache.advance( 9 )
+        assert cache.head == 11 and cache.get( 'Tempo', [3], None, fetch ) == 2
+
+    def test_invalidate_latest(self):
+        cache = bittensor._subtensor.query_cache.QueryCache()
+        fetch = MagicMock(side_effect = range(100))
+        assert cache.get( 'Tempo', [3], None, fetch ) == 0
+        assert cache.get( 'Tempo', [3], 10, fetch ) == 1
+        cache.invalidate_latest()
+        assert len(cache) == 1
+        assert cache.get( 'Tempo', [3], None, fetch ) == 2
+        assert cache.get( 'Tempo', [3], 10, fetch ) == 1
+
+    def test_cached_follows_subscription_head(self):
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.cache = bittensor._subtensor.query_cache.QueryCache()
+        mock_subtensor._block_subscription = MagicMock()
+        mock_subtensor._block_subscription.head.return_value = 10
+        fetch = MagicMock(side_effect = range(100))
+        assert bittensor.Subtensor._cached( mock_subtensor, 'Tempo', [3], None, fetch ) == 0
+        assert bittensor.Subtensor._cached( mock_subtensor, 'Tempo', [3], None, fetch ) == 0
+        mock_subtensor._block_subscription.head.return_value = 11
+        assert bittensor.Subtensor._cached( mock_subtensor, 'Tempo', [3], None, fetch ) == 1
+        bittensor.Subtensor.invalidate_latest_cache( mock_subtensor )
+        assert bittensor.Subtensor._cached( mock_subtensor, 'Tempo', [3], None, fetch ) == 2
+
+    def test_query_subtensor_cached(self):
+        mock_subtensor = MagicMock(spec=bittensor.Subtensor)
+        mock_subtensor.cache = bittensor._subtensor.query_cache.QueryCache()
+        mock_subtensor._cached.side_effect = lambda *args: bittensor.Subtensor._cached( mock_subtensor, *args )
+        mock_subtensor.substrate = MagicMock()
+        mock_subtensor.pool = bittensor._subtensor.substrate_pool.SubstratePool( connect = MagicMock(), size = 1, substrate = mock_subtensor.substrate )
+        mock_subtensor.substrate.__enter__.return_value.query.return_value = SimpleNamespace( value = 99 )
+        for _ in range(3):
+            assert bittensor.Subtensor.query_subtensor( mock_subtensor, 'Tempo', 10, [3] ).value == 99
+        assert mock_subtensor.substrate.__enter__.return_value.query.call_count == 1
+        assert (mock_subtensor.cache.hits, mock_subtensor.cache.misses) == (2, 1)
+
+class TestNeuronListDecoder(unittest.TestCase):
+    """
+    Test the specialized Vec<NeuronInfo> decoder against the generic SCALE decoder
+    """
+    @staticmethod
+    def _encode(lite: bool, n: int = 5) -> bytes:
+        neurons = []
+        for uid in range(n):
+            neuron = dict(
+                hotkey = '0x' + bytes([uid + 1] * 32).hex(), coldkey = '0x' + bytes([uid % 2 + 100] * 32).hex(),
+                uid = uid, netuid = 3, active = uid % 2 == 0,
+                axon_info = dict( block = 2**40 + uid, version = 7, ip = 3232235777 + uid, port = 8091, ip_type = 4, protocol = 4, placeholder1 = 0, placeholder2 = 0 ),
+                prometheus_info = dict( block = uid, version = 1, ip = 2**100 + uid, port = 7091, ip_type = 6 ),
+                stake = [ ( '0x' + bytes([200 + k] * 32).hex(), 10**k + 2**40 ) for k in range(uid) ],
+                rank = 63 * uid, emission = 2**33 + uid, incentive = 64, consensus = 16383 + uid, trust = 16384, validator_trust = 65535,
+                dividends = 2**14 - 1, last_update = 2**31 + uid, validator_permit = uid == 1, pruning_score = 2**15,
+            )
+            if not lite:
+                neuron['weights'] = [ ( k, 1000 * k ) for k in range(uid) ]
+                neuron['bonds'] = [ ( k, 65535 ) for k in range(uid + 1) ]
+            neurons.append(neuron)
+        type_string = 'Vec<NeuronInfoLite>' if lite else 'Vec<NeuronInfo>'
+        obj = bittensor._subtensor.chain_data._rpc_runtime_config().create_scale_object(type_string)
+        return obj.encode(neurons).data
+
+    def _test_decode(self, lite: bool):
+        cls = bittensor.NeuronInfoLite if lite else bittensor.NeuronInfo
+        type_name = bittensor._subtensor.chain_data.ChainDataType.NeuronInfoLite if lite else bittensor._subtensor.chain_data.ChainDataType.NeuronInfo
+        vec_u8 = list(self._encode(lite))
+
+        generic = [ cls.fix_decoded_values(decoded) for decoded in bittensor._subtensor.chain_data.from_scale_encoding(vec_u8, type_name, is_vec=True) ]
+        decoded = bittensor._subtensor.chain_data.NeuronListDecoder(vec_u8, lite = lite).decode()
+        assert decoded == generic
+        assert cls.list_from_vec_u8(vec_u8) == generic
+
+        with pytest.raises(ValueError):
+            bittensor._subtensor.chain_data.NeuronListDecoder(vec_u8[:-3], lite = lite).decode()
+
+    def test_decode_neurons(self):
+        self._test_decode(lite = False)
+
+    def test_decode_neurons_lite(self):
+        self._test_decode(lite = True)
+
+class TestSimulatedSubtensor(unittest.TestCase):
+    """
+    Test the in-process chain simulator behind bittensor.subtensor( network = 'sim' )
+    """
+    def test_deterministic_state(self):
+        first = bittensor._subtensor.subtensor_sim.Simulated_Subtensor( n_subnets = 3, n_neurons = 32, seed = 7 )
+        second = bittensor._subtensor.subtensor_sim.Simulated_Subtensor( n_subnets = 3, n_neurons = 32, seed = 7 )
+        # Subnets are generated on access, in any order.
+        assert second.neurons( netuid = 3 ) == first.neurons( netuid = 3 )
+        assert second.neurons( netuid = 1 ) == first.neurons( netuid = 1 )
+        assert first.neurons( netuid = 1 ) != first.neurons( netuid = 2 )
+        assert first.get_all_subnet_netuids() == [1, 2, 3]
+
+    def test_metagraph_sync(self):
+        sim = bittensor.subtensor( network = 'sim' )
+        assert isinstance( sim, bittensor._subtensor.subtensor_sim.Simulated_Subtensor )
+        metagraph = sim.metagraph( netuid = 1 )
+        assert metagraph.n.item() == 1024
+        assert metagraph.block.item() == sim.get_current_block()
+        lite = sim.metagraph( netuid = 1, lite = True )
+        assert lite.hotkeys == metagraph.hotkeys
+
+    def test_blocks(self):
+        sim = bittensor._subtensor.subtensor_sim.Simulated_Subtensor( n_neurons = 8 )
+        assert sim.get_current_block() == 0
+        assert sim.wait_for_block( 5 ) == 5  # produced at once without a block time
+        assert sim.wait_for_block( timeout = 0 ) == 5
+
+    def test_validator_epoch_loop(self):
+        # Blocks advance over time by default, so that a validator polling the block ends its epoch.
+        assert bittensor.subtensor( network = 'sim' ).chain.block_time == bittensor.__blocktime__
+        sim = bittensor._subtensor.subtensor_sim.Simulated_Subtensor( n_neurons = 8, block_time = 0.01 )
+        blocks_per_epoch = 5
+        deadline = time.time() + 5
+        start_block = sim.wait_for_block( timeout = 0 )
+        while sim.block < start_block + blocks_per_epoch:
+            assert time.time() < deadline, 'epoch did not end'
+            time.sleep( 0.005 )
+        assert sim.block >= start_block + blocks_per_epoch
+
+    def test_extrinsics(self):
+        sim = bittensor._subtensor.subtensor_sim.Simulated_Subtensor( n_neurons = 8 )
+        coldkey = SimpleNamespace( ss58_address = "5DD26kC2kxajmwfbbZmVmxhrY9VeeyR1Gpzy9i8wxLUg6zxm" )
+        hotkey = SimpleNamespace( ss58_address = "5CtstubuSoVLJGCXkiWRNKrrGg2DVBZ9qMs2qYTLsZR4q1Wg" )
+        wallet = MagicMock( spec = bittensor.Wallet, coldkey = coldkey, coldkeypub = coldkey, hotkey = hotkey )
+
+        assert sim.burned_register( wallet, netuid = 1 )
+        uid = sim.get_uid_for_hotkey_on_subnet( hotkey.ss58_address, netuid = 1 )
+        assert uid == 8
+        assert sim.get_balance( coldkey.ss58_address ) == bittensor.Balance.from_tao( 999 )  # endowment less the burn
+
+        assert sim.add_stake( wallet, amount = 10.0, wait_for_inclusion = True )
+        assert sim.get_stake_for_coldkey_and_hotkey( hotkey.ss58_address, coldkey.ss58_address ) == bittensor.Balance.from_tao( 10 ) - bittensor.Balance.from_rao( 1000 )
+
+        assert sim.set_weights( wallet, netuid = 1, uids = [0, 1], weights = [0.25, 0.75], wait_for_inclusion = True )
+        neuron = sim.neuron_for_uid( uid, netuid = 1 )
+        assert [ dest for dest, _ in neuron.weights ] == [0, 1]
+        assert neuron.last_update == sim.get_current_block()
+
+        # A failed call of a batch reverts the batch.
+        balance = sim.get_balance( coldkey.ss58_address )
+        calls = [
+            { 'call_module': 'SubtensorModule', 'call_function': 'add_stake', 'call_params': { 'hotkey': hotkey.ss58_address, 'amount_staked': 10 } },
+            { 'call_module': 'SubtensorModule', 'call_function': 'remove_stake', 'call_params': { 'hotkey': hotkey.ss58_address, 'amount_unstaked': 10 ** 12 } },
+        ]
+        with pytest.raises( bittensor._subtensor.subtensor_sim.SimulationError ):
+            sim.chain.apply( coldkey.ss58_address, { 'call_module': 'Utility', 'call_function': 'batch_all', 'call_params': { 'calls': calls } } )
+        assert sim.get_balance( coldkey.ss58_address ) == balance
+
+class TestAsyncSubtensor(unittest.TestCase):
+    """ Runs the client against a local stub websocket server, which answers in reverse order of the requests. """
+    def _run(self, client_main, responses, batch: int):
+        websockets = pytest.importorskip('websockets')
+        received = []
+
+        async def handler(websocket, path=None):
+            pending = []
+            async for message in websocket:
+                request = json.loads(message)
+                received.append(request)
+                pending.append(request)
+                if len(pending) == batch:
+                    for request in reversed(pending):
+                        await websocket.send(json.dumps({ 'jsonrpc': '2.0', 'id': request['id'], **responses(request) }))
+                    pending = []
+
+        async def main():
+            async with websockets.serve(handler, '127.0.0.1', 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                async with bittensor.AsyncSubtensor(chain_endpoint='ws://127.0.0.1:{}'.format(port)) as subtensor:
+                    return await asyncio.wait_for(client_main(subtensor), timeout=10)
+
+        return asyncio.run(main()), received
+
+    def test_pipelined_requests(self):
+        def responses(request):
+            return { 'result': { 'number': hex(request['id']) } }
+
+        async def client_main(subtensor):
+            # Every request is outstanding before the server answers any of them.
+            return await asyncio.gather(*[ subtensor.get_current_block() for _ in range(5) ])
+
+        blocks, received = self._run(client_main, responses, batch = 5)
+        assert blocks == [ request['id'] for request in received ]
+        assert len(set(blocks)) == 5
+
+    def test_decoders_and_errors(self):
+        def responses(request):
+            if request['method'] == 'chain_getBlockHash':
+                return { 'result': '0x' + '12' * 32 }
+            if request['method'] == 'subnetInfo_getSubnetInfo':
+                return { 'error': { 'code': 1, 'message': 'bad netuid' } }
+            return { 'result': [1, 2, 3] }
+
+        async def client_main(subtensor):
+            neurons = await subtensor.neurons_lite(netuid = 3, block = 10)
+            try:
+                await subtensor.get_subnet_info(netuid = 99)
+            except bittensor._subtensor.async_subtensor_impl.SubstrateRequestException:
+                return neurons, True
+            return neurons, False
+
+        with patch.object(bittensor.NeuronInfoLite, 'list_from_vec_u8', return_value=['decoded']) as decoder:
+            (neurons, raised), received = self._run(client_main, responses, batch = 1)
+        decoder.assert_called_once_with([1, 2, 3])
+        assert neurons == ['decoded']
+        assert raised
+        assert received[1]['method'] == 'neuronInfo_getNeuronsLite'
+        assert received[1]['params'] == ['0x' + '12' * 32, 3]
+
+    def test_connect_on_first_use(self):
+        websockets = pytest.importorskip('websockets')
+        connections = []
+
+        async def handler(websocket, path=None):
+            connections.append(websocket)
+            async for message in websocket:
+                request = json.loads(message)
+                await websocket.send(json.dumps({ 'jsonrpc': '2.0', 'id': request['id'], 'result': { 'number': '0xa' } }))
+
+        async def main():
+            async with websockets.serve(handler, '127.0.0.1', 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                subtensor = bittensor.AsyncSubtensor(chain_endpoint='ws://127.0.0.1:{}'.format(port))
+                # Requests gathered before the client is connected share one connection.
+                blocks = await asyncio.gather(*[ subtensor.get_current_block() for _ in range(5) ])
+                await connections[0].close()  # the node drops the connection
+                await asyncio.sleep(0.1)
+                blocks.append( await subtensor.get_current_block() )  # reconnects
+                await subtensor.close()
+                return blocks
+
+        assert asyncio.run(main()) == [10] * 6
+        assert len(connections) == 2
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file